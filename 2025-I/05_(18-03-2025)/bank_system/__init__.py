@@ -0,0 +1,23 @@
+"""
+Bank System.
+"""
+
+from .accounts import BankAccount
+from .journal import TransactionJournal, NullJournal, RECORD_DTYPE
+from .concurrency import ThreadSafeBankAccount, transfer
+from .batch import BatchEngine
+from .fraud import FraudMonitor, Alert, WithdrawalCountRule, WithdrawnAmountRule, DrainRule
+
+__version__ = '1.0.0'
+__all__ = ['BankAccount',
+           'TransactionJournal',
+           'NullJournal',
+           'RECORD_DTYPE',
+           'ThreadSafeBankAccount',
+           'transfer',
+           'BatchEngine',
+           'FraudMonitor',
+           'Alert',
+           'WithdrawalCountRule',
+           'WithdrawnAmountRule',
+           'DrainRule']
@@ -0,0 +1,67 @@
+"""
+Bank accounts.
+
+BankAccount is the class of `oop_part2.py`. It can also record its
+transactions in a TransactionJournal instead of printing them.
+"""
+
+
+class BankAccount:
+    """A bank account with a private balance."""
+
+    def __init__(self, owner, account_number, balance=0, journal=None):
+        """
+        Args:
+            owner (str): Account owner.
+            account_number (int): Account number, also the account key in the journal.
+            balance (float): Opening balance, journaled as a first deposit.
+            journal (TransactionJournal): Where transactions are recorded; None prints them.
+        """
+        self.__owner = owner
+        self.__balance = balance  # This is private attribute because it has double underscore
+        self._account_number = account_number  # This is protected attribute so it shouldn't be accessed directly
+        self._journal = journal
+        if journal is not None and balance:
+            journal.append(account_number, balance, balance)
+
+    @classmethod
+    def from_journal(cls, owner, account_number, journal):
+        """Reopens an account with the last balance recorded in the journal."""
+        account = cls(owner, account_number, journal=journal)
+        account.__balance = journal.balance(account_number)
+        return account
+
+    # Method to deposit money
+    def deposit(self, amount):
+        self.__balance += amount
+        self._log_transaction(f"Deposited: {amount}", amount)
+
+    # Protected method (convention: internal use only)
+    def _log_transaction(self, message, amount=0):
+        if self._journal is None:
+            print(f"Transaction Log: {message} - Balance: {self.__balance}")
+        else:
+            self._journal.append(self._account_number, amount, self.__balance)
+
+    # Method to withdraw money
+    def withdraw(self, amount):
+        if amount > self.__balance:
+            raise ValueError("Insufficient funds")
+        self.__balance -= amount
+        self._log_transaction(f"Withdrew: {amount}", -amount)
+
+    # Method to get the current balance
+    def get_balance(self):
+        return self.__balance
+
+    def get_owner(self):
+        return self.__owner
+
+    def get_account_number(self):
+        return self._account_number
+
+    def balance_as_of(self, time_ns):
+        """Balance at a past time (nanoseconds since the epoch), from the journal."""
+        if self._journal is None:
+            raise ValueError("This account has no journal")
+        return self._journal.balance_as_of(self._account_number, time_ns)
@@ -0,0 +1,126 @@
+"""
+Batch transfers and interest over NumPy arrays of balances.
+
+BatchEngine keeps the balances of millions of accounts in one int64 array,
+in minor units (e.g. cents), and applies end-of-day work in vectorized
+passes instead of calling deposit/withdraw on every BankAccount.
+
+Results are the same as the scalar code, transfer by transfer:
+
+- a transfer is withdraw(source) then deposit(target), in batch order, and
+  is skipped when the source has insufficient funds at that point of the
+  batch (see BankAccount.withdraw);
+- interest is deposit(round(balance * rate)), with round-half-even like
+  Python's round().
+
+Integer amounts keep prefix sums exact, which is what lets a whole window of
+transfers be resolved with a few vectorized passes (see
+BatchEngine._apply_window).
+"""
+import numpy as np
+
+
+class BatchEngine:
+    """Balances of many accounts, updated in vectorized batches."""
+
+    def __init__(self, balances):
+        """
+        Args:
+            balances: Initial balance of every account, in minor units; accounts are numbered from 0.
+        """
+        self.balances = np.array(balances, dtype=np.int64)
+
+    def __len__(self):
+        return self.balances.size
+
+    @classmethod
+    def from_accounts(cls, accounts):
+        """Engine holding the current balances of BankAccount objects, in the order given."""
+        return cls([account.get_balance() for account in accounts])
+
+    def _apply_window(self, sources, targets, amounts, max_passes):
+        """
+        Applies a window of transfers in order; returns (applied, settled).
+
+        Whether a transfer goes through only depends on which of the earlier
+        transfers did. Starting from "all of them", every pass recomputes the
+        outcome of each transfer from the outcomes of the previous pass; the
+        outcomes of the scalar loop are the only fixed point. If the outcomes of
+        two passes agree up to position p, the first p + 1 of them are final, so
+        when `max_passes` is reached only those `settled` transfers are applied.
+        """
+        n = sources.size
+        positions = np.arange(n)
+        # Every transfer is a debit of the source followed by a credit of the target,
+        # sorted once by (account, position) so that a pass is a prefix sum per account
+        accounts = np.concatenate([sources, targets])
+        sequence = np.concatenate([positions, positions])
+        deltas = np.concatenate([-amounts, amounts])
+        credit = np.repeat(np.array([False, True]), n)
+        order = np.lexsort((credit, sequence, accounts))
+        accounts, deltas, credit, sequence = accounts[order], deltas[order], credit[order], sequence[order]
+        debits = ~credit
+        starts = np.flatnonzero(np.concatenate([[True], accounts[1:] != accounts[:-1]]))
+        segment = np.repeat(np.arange(starts.size), np.diff(np.append(starts, accounts.size)))
+        opening = self.balances[accounts]
+
+        applied = np.ones(n, dtype=bool)
+        for _ in range(max_passes):
+            applied_deltas = np.where(applied[sequence], deltas, 0)
+            totals = np.cumsum(applied_deltas)
+            # Balance of the account right before each of its events
+            before = opening + totals - applied_deltas - (totals[starts] - applied_deltas[starts])[segment]
+            outcome = np.ones(n, dtype=bool)
+            outcome[sequence[debits & (before + deltas < 0)]] = False
+            changed = np.flatnonzero(outcome != applied)
+            applied = outcome
+            if not changed.size:
+                # Last event of every account holds its closing balance
+                ends = np.append(starts[1:], accounts.size) - 1
+                self.balances[accounts[ends]] = before[ends] + np.where(applied[sequence[ends]], deltas[ends], 0)
+                return applied, n
+        settled = int(changed[0]) + 1
+        mask = applied[:settled]
+        np.subtract.at(self.balances, sources[:settled][mask], amounts[:settled][mask])
+        np.add.at(self.balances, targets[:settled][mask], amounts[:settled][mask])
+        return applied[:settled], settled
+
+    def apply_transfers(self, sources, targets, amounts, window: int = 1 << 11, max_passes: int = 16) -> np.ndarray:
+        """
+        Applies transfers in order, skipping those the source cannot pay.
+
+        Args:
+            sources, targets: Account numbers of every transfer.
+            amounts: Amount of every transfer, in minor units.
+            window (int): Transfers resolved together (see _apply_window).
+            max_passes (int): Passes over a window before moving on with its settled part.
+
+        Returns:
+            np.ndarray: True for every transfer that was applied.
+        """
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        amounts = np.asarray(amounts, dtype=np.int64)
+        applied = np.zeros(sources.size, dtype=bool)
+        start = 0
+        while start < sources.size:
+            end = min(start + window, sources.size)
+            outcome, settled = self._apply_window(sources[start:end], targets[start:end], amounts[start:end],
+                                                  max_passes)
+            applied[start:start + settled] = outcome
+            start += settled
+        return applied
+
+    def apply_interest(self, rates) -> np.ndarray:
+        """
+        Deposits round(balance * rate) in every account.
+
+        Args:
+            rates: One rate for all the accounts, or one rate per account.
+
+        Returns:
+            np.ndarray: the interest paid to every account.
+        """
+        interest = np.rint(self.balances * np.asarray(rates, dtype=np.float64)).astype(np.int64)
+        self.balances += interest
+        return interest
@@ -0,0 +1,55 @@
+"""
+Thread-safe accounts.
+
+BankAccount.withdraw checks the balance and then subtracts: two threads can
+both pass the check and overdraw the account. ThreadSafeBankAccount runs
+every operation while holding a lock of its own, so operations on different
+accounts never wait for each other.
+
+A transfer needs the locks of both accounts. Taking them in a fixed order
+(by account number) means two opposite transfers, A -> B and B -> A, cannot
+each hold one lock while waiting for the other.
+"""
+import threading
+
+from .accounts import BankAccount
+
+
+class ThreadSafeBankAccount(BankAccount):
+    """A BankAccount whose operations can be called from several threads."""
+
+    def __init__(self, owner, account_number, balance=0, journal=None):
+        self._lock = threading.Lock()
+        super().__init__(owner, account_number, balance, journal)
+
+    def deposit(self, amount):
+        with self._lock:
+            BankAccount.deposit(self, amount)
+
+    def withdraw(self, amount):
+        with self._lock:
+            BankAccount.withdraw(self, amount)
+
+    def get_balance(self):
+        with self._lock:
+            return BankAccount.get_balance(self)
+
+
+def _lock_order(account):
+    # id() breaks ties between two account objects with the same number
+    return account.get_account_number(), id(account)
+
+
+def transfer(source: ThreadSafeBankAccount, target: ThreadSafeBankAccount, amount):
+    """
+    Moves money between two accounts atomically: either both balances change or none.
+
+    Raises:
+        ValueError: if the source has insufficient funds, or source and target are the same account.
+    """
+    if source is target:
+        raise ValueError("Cannot transfer to the same account")
+    first, second = sorted((source, target), key=_lock_order)
+    with first._lock, second._lock:
+        BankAccount.withdraw(source, amount)
+        BankAccount.deposit(target, amount)
@@ -0,0 +1,178 @@
+"""
+Streaming fraud rules over account transactions.
+
+FraudMonitor takes the place of a journal (see BankAccount): every deposit
+and withdrawal is passed to append() as it happens, forwarded to a real
+journal if there is one, and checked against the rules right away.
+
+Every rule keeps a small state per account, created on the first transaction
+of that account: at most a fixed number of recent (time, amount) pairs in a
+ring buffer, so memory is bounded per account and each transaction is
+checked in O(1) (amortized) instead of rescanning the history.
+
+Withdrawals have a negative amount, as in the journal.
+"""
+import time
+from collections import namedtuple
+
+Alert = namedtuple('Alert', ['rule', 'account', 'time_ns', 'amount', 'balance'])
+
+SECOND = 1_000_000_000
+
+
+class RingBuffer:
+    """Fixed-capacity FIFO of (time, amount) pairs; the oldest pair is dropped when full."""
+
+    __slots__ = ('times', 'amounts', 'head', 'size')
+
+    def __init__(self, capacity: int):
+        self.times = [0] * capacity
+        self.amounts = [0] * capacity
+        self.head = 0   # Position of the oldest pair
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, time_ns, amount):
+        """Adds a pair; returns the amount of the pair dropped to make room, or None."""
+        capacity = len(self.times)
+        dropped = None
+        if self.size == capacity:
+            dropped = self.amounts[self.head]
+            self.head = (self.head + 1) % capacity
+            self.size -= 1
+        position = (self.head + self.size) % capacity
+        self.times[position] = time_ns
+        self.amounts[position] = amount
+        self.size += 1
+        return dropped
+
+    def pop_older(self, time_ns) -> float:
+        """Drops the pairs older than `time_ns`; returns the sum of their amounts."""
+        total = 0
+        times, amounts, capacity = self.times, self.amounts, len(self.times)
+        while self.size and times[self.head] < time_ns:
+            total += amounts[self.head]
+            self.head = (self.head + 1) % capacity
+            self.size -= 1
+        return total
+
+
+class WithdrawalCountRule:
+    """More than `count` withdrawals from an account within `window_ns`."""
+
+    def __init__(self, count: int = 5, window_ns: int = 60 * SECOND, name: str = 'withdrawal_count'):
+        if count < 1:
+            raise ValueError("count must be at least 1")
+        self.count = count
+        self.window_ns = window_ns
+        self.name = name
+
+    def new_state(self):
+        # Times of the last `count` withdrawals, oldest first from position state[0]
+        return [0] + [None] * self.count
+
+    def check(self, state, time_ns, amount, balance) -> bool:
+        if amount >= 0:
+            return False
+        position = state[0] + 1
+        oldest = state[position]
+        state[position] = time_ns
+        state[0] = position % self.count
+        return oldest is not None and time_ns - oldest <= self.window_ns
+
+
+class WithdrawnAmountRule:
+    """More than `limit` withdrawn from an account within `window_ns`."""
+
+    def __init__(self, limit: float = 10_000, window_ns: int = 24 * 3600 * SECOND, capacity: int = 16,
+                 name: str = 'withdrawn_amount'):
+        """
+        Args:
+            limit (float): Largest total of withdrawals allowed within the window.
+            window_ns (int): Length of the sliding window.
+            capacity (int): Withdrawals remembered per account; beyond it the oldest are forgotten,
+                so more than `capacity` small withdrawals within the window can go unnoticed.
+            name (str): Rule name in alerts.
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.limit = limit
+        self.window_ns = window_ns
+        self.capacity = capacity
+        self.name = name
+
+    def new_state(self):
+        return [RingBuffer(self.capacity), 0]  # Withdrawals in the window and their total
+
+    def check(self, state, time_ns, amount, balance) -> bool:
+        if amount >= 0:
+            return False
+        window, total = state
+        total -= window.pop_older(time_ns - self.window_ns)
+        dropped = window.push(time_ns, -amount)
+        if dropped is not None:
+            total -= dropped
+        state[1] = total = total - amount
+        return total > self.limit
+
+
+class DrainRule:
+    """A single withdrawal of at least `minimum` taking `fraction` or more of the balance before it."""
+
+    def __init__(self, fraction: float = 0.9, minimum: float = 1_000, name: str = 'drain'):
+        self.fraction = fraction
+        self.minimum = minimum
+        self.name = name
+
+    def new_state(self):
+        return None
+
+    def check(self, state, time_ns, amount, balance) -> bool:
+        return -amount >= self.minimum and -amount >= self.fraction * (balance - amount)
+
+
+DEFAULT_RULES = (WithdrawalCountRule, WithdrawnAmountRule, DrainRule)
+
+
+class FraudMonitor:
+    """Checks every transaction against streaming rules, as the journal of BankAccounts."""
+
+    def __init__(self, rules=None, journal=None, on_alert=None):
+        """
+        Args:
+            rules (list): Rule objects (new_state() and check()); one of each DEFAULT_RULES by default.
+            journal (TransactionJournal): Where transactions are forwarded, if any.
+            on_alert: Called with every Alert; by default alerts are kept in `alerts`.
+        """
+        self.rules = [rule() for rule in DEFAULT_RULES] if rules is None else list(rules)
+        self.journal = journal
+        self.alerts = []
+        self.on_alert = self.alerts.append if on_alert is None else on_alert
+        self._checks = [rule.check for rule in self.rules]
+        self._states = {}   # account -> one state per rule
+
+    def append(self, account: int, amount: float, balance: float, time_ns: int = None):
+        """
+        Records a transaction: same arguments as TransactionJournal.append.
+
+        ThreadSafeBankAccount calls this while holding the lock of the account,
+        so the state of one account is never updated by two threads at once.
+        """
+        # One time for the journal record, the rules and the alerts
+        if time_ns is None:
+            time_ns = time.time_ns()
+        sequence = None
+        if self.journal is not None:
+            sequence = self.journal.append(account, amount, balance, time_ns)
+        states = self._states.get(account)
+        if states is None:
+            states = self._states[account] = [rule.new_state() for rule in self.rules]
+        for check, state, rule in zip(self._checks, states, self.rules):
+            if check(state, time_ns, amount, balance):
+                self.on_alert(Alert(rule.name, account, time_ns, amount, balance))
+        return sequence
+
+    def balance(self, account, default=0):
+        return default if self.journal is None else self.journal.balance(account, default)
@@ -0,0 +1,229 @@
+"""
+Append-only journal of account transactions.
+
+Every deposit or withdrawal is one fixed-width binary record of 40 bytes:
+
+    sequence (uint64) | time in ns (int64) | account (uint64) | amount (float64) | balance after (float64)
+
+Records are never rewritten. They are written in batches, and fsync is
+called every `sync_every` records (or on sync/close): a crash loses at most
+the last unsynced batch, and a torn last record is cut off when the journal
+is reopened. Because records have a fixed size, the file is also a NumPy
+array: replaying it is a memory map, not a parse.
+
+Every `checkpoint_every` records, the balances of all accounts are saved
+next to the journal. Reopening loads the last checkpoint and replays only
+the records written after it.
+
+Balance-as-of queries use a per-account index of record times, sorted by
+(account, time) and built on the first query: a binary search finds the
+last record of the account before the requested time, in O(log n).
+"""
+import os
+import struct
+import threading
+import time
+from array import array
+from bisect import bisect_right
+
+import numpy as np
+
+RECORD = struct.Struct('<QqQdd')
+RECORD_DTYPE = np.dtype([('sequence', '<u8'), ('time', '<i8'), ('account', '<u8'),
+                         ('amount', '<f8'), ('balance', '<f8')])
+
+
+class TransactionJournal:
+    """Append-only binary journal of transactions, with checkpoints and point-in-time balances."""
+
+    def __init__(self, path: str, sync_every: int = 1024, checkpoint_every: int = 1_000_000,
+                 buffer_size: int = 1 << 16):
+        """
+        Args:
+            path (str): Journal file; the checkpoint is `path` + '.checkpoint.npz'.
+            sync_every (int): Records written between two fsync calls.
+            checkpoint_every (int): Records written between two balance checkpoints (0: never).
+            buffer_size (int): Bytes buffered in memory before a write.
+        """
+        self.path = path
+        self.checkpoint_path = path + '.checkpoint.npz'
+        self.sync_every = sync_every
+        self.checkpoint_every = checkpoint_every
+        self.buffer_size = buffer_size
+        self._buffer = bytearray()
+        self._unsynced = 0
+        self._since_checkpoint = 0
+        self._index = None  # See _build_index
+        self._index_records = None
+        self._lock = threading.RLock()  # Accounts used from several threads share the journal
+        self._recent = {}   # account -> (times, sequences, balances) of records after the index
+
+        self._file = open(path, 'ab')
+        size = self._file.tell()
+        if size % RECORD.size:
+            # A torn record from a crash in the middle of a write
+            self._file.truncate(size - size % RECORD.size)
+            self._file.seek(0, os.SEEK_END)
+        self._count = self._file.tell() // RECORD.size
+        self._balances = self._recover_balances()
+        self._last_time = int(self.records()['time'][-1]) if self._count else 0
+
+    def __len__(self):
+        return self._count
+
+    def _recover_balances(self) -> dict:
+        """Balances from the last checkpoint and the records written after it."""
+        balances, start = {}, 0
+        if os.path.exists(self.checkpoint_path):
+            with np.load(self.checkpoint_path) as checkpoint:
+                start = int(checkpoint['sequence'])
+                if start <= self._count:
+                    balances = dict(zip(checkpoint['accounts'].tolist(), checkpoint['balances'].tolist()))
+                else:
+                    start = 0  # Checkpoint of records lost in a crash: replay everything
+        tail = self.records()[start:]
+        if tail.size:
+            # Last record of every account: first occurrence in the reversed tail
+            accounts, last = np.unique(tail['account'][::-1], return_index=True)
+            balances.update(zip(accounts.tolist(), tail['balance'][::-1][last].tolist()))
+        return balances
+
+    def append(self, account: int, amount: float, balance: float, time_ns: int = None) -> int:
+        """
+        Records a transaction.
+
+        Args:
+            account (int): Account number.
+            amount (float): Deposited (positive) or withdrawn (negative) amount.
+            balance (float): Balance of the account after the transaction.
+            time_ns (int): Time of the transaction; now by default. Times never go backwards.
+
+        Returns:
+            int: sequence number of the record.
+        """
+        with self._lock:
+            time_ns = time.time_ns() if time_ns is None else time_ns
+            time_ns = self._last_time = max(time_ns, self._last_time)
+            sequence = self._count
+            self._buffer += RECORD.pack(sequence, time_ns, account, amount, balance)
+            self._count += 1
+            self._balances[account] = balance
+            if self._index is not None:
+                recent = self._recent.get(account)
+                if recent is None:
+                    recent = self._recent[account] = (array('q'), array('Q'), array('d'))
+                recent[0].append(time_ns)
+                recent[1].append(sequence)
+                recent[2].append(balance)
+
+            self._unsynced += 1
+            if self._unsynced >= self.sync_every:
+                self.sync()
+            elif len(self._buffer) >= self.buffer_size:
+                self.flush()
+            self._since_checkpoint += 1
+            if self.checkpoint_every and self._since_checkpoint >= self.checkpoint_every:
+                self.checkpoint()
+            return sequence
+
+    def flush(self):
+        """Writes the buffered records to the file (without fsync)."""
+        with self._lock:
+            if self._buffer:
+                self._file.write(self._buffer)
+                self._buffer.clear()
+            self._file.flush()
+
+    def sync(self):
+        """Writes the buffered records and waits until they are on disk."""
+        with self._lock:
+            self.flush()
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def checkpoint(self):
+        """Saves every balance with the number of records it covers, atomically."""
+        with self._lock:
+            self.sync()
+            accounts = np.fromiter(self._balances.keys(), dtype=np.uint64, count=len(self._balances))
+            balances = np.fromiter(self._balances.values(), dtype=np.float64, count=len(self._balances))
+            temporary = self.checkpoint_path + '.tmp.npz'
+            np.savez(temporary, sequence=self._count, accounts=accounts, balances=balances)
+            with open(temporary, 'rb') as file:
+                os.fsync(file.fileno())
+            os.replace(temporary, self.checkpoint_path)
+            self._since_checkpoint = 0
+
+    def close(self):
+        with self._lock:
+            self.sync()
+            self._file.close()
+
+    def balance(self, account: int, default: float = 0) -> float:
+        """Current balance of an account."""
+        return self._balances.get(account, default)
+
+    def records(self) -> np.ndarray:
+        """Every written record, as a read-only memory-mapped structured array (see RECORD_DTYPE)."""
+        self.flush()
+        if not self._count:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        return np.memmap(self.path, dtype=RECORD_DTYPE, mode='r', shape=(self._count,))
+
+    def history(self, account: int) -> np.ndarray:
+        """Every record of an account in time order, as a structured array."""
+        records = self.records()
+        if self._index is None:
+            return records[records['account'] == account]
+        accounts, starts, order, _ = self._index
+        i = np.searchsorted(accounts, account)
+        indexed = order[starts[i]:starts[i + 1]] if i < accounts.size and accounts[i] == account else order[:0]
+        recent = self._recent.get(account)
+        if recent is not None:
+            indexed = np.concatenate([indexed, np.frombuffer(recent[1], dtype=np.uint64).astype(np.int64)])
+        return records[indexed]
+
+    def _build_index(self):
+        """Sorts record numbers by (account, time); appends are sorted by time already."""
+        records = self.records()
+        order = np.argsort(records['account'], kind='stable')
+        sorted_accounts = records['account'][order]
+        accounts, starts = np.unique(sorted_accounts, return_index=True)
+        # int64: searching a Python int in a uint64 array would convert the whole array on every query
+        accounts = accounts.astype(np.int64)
+        starts = np.append(starts, order.size)
+        self._index = (accounts, starts, order, records['time'][order])
+        self._index_records = records
+        self._recent = {}
+
+    def balance_as_of(self, account: int, time_ns: int, default: float = 0) -> float:
+        """
+        Balance of an account right after its last transaction at or before `time_ns`.
+
+        Returns:
+            float: that balance, or `default` if the account had no transaction yet.
+        """
+        recent = self._recent.get(account)
+        if recent is not None and recent[0][0] <= time_ns:
+            return recent[2][bisect_right(recent[0], time_ns) - 1]
+        if self._index is None:
+            self._build_index()
+        accounts, starts, order, times = self._index
+        i = np.searchsorted(accounts, account)
+        if i == accounts.size or accounts[i] != account:
+            return default
+        start, end = starts[i], starts[i + 1]
+        position = start + np.searchsorted(times[start:end], time_ns, side='right') - 1
+        if position < start:
+            return default
+        return float(self._index_records['balance'][order[position]])
+
+
+class NullJournal:
+    """Discards transactions: for accounts that should neither print nor record them."""
+
+    def append(self, account, amount, balance, time_ns=None):
+        return None
+
+    def balance(self, account, default=0):
+        return default
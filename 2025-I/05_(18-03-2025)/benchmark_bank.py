@@ -0,0 +1,237 @@
+"""
+Benchmarks of the bank_system package.
+
+Usage:
+    python benchmark_bank.py                       # journal with 5M records
+    python benchmark_bank.py --journal 1000000
+    python benchmark_bank.py --journal --threads 1 4 16 64   # contention only
+    python benchmark_bank.py --journal --threads --batch 1000000   # batch engine only
+    python benchmark_bank.py --journal --threads --batch --fraud 1000000   # fraud rules only
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from bank_system import BankAccount, BatchEngine, FraudMonitor, NullJournal, ThreadSafeBankAccount, TransactionJournal, transfer
+
+
+def timed(label: str, operations: int, func):
+    """Runs `func` once and prints the time per operation."""
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<40} {elapsed:9.3f} s  {elapsed / operations * 1e6:10.2f} us/op")
+    return result
+
+
+def latencies(label: str, func, arguments):
+    """Calls `func` on every argument and prints the median and p99 latency."""
+    samples = []
+    for argument in arguments:
+        start = time.perf_counter()
+        func(argument)
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    print(f"  {label:<40} median {statistics.median(samples):.1f} us, p99 {samples[int(0.99 * (len(samples) - 1))]:.1f} us")
+
+
+def benchmark_journal(n_records: int, n_accounts: int = 1_000_000, n_queries: int = 10_000, seed: int = 0):
+    """Appends, recovery, replay and point-in-time balances over a journal of `n_records`."""
+    print(f"\nJournal of {n_records:,} records over {n_accounts:,} accounts")
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as directory:
+        # fsync per record, the baseline batching avoids (a small sample is enough)
+        journal = TransactionJournal(os.path.join(directory, 'fsync_each.journal'), sync_every=1)
+        timed("append, fsync every record", 2_000, lambda: [journal.append(i, 1.0, 1.0) for i in range(2_000)])
+        journal.close()
+
+        path = os.path.join(directory, 'transactions.journal')
+        # At least one checkpoint, with records after it, whatever the size of the journal
+        journal = TransactionJournal(path, sync_every=1024, checkpoint_every=min(1_000_000, max(1, n_records // 2)))
+        balances = [0.0] * n_accounts
+        start_ns = time.time_ns()
+
+        def appends():
+            for i in range(n_records):
+                account = rng.randrange(n_accounts)
+                amount = rng.choice((100.0, 50.0, -20.0))
+                balances[account] += amount
+                journal.append(account, amount, balances[account], start_ns + i * 1000)
+        timed("append, fsync every 1024 records", n_records, appends)
+        journal.close()
+        print(f"  {'journal size':<40} {os.path.getsize(path) / 1e6:9.1f} MB")
+
+        journal = timed("reopen (checkpoint + tail)", 1, lambda: TransactionJournal(path))
+        journal.close()
+        if os.path.exists(journal.checkpoint_path):
+            os.remove(journal.checkpoint_path)
+        journal = timed("reopen (full replay, no checkpoint)", 1, lambda: TransactionJournal(path))
+
+        def replay():
+            records = journal.records()
+            return np.bincount(records['account'].astype(np.int64), weights=records['amount'], minlength=n_accounts)
+        totals = timed("replay all records (per-account sums)", n_records, replay)
+        assert np.allclose(totals, balances)
+
+        accounts = [rng.randrange(n_accounts) for _ in range(n_queries)]
+        timed("index build (first balance_as_of)", n_records, lambda: journal._build_index())
+        times = [start_ns + rng.randrange(n_records) * 1000 for _ in range(n_queries)]
+        latencies("balance_as_of", lambda i: journal.balance_as_of(accounts[i], times[i]), range(n_queries))
+        latencies("history (one account)", journal.history, accounts[:1_000])
+        journal.close()
+
+
+def run_threads(n_threads: int, work) -> float:
+    """Runs work(thread_number) in `n_threads` threads started together; returns the elapsed seconds."""
+    barrier = threading.Barrier(n_threads + 1)
+
+    def run(number):
+        barrier.wait()
+        work(number)
+
+    threads = [threading.Thread(target=run, args=(number,)) for number in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def benchmark_contention(thread_counts, n_accounts: int = 1_000_000, n_transfers: int = 400_000, seed: int = 0):
+    """Random transfers between ThreadSafeBankAccounts, spread over all accounts or on a few hot ones."""
+    print(f"\nTransfers between {n_accounts:,} accounts")
+    journal = NullJournal()
+    accounts = [ThreadSafeBankAccount(f"Owner {i}", i, 100, journal) for i in range(n_accounts)]
+    total = 100 * n_accounts
+
+    # Many threads withdrawing from one account must never overdraw it
+    account = accounts[0]
+    withdrawn = [0] * 64
+
+    def drain(number):
+        for _ in range(100):
+            try:
+                account.withdraw(1)
+                withdrawn[number] += 1
+            except ValueError:
+                pass
+    run_threads(64, drain)
+    assert sum(withdrawn) == 100 and account.get_balance() == 0
+    account.deposit(100)
+
+    print(f"  {'threads':>8} {'all accounts':>16} {'16 hot accounts':>18}")
+    for n_threads in thread_counts:
+        rates = []
+        for n_targets in (n_accounts, 16):
+            per_thread = n_transfers // n_threads
+
+            def work(number):
+                rng = random.Random(seed + number)
+                for _ in range(per_thread):
+                    source, target = rng.randrange(n_targets), rng.randrange(n_targets)
+                    if source != target:
+                        try:
+                            transfer(accounts[source], accounts[target], rng.randint(1, 10))
+                        except ValueError:
+                            pass  # Insufficient funds
+            elapsed = run_threads(n_threads, work)
+            rates.append(per_thread * n_threads / elapsed)
+            # Transfers only move money: the total never changes and no balance goes negative
+            balances = [account.get_balance() for account in accounts]
+            assert sum(balances) == total and min(balances) >= 0
+        print(f"  {n_threads:>8} {rates[0]:>12,.0f} /s {rates[1]:>14,.0f} /s")
+
+
+def benchmark_batch(n_accounts: int, n_transfers: int = None, rate: float = 0.0001, seed: int = 0):
+    """BatchEngine against a loop over BankAccount objects, on the same transfers and interest."""
+    n_transfers = n_accounts if n_transfers is None else n_transfers
+    print(f"\nBatch of {n_transfers:,} transfers and interest over {n_accounts:,} accounts")
+    rng = np.random.default_rng(seed)
+    balances = rng.integers(0, 10_000, n_accounts)
+    sources = rng.integers(0, n_accounts, n_transfers)
+    targets = rng.integers(0, n_accounts, n_transfers)
+    journal = NullJournal()
+
+    for label, high in (("few overdrafts", 100), ("many overdrafts", 10_000)):
+        amounts = rng.integers(1, high, n_transfers)
+        accounts = [BankAccount(f"Owner {i}", i, balance, journal) for i, balance in enumerate(balances.tolist())]
+
+        def loop():
+            applied = []
+            for source, target, amount in zip(sources.tolist(), targets.tolist(), amounts.tolist()):
+                try:
+                    accounts[source].withdraw(amount)
+                except ValueError:
+                    applied.append(False)  # Insufficient funds
+                    continue
+                accounts[target].deposit(amount)
+                applied.append(True)
+            return applied
+        print(f"  {label}:")
+        expected = timed("transfers, BankAccount loop", n_transfers, loop)
+        engine = BatchEngine(balances)
+        applied = timed("transfers, BatchEngine", n_transfers, lambda: engine.apply_transfers(sources, targets, amounts))
+        print(f"  {'rejected':<40} {n_transfers - int(applied.sum()):9,}")
+        assert applied.tolist() == expected
+
+        timed("interest, BankAccount loop", n_accounts,
+              lambda: [account.deposit(round(account.get_balance() * rate)) for account in accounts])
+        timed("interest, BatchEngine", n_accounts, lambda: engine.apply_interest(rate))
+        assert engine.balances.tolist() == [account.get_balance() for account in accounts]
+
+
+def benchmark_fraud(n_events: int, n_accounts: int = 100_000, seed: int = 0):
+    """Events per second through FraudMonitor, alone and behind BankAccount.deposit/withdraw."""
+    print(f"\nFraud rules over {n_events:,} transactions of {n_accounts:,} accounts")
+    rng = random.Random(seed)
+    accounts = [rng.randrange(n_accounts) for _ in range(n_events)]
+    amounts = [rng.choice((500, 200, -100, -50, -2_000)) for _ in range(n_events)]
+    times = [i * 1_000_000 for i in range(n_events)]  # One transaction per millisecond
+
+    def events(append):
+        balance = 10_000  # Not tracked: only the drain rule reads it
+        for account, amount, time_ns in zip(accounts, amounts, times):
+            append(account, amount, balance, time_ns)
+
+    timed("loop only (NullJournal)", n_events, lambda: events(NullJournal().append))
+    monitor = FraudMonitor()
+    timed("FraudMonitor.append, default rules", n_events, lambda: events(monitor.append))
+    print(f"  {'alerts':<40} {len(monitor.alerts):9,}")
+
+    def operations(journal):
+        bank = [BankAccount(f"Owner {i}", i, 0, journal) for i in range(n_accounts)]
+        for account, amount in zip(accounts, amounts):
+            if amount > 0:
+                bank[account].deposit(amount)
+            else:
+                try:
+                    bank[account].withdraw(-amount)
+                except ValueError:
+                    pass  # Insufficient funds
+    timed("BankAccount operations, NullJournal", n_events, lambda: operations(NullJournal()))
+    timed("BankAccount operations, FraudMonitor", n_events, lambda: operations(FraudMonitor()))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--journal', type=int, nargs='*', default=[5_000_000])
+    parser.add_argument('--threads', type=int, nargs='*', default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument('--batch', type=int, nargs='*', default=[1_000_000])
+    parser.add_argument('--fraud', type=int, nargs='*', default=[1_000_000])
+    args = parser.parse_args()
+    for n_records in args.journal:
+        benchmark_journal(n_records)
+    if args.threads:
+        benchmark_contention(args.threads)
+    for n_accounts in args.batch:
+        benchmark_batch(n_accounts)
+    for n_events in args.fraud:
+        benchmark_fraud(n_events)
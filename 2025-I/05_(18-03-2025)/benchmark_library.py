@@ -0,0 +1,306 @@
+"""
+Benchmarks of the library_system package.
+
+Usage:
+    python benchmark_library.py                      # 10k, 1M and 5M books
+    python benchmark_library.py --sizes 10000 100000
+    python benchmark_library.py --sizes --loans 10000000   # loan ledger only
+    python benchmark_library.py --sizes --loans --imports 3000000
+    python benchmark_library.py --sizes --loans --imports --storage 100000
+    python benchmark_library.py --sizes --loans --imports --storage --history 5000000
+    python benchmark_library.py --sizes --loans --imports --storage --history --display 1000000
+"""
+import argparse
+import contextlib
+import csv
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from library_system import (Book, CoBorrowingIndex, Customer, Library, LoanLedger, SQLiteLibrary,
+                            import_catalog)
+
+WORDS = ("the of and a in to history war love night house river city garden secret "
+         "last first little great lost king queen world dark light time stone fire "
+         "sea winter summer road song story book journey children island mountain").split()
+FIRST_NAMES = ("Anna Ben Carla David Elena Felix Grace Hugo Ines Jonas Karin Luis Maria Nils Olga "
+               "Pedro Rosa Sven Tara Victor").split()
+LAST_NAMES = ("Smith Garcia Muller Rossi Dubois Silva Novak Jensen Kowalski Costa Weber Moreau "
+              "Larsen Ferrari Santos Fischer Martin Berg Horvat Nielsen").split()
+
+
+def make_isbn(number: int) -> str:
+    """Builds a valid ISBN-13 from a number (978 prefix, computed check digit)."""
+    digits = f"978{number:09d}"
+    total = sum(int(digit) * (3 if i % 2 else 1) for i, digit in enumerate(digits))
+    return digits + str((10 - total % 10) % 10)
+
+
+def make_authors(n_books: int) -> list:
+    """Author names for a catalog of `n_books` (about 20 books per author)."""
+    names = []
+    for i in range(max(1, n_books // 20)):
+        first, i = divmod(i, len(LAST_NAMES))
+        first, middle = divmod(first, len(FIRST_NAMES))
+        name = f"{FIRST_NAMES[middle]} {LAST_NAMES[i]}"
+        names.append(f"{name} {first}" if first else name)
+    return names
+
+
+def make_books(n: int, seed: int = 0):
+    """Yields `n` synthetic books with random titles and ~20 books per author."""
+    rng = random.Random(seed)
+    authors = make_authors(n)
+    for i in range(n):
+        title = " ".join(rng.choices(WORDS, k=rng.randint(2, 6))).capitalize()
+        yield Book(title, rng.choice(authors), make_isbn(i))
+
+
+def timed(label: str, operations: int, func):
+    """Runs `func` once and prints the time per operation."""
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<38} {elapsed:9.3f} s  {elapsed / operations * 1e6:10.2f} us/op")
+    return result
+
+
+def benchmark_catalog(n_books: int, n_lookups: int = 100_000, seed: int = 0):
+    """Catalog build, indexed lookups, checkouts and the old linear scan."""
+    print(f"\n{n_books:,} books")
+    rng = random.Random(seed)
+    library = Library()
+    books = list(make_books(n_books, seed))
+    timed("add_book", n_books, lambda: [library.add_book(book) for book in books])
+    n_customers = max(1, n_books // 10)
+    timed("add_customer", n_customers,
+          lambda: [library.add_customer(Customer(f"Customer {i}", f"C{i}")) for i in range(n_customers)])
+
+    isbns = [make_isbn(rng.randrange(n_books)) for _ in range(n_lookups)]
+    customer_ids = [f"C{rng.randrange(n_customers)}" for _ in range(n_lookups)]
+    timed("find_book", n_lookups, lambda: [library.find_book(isbn) for isbn in isbns])
+    timed("find_customer", n_lookups, lambda: [library.find_customer(cid) for cid in customer_ids])
+
+    def checkouts():
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            for customer_id, isbn in zip(customer_ids, isbns):
+                library.check_out_book(customer_id, isbn)
+                library.check_in_book(customer_id, isbn)
+    timed("check_out_book + check_in_book", n_lookups, checkouts)
+
+    authors = rng.choices(make_authors(n_books), k=n_lookups)
+    timed("find_books_by_author", n_lookups, lambda: [library.find_books_by_author(a) for a in authors])
+    prefixes = [rng.choice(WORDS)[:rng.randint(1, 4)] for _ in range(n_lookups // 10)]
+    timed("find_books_by_title (top 20)", len(prefixes),
+          lambda: [library.find_books_by_title(p, limit=20) for p in prefixes])
+
+    # The previous implementation scanned a list; a few lookups are enough to see the difference
+    n_scans = max(1, min(1_000, 10_000_000 // n_books))
+    timed("linear scan (previous find_book)", n_scans,
+          lambda: [next((b for b in books if b.isbn == isbn), None) for isbn in isbns[:n_scans]])
+
+
+def benchmark_search(n_books: int, n_queries: int = 1_000, seed: int = 0):
+    """Latency of top-20 BM25 queries of one to three words."""
+    rng = random.Random(seed)
+    library = Library()
+    for book in make_books(n_books, seed):
+        library.add_book(book)
+    queries = [" ".join(rng.choices(WORDS + FIRST_NAMES + LAST_NAMES, k=rng.randint(1, 3)))
+               for _ in range(n_queries)]
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        library.search(query, limit=20)
+        latencies.append((time.perf_counter() - start) * 1e3)
+    latencies.sort()
+    print(f"  {'search (top 20)':<38} median {statistics.median(latencies):.2f} ms, "
+          f"p95 {latencies[int(0.95 * (n_queries - 1))]:.2f} ms, max {latencies[-1]:.2f} ms")
+
+
+def benchmark_loans(n_loans: int, seed: int = 0):
+    """Loan ledger with `n_loans` active loans due over the next 30 days."""
+    print(f"\n{n_loans:,} active loans")
+    rng = random.Random(seed)
+    now = time.time()
+    # Integer IDs keep 10M loans within a few GB; the ledger does not care about the key types
+    n_customers = max(1, n_loans // 5)
+    loans = [(rng.randrange(n_customers), isbn, now + rng.uniform(0, 30 * 86400)) for isbn in range(n_loans)]
+    ledger = LoanLedger()
+    timed("add", n_loans, lambda: [ledger.add(customer_id, isbn, due) for customer_id, isbn, due in loans])
+
+    n_returns = n_loans // 10
+    returned = rng.sample(loans, n_returns)
+    timed("remove (returned books)", n_returns,
+          lambda: [ledger.remove(customer_id, isbn) for customer_id, isbn, _ in returned])
+    lookups = rng.sample(loans, min(100_000, n_loans))
+    timed("due_date", len(lookups), lambda: [ledger.due_date(customer_id, isbn) for customer_id, isbn, _ in lookups])
+
+    for days in (0.01, 0.1, 1, 3):
+        start = time.perf_counter()
+        overdue = ledger.overdue(now + days * 86400)
+        elapsed = time.perf_counter() - start
+        print(f"  {f'overdue after {days} days':<38} {elapsed:9.3f} s  {len(overdue):,} loans")
+
+    # Without due-date ordering, finding overdue loans means visiting every loan
+    cutoff = now + 0.1 * 86400
+    start = time.perf_counter()
+    overdue = sorted((entry for entry in ledger._loans.values() if entry[0] < cutoff), key=lambda e: e[0])
+    elapsed = time.perf_counter() - start
+    print(f"  {'full scan, overdue after 0.1 days':<38} {elapsed:9.3f} s  {len(overdue):,} loans")
+
+
+def write_export(path: str, n_records: int, seed: int = 0):
+    """Writes a CSV catalog export with about 1% bad ISBNs and 1% duplicated records."""
+    rng = random.Random(seed)
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(('title', 'author', 'isbn'))
+        for i, book in enumerate(make_books(n_records, seed)):
+            isbn = book.isbn
+            roll = rng.random()
+            if roll < 0.01:
+                isbn = isbn[:-1] + str((int(isbn[-1]) + 1) % 10)  # Wrong check digit
+            elif roll < 0.02 and i:
+                isbn = make_isbn(rng.randrange(i))  # Already exported
+            writer.writerow((book.title, book.author, f"{isbn[:3]}-{isbn[3:]}" if i % 2 else isbn))
+
+
+def benchmark_import(n_records: int):
+    """Streaming import of a CSV export against reading it row by row with add_book."""
+    print(f"\nImport of {n_records:,} records")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'catalog.csv')
+        write_export(path, n_records)
+        print(f"  {'export size':<38} {os.path.getsize(path) / 1e6:9.1f} MB")
+
+        library = Library()
+        start = time.perf_counter()
+        report = import_catalog(library, path, report_every=None)
+        elapsed = time.perf_counter() - start
+        print(f"  {'import_catalog':<38} {elapsed:9.3f} s  {n_records / elapsed:10,.0f} records/s")
+        print(f"  {'':<38} {report['imported']:,} imported, {report['invalid']:,} invalid, "
+              f"{report['duplicates']:,} duplicates")
+        del library
+
+        # Previous way: one add_book per row, no validation
+        library = Library()
+        start = time.perf_counter()
+        with open(path, newline='', encoding='utf-8') as file, \
+                open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            for row in csv.DictReader(file):
+                library.add_book(Book(row['title'], row['author'], row['isbn'].replace('-', '')))
+        elapsed = time.perf_counter() - start
+        print(f"  {'csv.DictReader + add_book':<38} {elapsed:9.3f} s  {n_records / elapsed:10,.0f} records/s")
+
+
+def benchmark_storage(n_books: int, n_operations: int = 20_000, n_threads: int = 4, seed: int = 0):
+    """Same workload on the in-memory Library and on SQLiteLibrary."""
+    print(f"\nStorage backends, {n_books:,} books")
+    rng = random.Random(seed)
+    n_customers = max(1, n_books // 10)
+    isbns = [make_isbn(rng.randrange(n_books)) for _ in range(n_operations)]
+    customer_ids = [f"C{rng.randrange(n_customers)}" for _ in range(n_operations)]
+    loans = list(dict.fromkeys(zip(customer_ids, isbns)))  # One loan per (customer, book)
+
+    with tempfile.TemporaryDirectory() as directory:
+        backends = [("memory", Library()), ("sqlite", SQLiteLibrary(os.path.join(directory, 'library.db')))]
+        for name, library in backends:
+            books = list(make_books(n_books, seed))
+            timed(f"{name}: add_books", n_books, lambda: library.add_books(books))
+            timed(f"{name}: add_customer", n_customers, lambda: [
+                library.add_customer(Customer(f"Customer {i}", f"C{i}")) for i in range(n_customers)])
+            timed(f"{name}: find_book", n_operations, lambda: [library.find_book(isbn) for isbn in isbns])
+
+            def checkouts():
+                with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                    for customer_id, isbn in loans:
+                        library.check_out_book(customer_id, isbn)
+                    for customer_id, isbn in loans:
+                        library.check_in_book(customer_id, isbn)
+            timed(f"{name}: check_out + check_in, one by one", len(loans), checkouts)
+            if isinstance(library, SQLiteLibrary):
+                def batched():
+                    for start in range(0, len(loans), 1000):
+                        library.check_out_books(loans[start:start + 1000])
+                    for start in range(0, len(loans), 1000):
+                        library.check_in_books(loans[start:start + 1000])
+                timed(f"{name}: check_out + check_in, 1000 per txn", len(loans), batched)
+
+            def readers():
+                threads = [threading.Thread(target=lambda part=isbns[i::n_threads]: [library.find_book(isbn)
+                                                                                       for isbn in part])
+                           for i in range(n_threads)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+            timed(f"{name}: find_book, {n_threads} threads", n_operations, readers)
+        backends[1][1].close()
+
+
+def benchmark_recommendations(n_loans: int, k: int = 20, n_lookups: int = 100_000, seed: int = 0):
+    """Co-borrowing index over `n_loans` past loans, with a long tail of book popularity."""
+    print(f"\nCo-borrowing index, {n_loans:,} loans")
+    rng = np.random.default_rng(seed)
+    n_customers, n_books = max(1, n_loans // 10), max(1, n_loans // 10)
+    popularity = rng.lognormal(sigma=1.5, size=n_books)
+    customers = rng.integers(n_customers, size=n_loans)
+    books = rng.choice(n_books, size=n_loans, p=popularity / popularity.sum())
+    loans = list(zip(customers.tolist(), books.tolist()))
+    index = timed(f"build (k={k})", n_loans, lambda: CoBorrowingIndex.build(loans, k))
+    print(f"  {'':<38} {index.neighbors.nbytes + index.scores.nbytes:,} bytes of neighbours")
+    lookups = rng.choice(index.isbns, size=n_lookups).tolist()
+    timed("recommend (top 10)", n_lookups, lambda: [index.recommend(isbn, 10) for isbn in lookups])
+
+
+def benchmark_display(n_books: int, page_size: int = 1000):
+    """Full catalog display, old print-based loop against paged writes, and first-page latency."""
+    print(f"\nDisplay of {n_books:,} books")
+    library = Library()
+    library.add_books(make_books(n_books))
+
+    # Line-buffered sinks, like stdout on a terminal: every write ending lines is a system call
+    def print_loop():
+        with open(os.devnull, 'w', buffering=1) as devnull, contextlib.redirect_stdout(devnull):
+            for book in library._books.values():
+                book.display_info()
+    timed("display_info per book (previous)", n_books, print_loop)
+    for format in ('text', 'jsonl'):
+        for order in ('added', 'title'):
+            def paged():
+                with open(os.devnull, 'w', buffering=1) as devnull:
+                    library.display_books(devnull, format, order, page_size)
+            timed(f"display_books {format}, by {order}", n_books, paged)
+    for order in ('added', 'title'):
+        _, cursor = library.page_books(None, page_size, order)
+        timed(f"page_books by {order}, 2nd page", page_size, lambda: library.page_books(cursor, page_size, order))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='*', default=[10_000, 1_000_000, 5_000_000])
+    parser.add_argument('--loans', type=int, nargs='*', default=[10_000_000])
+    parser.add_argument('--imports', type=int, nargs='*', default=[3_000_000])
+    parser.add_argument('--storage', type=int, nargs='*', default=[100_000])
+    parser.add_argument('--history', type=int, nargs='*', default=[5_000_000])
+    parser.add_argument('--display', type=int, nargs='*', default=[1_000_000])
+    args = parser.parse_args()
+    for size in args.sizes:
+        benchmark_catalog(size)
+        benchmark_search(size)
+    for n_loans in args.loans:
+        benchmark_loans(n_loans)
+    for n_records in args.imports:
+        benchmark_import(n_records)
+    for n_books in args.storage:
+        benchmark_storage(n_books)
+    for n_loans in args.history:
+        benchmark_recommendations(n_loans)
+    for n_books in args.display:
+        benchmark_display(n_books)
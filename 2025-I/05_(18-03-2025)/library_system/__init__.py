@@ -0,0 +1,34 @@
+"""
+Library System.
+"""
+
+from .models import Book, Customer, Library
+from .indexes import PrefixTrie
+from .search import InvertedIndex, tokenize
+from .loans import LoanLedger
+from .importer import import_catalog, read_records, valid_isbns
+from .storage import ConnectionPool, SQLiteLibrary
+from .concurrency import ConcurrentLibrary, StripedLocks
+from .recommend import CoBorrowingIndex
+from .display import format_books, format_customers, write_books, write_customers
+
+__version__ = '1.0.0'
+__all__ = ['Book',
+           'Customer',
+           'Library',
+           'PrefixTrie',
+           'InvertedIndex',
+           'tokenize',
+           'LoanLedger',
+           'import_catalog',
+           'read_records',
+           'valid_isbns',
+           'ConnectionPool',
+           'SQLiteLibrary',
+           'ConcurrentLibrary',
+           'StripedLocks',
+           'CoBorrowingIndex',
+           'format_books',
+           'format_customers',
+           'write_books',
+           'write_customers']
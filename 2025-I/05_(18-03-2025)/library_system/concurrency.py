@@ -0,0 +1,162 @@
+"""
+Thread-safe checkouts.
+
+Book.check_out tests `_checked_out` and then sets it: two threads can both
+see the book available and both check it out. ConcurrentLibrary runs every
+checkout and check-in while holding the locks of its book and its customer.
+There is one lock per stripe, not per object: keys are hashed onto a fixed
+array of locks, so memory does not grow with the catalog, and operations on
+different books rarely wait for each other.
+"""
+import threading
+
+from .loans import LoanLedger
+from .models import Library
+
+
+class StripedLocks:
+    """A fixed array of locks; a key always maps to the same lock."""
+
+    def __init__(self, stripes: int = 1024):
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def __len__(self):
+        return len(self._locks)
+
+    def holding(self, *keys):
+        """
+        Context manager holding the locks of all the keys.
+
+        Locks are always taken in stripe order, so two threads locking the
+        same keys in a different order cannot deadlock.
+        """
+        stripes = sorted({hash(key) % len(self._locks) for key in keys})
+        return _Holding([self._locks[stripe] for stripe in stripes])
+
+
+class _Holding:
+    """Acquires locks in order on enter and releases them in reverse order on exit."""
+
+    __slots__ = ('_locks',)
+
+    def __init__(self, locks):
+        self._locks = locks
+
+    def __enter__(self):
+        for lock in self._locks:
+            lock.acquire()
+
+    def __exit__(self, *exc_info):
+        for lock in reversed(self._locks):
+            lock.release()
+
+
+class SynchronizedLoanLedger(LoanLedger):
+    """A LoanLedger that can be used from several threads (one lock for the ledger)."""
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+
+    def add(self, customer_id, isbn, due: float) -> bool:
+        with self._lock:
+            return super().add(customer_id, isbn, due)
+
+    def remove(self, customer_id, isbn) -> bool:
+        with self._lock:
+            return super().remove(customer_id, isbn)
+
+    def due_date(self, customer_id, isbn):
+        with self._lock:
+            return super().due_date(customer_id, isbn)
+
+    def overdue(self, now: float = None) -> list:
+        with self._lock:
+            return super().overdue(now)
+
+
+class ConcurrentLibrary(Library):
+    """
+    A Library whose checkouts and check-ins can run from many threads.
+
+    A book can only be checked out once at a time, whatever the number of
+    threads. Catalog changes (add_book, add_books, add_customer and renames)
+    take a single catalog lock; they are rare next to checkouts. Reads of the
+    catalog indexes (author, title and full-text lookups, pages and the
+    borrowing history) take the same lock, so they never see an index in
+    the middle of an update. Displays lock one page at a time, not while
+    writing to the sink.
+    """
+
+    def __init__(self, loan_days=14, stripes: int = 1024):
+        """
+        Args:
+            loan_days (int): Days before a checked out book is due.
+            stripes (int): Number of locks shared by all books and customers.
+        """
+        super().__init__(loan_days)
+        self._loans = SynchronizedLoanLedger()
+        self._locks = StripedLocks(stripes)
+        self._catalog_lock = threading.RLock()
+
+    def add_book(self, book):
+        with self._catalog_lock:
+            super().add_book(book)
+
+    def add_books(self, books) -> int:
+        with self._catalog_lock:
+            return super().add_books(books)
+
+    def add_customer(self, customer):
+        with self._catalog_lock:
+            super().add_customer(customer)
+
+    def _reindex_title(self, book, old_title, new_title):
+        with self._catalog_lock:
+            super()._reindex_title(book, old_title, new_title)
+
+    def _reindex_author(self, book, old_author, new_author):
+        with self._catalog_lock:
+            super()._reindex_author(book, old_author, new_author)
+
+    def find_books_by_author(self, author):
+        with self._catalog_lock:
+            return super().find_books_by_author(author)
+
+    def find_books_by_title(self, prefix, limit=None):
+        with self._catalog_lock:
+            return super().find_books_by_title(prefix, limit)
+
+    def search(self, query, limit=20):
+        with self._catalog_lock:
+            return super().search(query, limit)
+
+    def page_books(self, cursor=None, limit=100, order='added'):
+        with self._catalog_lock:
+            return super().page_books(cursor, limit, order)
+
+    def page_customers(self, cursor=None, limit=100):
+        with self._catalog_lock:
+            return super().page_customers(cursor, limit)
+
+    def borrowing_history(self):
+        # Checkouts add to a customer's history: copy each one under the customer's lock,
+        # so build_recommendations never reads a dict while it changes
+        with self._catalog_lock:
+            customers = list(self._customers.values())
+        for customer in customers:
+            with self._locks.holding(('customer', customer.customer_id)):
+                isbns = list(customer._borrowed)
+            for isbn in isbns:
+                yield customer.customer_id, isbn
+
+    def check_out_book(self, customer_id, isbn):
+        """Returns True if the book was checked out to the customer."""
+        # The customer is locked too: two of their checkouts must not update their books at once
+        with self._locks.holding(('book', isbn), ('customer', customer_id)):
+            return super().check_out_book(customer_id, isbn)
+
+    def check_in_book(self, customer_id, isbn):
+        """Returns True if the customer had the book and returned it."""
+        with self._locks.holding(('book', isbn), ('customer', customer_id)):
+            return super().check_in_book(customer_id, isbn)
@@ -0,0 +1,90 @@
+"""
+Paginated, streaming output of the catalog.
+
+Records are fetched one page at a time with a cursor (see
+Library.page_books), formatted into one string per page and written to the
+sink with a single write() call, instead of several print() calls per
+record. Nothing holds more than one page in memory, and the caller can stop
+after any page.
+"""
+import base64
+import json
+import sys
+from json.encoder import encode_basestring_ascii as quote
+
+FORMATS = ('text', 'jsonl')
+
+
+def encode_cursor(state) -> str:
+    """Opaque cursor string for a JSON-serializable position."""
+    return base64.urlsafe_b64encode(json.dumps(state).encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+
+
+def format_books(books, format: str = 'text') -> str:
+    """Formats books like Book.display_info ('text') or as one JSON object per line ('jsonl')."""
+    # Fields are read directly rather than through the properties: this runs once per record
+    if format == 'text':
+        return ''.join([f"Title: {book._title}\nAuthor: {book._author}\nISBN: {book._isbn}\n"
+                        f"Status: {'Checked Out' if book._checked_out else 'Available'}\n\n" for book in books])
+    if format == 'jsonl':
+        # Same output as json.dumps of a dict, without building the dict
+        return ''.join([f'{{"isbn": {quote(str(book._isbn))}, "title": {quote(book._title)}, '
+                        f'"author": {quote(book._author)}, "checked_out": {"true" if book._checked_out else "false"}}}\n'
+                        for book in books])
+    raise ValueError(f"Unknown format: {format}")
+
+
+def format_customers(customers, format: str = 'text') -> str:
+    """Formats customers like Customer.display_info ('text') or as one JSON object per line ('jsonl')."""
+    if format == 'text':
+        return ''.join(f"Customer Name: {customer.name}\nID: {customer.customer_id}\nChecked Out Books:\n"
+                       + ''.join(f"- {book.title}\n" for book in customer.checked_out_books) + "\n"
+                       for customer in customers)
+    if format == 'jsonl':
+        return ''.join(json.dumps({'customer_id': customer.customer_id, 'name': customer.name,
+                                   'checked_out': [book.isbn for book in customer.checked_out_books]}) + '\n'
+                       for customer in customers)
+    raise ValueError(f"Unknown format: {format}")
+
+
+def iter_pages(fetch, page_size: int, cursor: str = None):
+    """Yields the pages of fetch(cursor, limit) -> (items, next_cursor) until the last one."""
+    while True:
+        items, cursor = fetch(cursor, page_size)
+        if items:
+            yield items
+        if cursor is None:
+            return
+
+
+def write_books(library, sink=None, format: str = 'text', order: str = 'added', page_size: int = 1000,
+                cursor: str = None):
+    """
+    Writes the books of a library to a sink, one page at a time.
+
+    Args:
+        library (Library): Library to display.
+        sink: Text file-like object (default: sys.stdout).
+        format (str): 'text' or 'jsonl'.
+        order (str): 'added' or 'title' (see Library.page_books).
+        page_size (int): Books formatted and written together.
+        cursor (str): Start after this position instead of at the beginning.
+    """
+    sink = sys.stdout if sink is None else sink
+
+    def fetch(cursor, limit):
+        return library.page_books(cursor, limit, order)
+
+    for books in iter_pages(fetch, page_size, cursor):
+        sink.write(format_books(books, format))
+
+
+def write_customers(library, sink=None, format: str = 'text', page_size: int = 1000, cursor: str = None):
+    """Writes the customers of a library to a sink, one page at a time (see write_books)."""
+    sink = sys.stdout if sink is None else sink
+    for customers in iter_pages(library.page_customers, page_size, cursor):
+        sink.write(format_customers(customers, format))
@@ -0,0 +1,142 @@
+"""
+Streaming import of catalog exports (CSV or JSON Lines).
+
+Files are read in chunks of `chunk_size` records: only one chunk is in memory
+at a time, whatever the size of the file. The ISBNs of a chunk are validated
+together with NumPy, and the valid books are added with Library.add_books,
+which updates the catalog indexes in bulk.
+"""
+import csv
+import json
+import time
+from itertools import islice
+from operator import itemgetter
+
+import numpy as np
+
+from .models import Book
+
+FIELDS = ('title', 'author', 'isbn')
+ISBN13_WEIGHTS = np.array([1, 3] * 6 + [1])
+ISBN10_WEIGHTS = np.arange(10, 0, -1)
+
+
+def normalize_isbn(isbn: str) -> str:
+    """Removes hyphens and spaces: '978-0-451-52493-5' -> '9780451524935'."""
+    return isbn.replace('-', '').replace(' ', '').upper()
+
+
+def valid_isbns(isbns: list) -> np.ndarray:
+    """
+    Checks the check digit of normalized ISBN-10s and ISBN-13s.
+
+    Returns:
+        np.ndarray: one bool per ISBN.
+    """
+    valid = np.zeros(len(isbns), dtype=bool)
+    lengths = np.fromiter(map(len, isbns), dtype=np.int64, count=len(isbns))
+    for length, weights in ((13, ISBN13_WEIGHTS), (10, ISBN10_WEIGHTS)):
+        rows = np.flatnonzero(lengths == length)
+        if not rows.size:
+            continue
+        # One byte per character ('?' for non-ASCII), so every ISBN is a row of the matrix
+        text = ''.join([isbns[row] for row in rows]).encode('ascii', 'replace')
+        digits = np.frombuffer(text, dtype=np.uint8).reshape(-1, length).astype(np.int64) - ord('0')
+        if length == 10:
+            # The check digit of an ISBN-10 can be X, worth 10
+            digits[:, 9] = np.where(digits[:, 9] == ord('X') - ord('0'), 10, digits[:, 9])
+            ok = ((digits[:, :9] >= 0) & (digits[:, :9] <= 9)).all(axis=1)
+            ok &= (digits[:, 9] >= 0) & (digits[:, 9] <= 10)
+            ok &= (digits @ weights) % 11 == 0
+        else:
+            ok = ((digits >= 0) & (digits <= 9)).all(axis=1)
+            ok &= (digits @ weights) % 10 == 0
+        valid[rows] = ok
+    return valid
+
+
+def read_records(path: str, format: str = None):
+    """
+    Yields (title, author, isbn) for every record of a catalog export.
+
+    Args:
+        path (str): CSV file with a title,author,isbn header, or JSON Lines file.
+        format (str): 'csv' or 'jsonl'. Guessed from the extension by default.
+
+    Malformed records, including JSON records whose title or author is not a
+    string, are yielded with an empty ISBN, so they fail validation.
+    """
+    if format is None:
+        format = 'jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv'
+    with open(path, newline='', encoding='utf-8') as file:
+        if format == 'csv':
+            reader = csv.reader(file)
+            header = next(reader, [])
+            if not all(field in header for field in FIELDS):
+                raise ValueError(f"{path}: the header must contain the columns {', '.join(FIELDS)}")
+            fields = itemgetter(*(header.index(field) for field in FIELDS))
+            for row in reader:
+                try:
+                    yield fields(row)
+                except IndexError:
+                    yield ('', '', '')
+        elif format == 'jsonl':
+            for line in file:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    title, author = record.get('title', ''), record.get('author', '')
+                except (ValueError, AttributeError):
+                    yield ('', '', '')
+                    continue
+                if isinstance(title, str) and isinstance(author, str):
+                    yield (title, author, str(record.get('isbn', '')))
+                else:
+                    yield ('', '', '')
+        else:
+            raise ValueError(f"Unknown format: {format}")
+
+
+def read_chunks(path: str, chunk_size: int = 50_000, format: str = None):
+    """Yields lists of at most `chunk_size` records (see read_records)."""
+    records = read_records(path, format)
+    while chunk := list(islice(records, chunk_size)):
+        yield chunk
+
+
+def import_catalog(library, path: str, chunk_size: int = 50_000, format: str = None,
+                   report_every: float = 5.0) -> dict:
+    """
+    Imports a catalog export into a library.
+
+    Args:
+        library (Library): Library receiving the books.
+        path (str): CSV or JSON Lines file (see read_records).
+        chunk_size (int): Records read, validated and indexed together.
+        format (str): 'csv' or 'jsonl'. Guessed from the extension by default.
+        report_every (float): Seconds between progress lines, or None for no progress.
+
+    Returns:
+        dict: records read and imported, invalid ISBNs, duplicates, seconds and records per second.
+    """
+    start = last_report = time.perf_counter()
+    report = {'read': 0, 'imported': 0, 'invalid': 0, 'duplicates': 0}
+    for chunk in read_chunks(path, chunk_size, format):
+        isbns = [normalize_isbn(isbn) for _, _, isbn in chunk]
+        valid = valid_isbns(isbns).tolist()
+        books = [Book(title, author, isbn)
+                 for (title, author, _), isbn, ok in zip(chunk, isbns, valid) if ok]
+        added = library.add_books(books)
+        report['read'] += len(chunk)
+        report['imported'] += added
+        report['invalid'] += len(chunk) - len(books)
+        report['duplicates'] += len(books) - added
+
+        now = time.perf_counter()
+        if report_every is not None and now - last_report >= report_every:
+            print(f"{report['read']:,} records read ({report['read'] / (now - start):,.0f} records/s)")
+            last_report = now
+    report['seconds'] = time.perf_counter() - start
+    report['records_per_second'] = report['read'] / report['seconds'] if report['seconds'] else 0.0
+    return report
@@ -0,0 +1,144 @@
+"""
+Indexes used by the library catalog.
+"""
+from itertools import islice
+from operator import itemgetter
+
+
+class PrefixTrie:
+    """
+    Maps string keys to values and finds all values whose key starts with a prefix.
+
+    This is a burst trie: keys are kept in small unsorted buckets, and a
+    bucket is split into a trie node (one child per next character) only
+    when it grows beyond `bucket_size`. It needs far fewer nodes than a
+    trie with one node per character, which matters for millions of titles.
+    Results are returned in key order.
+    """
+
+    _END = ''  # Child holding the values whose key ends at this node
+
+    def __init__(self, bucket_size: int = 64):
+        self.bucket_size = bucket_size
+        self._root = {}
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def insert(self, key: str, value):
+        """Adds a value under a key. Several values can share the same key."""
+        node = self._root
+        depth = 0
+        while True:
+            if depth == len(key):
+                node.setdefault(self._END, []).append(value)
+                break
+            char = key[depth]
+            child = node.get(char)
+            if child is None:
+                node[char] = [(key[depth + 1:], value)]
+                break
+            if isinstance(child, dict):
+                node = child
+                depth += 1
+                continue
+            child.append((key[depth + 1:], value))
+            if len(child) > self.bucket_size:
+                node[char] = self._burst(child)
+            break
+        self._size += 1
+
+    def _burst(self, bucket: list) -> dict:
+        """Splits a full bucket into a node, bursting children that are still too big."""
+        node = {}
+        for suffix, value in bucket:
+            if suffix:
+                node.setdefault(suffix[0], []).append((suffix[1:], value))
+            else:
+                node.setdefault(self._END, []).append(value)
+        for char, child in node.items():
+            if char != self._END and len(child) > self.bucket_size:
+                node[char] = self._burst(child)
+        return node
+
+    def remove(self, key: str, value) -> bool:
+        """Removes one value stored under a key. Returns False if it was not there."""
+        node = self._root
+        depth = 0
+        while depth < len(key):
+            child = node.get(key[depth])
+            if child is None:
+                return False
+            if isinstance(child, list):
+                try:
+                    child.remove((key[depth + 1:], value))
+                except ValueError:
+                    return False
+                self._size -= 1
+                return True
+            node = child
+            depth += 1
+        values = node.get(self._END, [])
+        if value not in values:
+            return False
+        values.remove(value)
+        self._size -= 1
+        return True
+
+    def search(self, prefix: str, limit: int = None):
+        """Yields the values whose key starts with `prefix`, in key order."""
+        return islice(self._search(prefix), limit)
+
+    def _search(self, prefix: str):
+        node = self._root
+        depth = 0
+        while depth < len(prefix):
+            child = node.get(prefix[depth])
+            if child is None:
+                return
+            if isinstance(child, list):
+                rest = prefix[depth + 1:]
+                for suffix, value in sorted(child, key=itemgetter(0)):
+                    if suffix.startswith(rest):
+                        yield value
+                return
+            node = child
+            depth += 1
+        yield from self._walk(node)
+
+    def items(self, start: str = ''):
+        """Yields (key, value) pairs in key order, from the first key >= `start`."""
+        return self._items(self._root, '', start)
+
+    def _items(self, node: dict, prefix: str, start: str):
+        # `tight`: start begins with this node's prefix, so part of the subtree may come before it
+        tight = start.startswith(prefix)
+        depth = len(prefix)
+        if not tight or len(start) == depth:
+            for value in node.get(self._END, ()):
+                yield prefix, value
+        for char in sorted(node):
+            if char == self._END or (tight and len(start) > depth and char < start[depth]):
+                continue
+            child = node[char]
+            if isinstance(child, list):
+                for suffix, value in sorted(child, key=itemgetter(0)):
+                    key = prefix + char + suffix
+                    if key >= start:
+                        yield key, value
+            else:
+                yield from self._items(child, prefix + char, start)
+
+    def _walk(self, node: dict):
+        """Yields every value below a node, in key order."""
+        yield from node.get(self._END, ())
+        for char in sorted(node):
+            if char == self._END:
+                continue
+            child = node[char]
+            if isinstance(child, list):
+                for _, value in sorted(child, key=itemgetter(0)):
+                    yield value
+            else:
+                yield from self._walk(child)
@@ -0,0 +1,80 @@
+"""
+Loan ledger: which customer has which book, and until when.
+"""
+import heapq
+import time
+from operator import itemgetter
+
+
+class LoanLedger:
+    """
+    Active loans keyed by (customer_id, isbn), with their due timestamps.
+
+    Loans are also kept in a min-heap ordered by due date. Returning a book
+    does not search the heap: its entry is simply no longer the one stored in
+    the ledger, and is skipped (and eventually discarded) when found.
+    """
+
+    def __init__(self):
+        self._loans = {}  # (customer_id, isbn) -> heap entry (due, customer_id, isbn)
+        self._heap = []
+
+    def __len__(self):
+        return len(self._loans)
+
+    def __contains__(self, key):
+        return key in self._loans
+
+    def add(self, customer_id, isbn, due: float) -> bool:
+        """Records a loan. Returns False if the customer already has that book."""
+        key = (customer_id, isbn)
+        if key in self._loans:
+            return False
+        entry = (due, customer_id, isbn)
+        self._loans[key] = entry
+        heapq.heappush(self._heap, entry)
+        return True
+
+    def remove(self, customer_id, isbn) -> bool:
+        """Ends a loan. Returns False if there was no such loan."""
+        if self._loans.pop((customer_id, isbn), None) is None:
+            return False
+        # Rebuild the heap when most of it is made of returned loans
+        if len(self._heap) > 2 * len(self._loans) + 1024:
+            self._heap = list(self._loans.values())
+            heapq.heapify(self._heap)
+        return True
+
+    def due_date(self, customer_id, isbn):
+        """Due timestamp of a loan, or None if there is no such loan."""
+        entry = self._loans.get((customer_id, isbn))
+        return entry[0] if entry is not None else None
+
+    def _is_active(self, entry) -> bool:
+        return self._loans.get((entry[1], entry[2])) is entry
+
+    def overdue(self, now: float = None) -> list:
+        """
+        Returns the loans due before `now` (default: the current time), as
+        (due, customer_id, isbn) tuples sorted by due date.
+
+        Only the part of the heap above the `now` boundary is visited, so the
+        cost depends on the number of overdue loans, not on the size of the ledger.
+        """
+        now = time.time() if now is None else now
+        heap = self._heap
+        # Returned loans at the top of the heap are discarded for good
+        while heap and not self._is_active(heap[0]):
+            heapq.heappop(heap)
+
+        # Walk the heap one level at a time: a node due after `now` has no overdue children
+        size = len(heap)
+        overdue = []
+        level = [0] if heap else []
+        while level:
+            level = [index for index in level if heap[index][0] < now]
+            overdue += [heap[index] for index in level]
+            level = [child for index in level for child in (2 * index + 1, 2 * index + 2) if child < size]
+        overdue = [entry for entry in overdue if self._is_active(entry)]
+        overdue.sort(key=itemgetter(0))  # Float keys sort much faster than whole tuples
+        return overdue
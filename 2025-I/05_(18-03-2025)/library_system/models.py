@@ -0,0 +1,334 @@
+"""
+Book, Customer and Library models.
+
+The Library keeps hash indexes on ISBN and customer ID, a secondary index on
+author, a prefix trie on titles and a full-text index on titles and authors,
+so lookups do not scan the catalog. Loans and their due dates are kept in
+a LoanLedger.
+"""
+import sys
+import time
+
+from .display import decode_cursor, encode_cursor, write_books, write_customers
+from .indexes import PrefixTrie
+from .loans import LoanLedger
+from .recommend import CoBorrowingIndex
+from .search import InvertedIndex
+
+
+class Book:
+    """A book of the catalog, identified by its ISBN."""
+
+    # No per-instance __dict__: saves memory when the catalog holds millions of books
+    __slots__ = ('_title', '_author', '_isbn', '_checked_out', '_library')
+
+    def __init__(self, title, author, isbn):
+        self._title = title
+        self._author = author
+        self._isbn = isbn
+        self._checked_out = False
+        self._library = None  # Library whose indexes must follow title/author changes
+
+    @property
+    def title(self):
+        return self._title
+
+    @title.setter
+    def title(self, value):
+        if self._library is not None:
+            self._library._reindex_title(self, self._title, value)
+        self._title = value
+
+    @property
+    def author(self):
+        return self._author
+
+    @author.setter
+    def author(self, value):
+        if self._library is not None:
+            self._library._reindex_author(self, self._author, value)
+        self._author = value
+
+    @property
+    def isbn(self):
+        return self._isbn  # Read-only (no setter)
+
+    @property
+    def checked_out(self):
+        return self._checked_out
+
+    def check_out(self):
+        if not self._checked_out:
+            self._checked_out = True
+            return True
+        print(f"Book '{self._title}' is already checked out.")
+        return False
+
+    def check_in(self):
+        if self._checked_out:
+            self._checked_out = False
+            return True
+        print(f"Book '{self._title}' is already checked in.")
+        return False
+
+    def display_info(self):
+        status = "Checked Out" if self._checked_out else "Available"
+        print(f"Title: {self._title}\nAuthor: {self._author}\nISBN: {self._isbn}\nStatus: {status}\n")
+
+
+class Customer:
+    """A library customer and the books they have checked out."""
+
+    def __init__(self, name, customer_id):
+        self._name = name
+        self._customer_id = customer_id
+        self._checked_out_books = {}  # isbn -> Book, in check-out order
+        self._borrowed = {}  # isbn -> None: every book ever checked out, in first check-out order
+
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        self._name = value
+
+    @property
+    def customer_id(self):
+        return self._customer_id
+
+    @property
+    def checked_out_books(self):
+        return list(self._checked_out_books.values())
+
+    @property
+    def borrowing_history(self):
+        """ISBNs of every book the customer has checked out, returned or not."""
+        return list(self._borrowed)
+
+    def has_book(self, book):
+        return book.isbn in self._checked_out_books
+
+    def check_out_book(self, book):
+        if book.check_out():
+            self._checked_out_books[book.isbn] = book
+            self._borrowed[book.isbn] = None
+            print(f"Book '{book.title}' checked out to {self._name}.")
+            return True
+        return False
+
+    def check_in_book(self, book):
+        if book.isbn in self._checked_out_books:
+            book.check_in()
+            del self._checked_out_books[book.isbn]
+            print(f"Book '{book.title}' checked in from {self._name}.")
+            return True
+        print(f"Book '{book.title}' not found in {self._name}'s list.")
+        return False
+
+    def display_info(self):
+        print(f"Customer Name: {self._name}\nID: {self._customer_id}")
+        print("Checked Out Books:")
+        for book in self._checked_out_books.values():
+            print(f"- {book.title}")
+
+
+def _normalize(text: str) -> str:
+    """Key used by the author and title indexes: case-insensitive."""
+    return text.casefold()
+
+
+class Library:
+    """A catalog of books and customers with indexed lookups."""
+
+    def __init__(self, loan_days=14):
+        self.loan_days = loan_days
+        self._loans = LoanLedger()   # (customer_id, isbn) -> due date
+        self._books = {}             # isbn -> Book, in insertion order
+        self._customers = {}         # customer_id -> Customer, in insertion order
+        self._book_order = []        # ISBNs in insertion order, for cursors (books are never removed)
+        self._customer_order = []    # customer IDs in insertion order
+        self._books_by_author = {}   # normalized author -> list of ISBNs
+        self._titles = PrefixTrie()  # normalized title -> ISBN
+        self._text = InvertedIndex()  # words of title and author -> ISBN
+        self._recommendations = None  # CoBorrowingIndex, see build_recommendations
+
+    def add_book(self, book):
+        if book.isbn in self._books:
+            print(f"A book with ISBN {book.isbn} is already in the library.")
+            return
+        self._books[book.isbn] = book
+        self._book_order.append(book.isbn)
+        self._books_by_author.setdefault(_normalize(book.author), []).append(book.isbn)
+        self._titles.insert(_normalize(book.title), book.isbn)
+        self._text.add(book.isbn, f"{book.title} {book.author}")
+        book._library = self
+
+    def add_books(self, books) -> int:
+        """
+        Adds many books at once, updating every index in bulk. Books whose ISBN
+        is already in the library are skipped silently.
+
+        Returns:
+            int: number of books added.
+        """
+        added = []
+        for book in books:
+            if book.isbn not in self._books:
+                self._books[book.isbn] = book
+                self._book_order.append(book.isbn)
+                added.append(book)
+        for book in added:
+            self._books_by_author.setdefault(_normalize(book.author), []).append(book.isbn)
+            self._titles.insert(_normalize(book.title), book.isbn)
+            book._library = self
+        self._text.add_many((book.isbn, f"{book.title} {book.author}") for book in added)
+        return len(added)
+
+    def add_customer(self, customer):
+        if customer.customer_id in self._customers:
+            print(f"A customer with ID {customer.customer_id} is already registered.")
+            return
+        self._customers[customer.customer_id] = customer
+        self._customer_order.append(customer.customer_id)
+
+    def find_book(self, isbn):
+        return self._books.get(isbn)
+
+    def find_customer(self, customer_id):
+        return self._customers.get(customer_id)
+
+    def find_books_by_author(self, author):
+        """Returns the books of an author (case-insensitive), in insertion order."""
+        return [self._books[isbn] for isbn in self._books_by_author.get(_normalize(author), [])]
+
+    def find_books_by_title(self, prefix, limit=None):
+        """Returns the books whose title starts with `prefix` (case-insensitive), sorted by title."""
+        return [self._books[isbn] for isbn in self._titles.search(_normalize(prefix), limit)]
+
+    def search(self, query, limit=20):
+        """Returns the books best matching any word of the query, ranked with BM25."""
+        return [self._books[isbn] for isbn, _ in self._text.search(query, limit)]
+
+    def _reindex_title(self, book, old_title, new_title):
+        self._titles.remove(_normalize(old_title), book.isbn)
+        self._titles.insert(_normalize(new_title), book.isbn)
+        self._text.add(book.isbn, f"{new_title} {book.author}")
+
+    def _reindex_author(self, book, old_author, new_author):
+        old_key = _normalize(old_author)
+        isbns = self._books_by_author[old_key]
+        isbns.remove(book.isbn)
+        if not isbns:
+            del self._books_by_author[old_key]
+        self._books_by_author.setdefault(_normalize(new_author), []).append(book.isbn)
+        self._text.add(book.isbn, f"{book.title} {new_author}")
+
+    def check_out_book(self, customer_id, isbn):
+        """Returns True if the book was checked out to the customer."""
+        customer = self.find_customer(customer_id)
+        book = self.find_book(isbn)
+        if not customer:
+            print("Customer not found.")
+            return False
+        if not book:
+            print("Book not found.")
+            return False
+        if customer.check_out_book(book):
+            self._loans.add(customer_id, isbn, time.time() + self.loan_days * 86400)
+            return True
+        return False
+
+    def check_in_book(self, customer_id, isbn):
+        """Returns True if the customer had the book and returned it."""
+        customer = self.find_customer(customer_id)
+        book = self.find_book(isbn)
+        if not customer:
+            print("Customer not found.")
+            return False
+        if not book:
+            print("Book not found.")
+            return False
+        if customer.check_in_book(book):
+            self._loans.remove(customer_id, isbn)
+            return True
+        return False
+
+    def due_date(self, customer_id, isbn):
+        """Due timestamp of a loan, or None if the customer does not have the book."""
+        return self._loans.due_date(customer_id, isbn)
+
+    def overdue_loans(self, now=None):
+        """Returns (customer, book, due timestamp) for every loan due before `now`, oldest first."""
+        return [(self._customers[customer_id], self._books[isbn], due)
+                for due, customer_id, isbn in self._loans.overdue(now)]
+
+    def borrowing_history(self):
+        """Yields (customer_id, isbn) for every book every customer has checked out."""
+        for customer_id, customer in self._customers.items():
+            for isbn in customer._borrowed:
+                yield customer_id, isbn
+
+    def build_recommendations(self, k=20, similarity='count'):
+        """Builds the co-borrowing index used by also_borrowed (see CoBorrowingIndex.build)."""
+        self._recommendations = CoBorrowingIndex.build(self.borrowing_history(), k, similarity)
+
+    def also_borrowed(self, isbn, limit=10):
+        """Returns the books most often borrowed by the readers of a book, best first."""
+        if self._recommendations is None:
+            return []
+        return [self._books[other] for other, _ in self._recommendations.recommend(isbn, limit)
+                if other in self._books]
+
+    def page_books(self, cursor=None, limit=100, order='added'):
+        """
+        Returns one page of books.
+
+        Args:
+            cursor (str): None for the first page, then the cursor returned with the previous page.
+            limit (int): Maximum number of books in the page.
+            order (str): 'added' (insertion order) or 'title' (case-insensitive, from the title index).
+
+        Returns:
+            tuple: (list of books, cursor of the next page or None after the last page).
+        """
+        if order == 'added':
+            start = decode_cursor(cursor) if cursor else 0
+            isbns = self._book_order[start:start + limit]
+            end = start + len(isbns)
+            return [self._books[isbn] for isbn in isbns], encode_cursor(end) if end < len(self._book_order) else None
+        if order != 'title':
+            raise ValueError(f"Unknown order: {order}")
+
+        # The cursor is the (title key, ISBN) of the last book: resume right after it in the title index
+        last_key, last_isbn = decode_cursor(cursor) if cursor else ('', None)
+        skipping = last_isbn is not None  # Titles equal to the last one, up to the last book itself
+        books = []
+        for key, isbn in self._titles.items(last_key):
+            if skipping and key == last_key:
+                skipping = isbn != last_isbn
+                continue
+            if len(books) == limit:
+                return books, encode_cursor((last_key, last_isbn))
+            books.append(self._books[isbn])
+            last_key, last_isbn = key, isbn
+        return books, None
+
+    def page_customers(self, cursor=None, limit=100):
+        """Returns one page of customers in insertion order, like page_books."""
+        start = decode_cursor(cursor) if cursor else 0
+        ids = self._customer_order[start:start + limit]
+        end = start + len(ids)
+        return [self._customers[i] for i in ids], encode_cursor(end) if end < len(self._customer_order) else None
+
+    def display_books(self, sink=None, format='text', order='added', page_size=1000):
+        """Writes every book to `sink` (default: stdout), a page at a time (see display.write_books)."""
+        if format == 'text':
+            (sys.stdout if sink is None else sink).write("Library Books:\n")
+        write_books(self, sink, format, order, page_size)
+
+    def display_customers(self, sink=None, format='text', page_size=1000):
+        """Writes every customer to `sink` (default: stdout), a page at a time."""
+        if format == 'text':
+            (sys.stdout if sink is None else sink).write("Library Customers:\n")
+        write_customers(self, sink, format, page_size)
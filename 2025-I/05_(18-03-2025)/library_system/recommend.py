@@ -0,0 +1,106 @@
+"""
+"Readers who borrowed this also borrowed" recommendations.
+
+The borrowing history is a sparse customer x book matrix M with a 1 where a
+customer has borrowed a book. (M.T @ M)[a, b] is the number of customers who
+borrowed both a and b. The product is computed for a block of books at a
+time, so memory depends on the block size and not on the whole catalog, and
+only the k best neighbours of every book are kept, in two (books x k) arrays.
+"""
+from array import array
+
+import numpy as np
+from scipy import sparse
+
+
+class CoBorrowingIndex:
+    """The k most co-borrowed books of every book, in compact arrays."""
+
+    def __init__(self, isbns: list, neighbors: np.ndarray, scores: np.ndarray):
+        """
+        Args:
+            isbns (list): ISBN of every row.
+            neighbors (np.ndarray): (books x k) int32 rows of the neighbours, best first, -1 when fewer than k.
+            scores (np.ndarray): (books x k) float32 score of every neighbour.
+        """
+        self.isbns = isbns
+        self.neighbors = neighbors
+        self.scores = scores
+        self._rows = {isbn: row for row, isbn in enumerate(isbns)}
+
+    def __len__(self):
+        return len(self.isbns)
+
+    @property
+    def k(self):
+        return self.neighbors.shape[1]
+
+    @classmethod
+    def build(cls, loans, k: int = 20, similarity: str = 'count', block_size: int = 4096):
+        """
+        Builds the index from a borrowing history.
+
+        Args:
+            loans: (customer_id, isbn) pairs. Borrowing a book again does not count twice.
+            k (int): Neighbours kept per book.
+            similarity (str): 'count' for the number of common readers, or 'cosine' to
+                divide it by sqrt(readers of a * readers of b), so bestsellers do not
+                appear next to every book.
+            block_size (int): Books whose co-occurrences are computed together.
+        """
+        if similarity not in ('count', 'cosine'):
+            raise ValueError(f"Unknown similarity: {similarity}")
+        customers, books = {}, {}
+        rows, columns = array('I'), array('I')
+        for customer_id, isbn in loans:
+            rows.append(customers.setdefault(customer_id, len(customers)))
+            columns.append(books.setdefault(isbn, len(books)))
+        n_books = len(books)
+        matrix = sparse.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, columns)),
+                                   shape=(len(customers), n_books))
+        matrix.sum_duplicates()
+        matrix.data[:] = 1
+        by_book = matrix.T.tocsr()
+        readers = np.diff(by_book.indptr).astype(np.float32)
+
+        neighbors = np.full((n_books, k), -1, dtype=np.int32)
+        scores = np.zeros((n_books, k), dtype=np.float32)
+        for start in range(0, n_books, block_size):
+            block = (by_book[start:start + block_size] @ matrix).tocoo()
+            book, other, score = block.row + start, block.col, block.data
+            keep = book != other
+            book, other, score = book[keep], other[keep], score[keep]
+            if similarity == 'cosine':
+                score = score / np.sqrt(readers[book] * readers[other])
+            # Sort by book, best score first, ties by first borrowed; keep the first k of every book
+            order = np.lexsort((other, -score, book))
+            book, other, score = book[order], other[order], score[order]
+            first = np.searchsorted(book, book, side='left')
+            rank = np.arange(book.size) - first
+            top = rank < k
+            neighbors[book[top], rank[top]] = other[top]
+            scores[book[top], rank[top]] = score[top]
+        return cls(list(books), neighbors, scores)
+
+    def recommend(self, isbn, limit: int = None) -> list:
+        """
+        Returns the books most often borrowed with `isbn`: O(k), a row read.
+
+        Returns:
+            list: (isbn, score) tuples, best first. Empty for an unknown ISBN.
+        """
+        row = self._rows.get(isbn)
+        if row is None:
+            return []
+        neighbors, scores = self.neighbors[row, :limit], self.scores[row, :limit]
+        return [(self.isbns[neighbor], float(score))
+                for neighbor, score in zip(neighbors.tolist(), scores.tolist()) if neighbor >= 0]
+
+    def save(self, path: str):
+        """Saves the index to a .npz file."""
+        np.savez(path, isbns=np.array(self.isbns), neighbors=self.neighbors, scores=self.scores)
+
+    @classmethod
+    def load(cls, path: str):
+        data = np.load(path)
+        return cls(data['isbns'].tolist(), data['neighbors'], data['scores'])
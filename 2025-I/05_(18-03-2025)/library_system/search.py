@@ -0,0 +1,209 @@
+"""
+Full-text search over the catalog.
+
+InvertedIndex maps every word of a book's title and author to the books that
+contain it, and ranks the matches of a query with BM25.
+
+Posting lists are compact: document numbers are delta-encoded in an
+array('I') (4 bytes per posting instead of a Python int object) and term
+frequencies are kept in an array('B'). Documents are numbered in the order
+they are added, so a new book only appends to the end of its posting lists.
+Queries decode the deltas with a NumPy cumulative sum and score all matching
+documents in vectorized passes; the decoded weights of long posting lists
+are cached while the index does not change.
+"""
+import math
+import re
+import unicodedata
+from array import array
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list:
+    """Splits text into lowercase words, ignoring accents: 'Gabriel García' -> ['gabriel', 'garcia']."""
+    text = text.casefold()
+    if not text.isascii():
+        text = ''.join(char for char in unicodedata.normalize('NFKD', text) if not unicodedata.combining(char))
+    return TOKEN_PATTERN.findall(text)
+
+
+class InvertedIndex:
+    """Incremental inverted index with BM25 ranking."""
+
+    CACHE_TERMS = 1024          # Decoded posting lists kept in memory
+    CACHE_MIN_POSTINGS = 4096   # Shorter lists are cheaper to decode than to keep
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        """
+        Args:
+            k1 (float): BM25 term frequency saturation.
+            b (float): BM25 document length normalization.
+        """
+        self.k1 = k1
+        self.b = b
+        self._postings = {}          # term -> [deltas array('I'), frequencies array('B'), last document]
+        self._keys = []              # document number -> key (ISBN)
+        self._documents = {}         # key -> document number, for indexed documents only
+        self._lengths = array('H')   # document number -> number of tokens
+        self._live = bytearray()     # document number -> 1 if indexed, 0 if removed
+        self._total_length = 0
+        self._cache = {}             # term -> (state, documents, weights), see _weights
+        self._norms = None           # (state, length normalization of every document)
+
+    def __len__(self):
+        return len(self._documents)
+
+    def add(self, key, text: str):
+        """Indexes a document. Adding an existing key replaces its text."""
+        if key in self._documents:
+            self.remove(key)
+        document = len(self._keys)
+        frequencies = {}
+        for term in tokenize(text):
+            frequencies[term] = frequencies.get(term, 0) + 1
+        for term, frequency in frequencies.items():
+            posting = self._postings.get(term)
+            if posting is None:
+                posting = self._postings[term] = [array('I'), array('B'), 0]
+            posting[0].append(document - posting[2])
+            posting[1].append(min(frequency, 255))
+            posting[2] = document
+        length = min(sum(frequencies.values()), 65535)
+        self._keys.append(key)
+        self._documents[key] = document
+        self._lengths.append(length)
+        self._live.append(1)
+        self._total_length += length
+
+    def add_many(self, items):
+        """
+        Indexes (key, text) pairs. Same result as add() in a loop, but the
+        postings of all the new documents are counted and sorted with NumPy,
+        and each posting list is extended once per call.
+        """
+        first_document = len(self._keys)
+        term_ids = {}      # term -> number within this call
+        token_terms = []   # term number of every token, document after document
+        token_counts = []  # number of tokens of every new document
+        for key, text in items:
+            if key in self._documents:
+                self.remove(key)
+            tokens = tokenize(text)
+            token_terms += [term_ids.setdefault(term, len(term_ids)) for term in tokens]
+            token_counts.append(len(tokens))
+            length = min(len(tokens), 65535)
+            self._documents[key] = len(self._keys)
+            self._keys.append(key)
+            self._lengths.append(length)
+            self._live.append(1)
+            self._total_length += length
+        if not token_terms:
+            return
+
+        # One (term, document) code per token; sorting them groups the postings of each term
+        n_documents = len(self._keys)
+        documents = np.repeat(np.arange(first_document, n_documents, dtype=np.int64), token_counts)
+        codes, frequencies = np.unique(np.array(token_terms, dtype=np.int64) * n_documents + documents,
+                                       return_counts=True)
+        terms, documents = np.divmod(codes, n_documents)
+        deltas = np.diff(documents, prepend=0).astype(np.uint32)
+        frequencies = np.minimum(frequencies, 255).astype(np.uint8)
+        bounds = np.flatnonzero(np.diff(terms)) + 1
+        starts = [0] + bounds.tolist()
+        ends = bounds.tolist() + [len(codes)]
+        names = list(term_ids)
+        for term, start, end in zip(terms[starts].tolist(), starts, ends):
+            posting = self._postings.get(names[term])
+            if posting is None:
+                posting = self._postings[names[term]] = [array('I'), array('B'), 0]
+            deltas[start] = documents[start] - posting[2]
+            posting[0].frombytes(deltas[start:end].tobytes())
+            posting[1].frombytes(frequencies[start:end].tobytes())
+            posting[2] = int(documents[end - 1])
+
+    def remove(self, key) -> bool:
+        """
+        Removes a document from the results. Its postings stay in the lists as
+        tombstones, so document frequencies keep counting it.
+        """
+        document = self._documents.pop(key, None)
+        if document is None:
+            return False
+        self._live[document] = 0
+        self._total_length -= self._lengths[document]
+        return True
+
+    def _weights(self, term: str):
+        """
+        Returns the documents of a term and their BM25 weight without the idf.
+
+        Weights depend on every document length, so they are cached only while
+        the index does not change; long posting lists are the ones cached.
+        """
+        deltas, frequencies, _ = self._postings[term]
+        state = (len(self._keys), self._total_length)
+        cached = self._cache.get(term)
+        if cached is not None and cached[0] == state:
+            return cached[1], cached[2]
+        if self._norms is None or self._norms[0] != state:
+            lengths = np.array(self._lengths, dtype=np.float32)
+            average_length = self._total_length / len(self._documents)
+            self._norms = (state, self.k1 * (1 - self.b + self.b * lengths / average_length))
+        # Copies, not views: the arrays must stay resizable while we search
+        documents = np.cumsum(np.array(deltas, dtype=np.uint32), dtype=np.int64)
+        tf = np.array(frequencies, dtype=np.float32)
+        weights = (self.k1 + 1) * tf / (tf + self._norms[1][documents])
+        if len(deltas) >= self.CACHE_MIN_POSTINGS:
+            if term not in self._cache and len(self._cache) >= self.CACHE_TERMS:
+                del self._cache[next(iter(self._cache))]  # Oldest entry first
+            self._cache[term] = (state, documents, weights)
+        return documents, weights
+
+    def search(self, query: str, limit: int = 20) -> list:
+        """
+        Ranks the documents that contain any word of the query.
+
+        Returns:
+            list: (key, score) tuples, best first.
+        """
+        n_live = len(self._documents)
+        terms = [term for term in set(tokenize(query)) if term in self._postings]
+        if not terms or not n_live or limit <= 0:
+            return []
+        scores = np.zeros(len(self._keys), dtype=np.float32)
+        matches = []
+        for term in terms:
+            documents, weights = self._weights(term)
+            df = min(len(documents), n_live)
+            idf = math.log(1 + (n_live - df + 0.5) / (df + 0.5))
+            scores[documents] += idf * weights
+            matches.append(documents)
+        # A document appears at most once per term, so the best limit * len(terms)
+        # entries of the concatenated postings contain the best `limit` documents
+        matches = matches[0] if len(matches) == 1 else np.concatenate(matches)
+        if n_live < len(self._keys):
+            live = np.frombuffer(bytes(self._live), dtype=np.uint8)
+            matches = matches[live[matches] == 1]
+        if not matches.size:
+            return []
+        match_scores = scores[matches]
+        k = min(limit * len(terms), matches.size)
+        if k < matches.size:
+            # Keep everything tied with the k-th score so ties are broken by insertion order
+            kth_score = -np.partition(-match_scores, k - 1)[k - 1]
+            best = match_scores >= kth_score
+            matches, match_scores = matches[best], match_scores[best]
+
+        # Best score first; ties by insertion order
+        order = np.lexsort((matches, -match_scores))
+        matches, match_scores = matches[order], match_scores[order]
+        if len(terms) > 1:
+            # Copies of a document are next to each other after sorting
+            first = np.ones(matches.size, dtype=bool)
+            first[1:] = matches[1:] != matches[:-1]
+            matches, match_scores = matches[first], match_scores[first]
+        return [(self._keys[document], float(score))
+                for document, score in zip(matches[:limit], match_scores[:limit])]
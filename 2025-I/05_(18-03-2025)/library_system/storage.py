@@ -0,0 +1,474 @@
+"""
+SQLite storage for the library catalog.
+
+SQLiteLibrary has the same API as Library but keeps books, customers,
+loans and the borrowing history in a SQLite database file, so several processes or threads can share
+one catalog. Connections come from a small pool and run in WAL mode:
+readers do not block the writer, and commits append to the log instead of
+rewriting pages. Every query is a constant SQL string, so sqlite3 prepares
+it once per connection and reuses the statement from its cache.
+"""
+import contextlib
+import json
+import queue
+import sqlite3
+import sys
+import time
+from operator import itemgetter
+
+from .display import decode_cursor, encode_cursor, write_books, write_customers
+from .models import Book, Customer, _normalize
+from .recommend import CoBorrowingIndex
+from .search import tokenize
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS books (
+    isbn TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    author TEXT NOT NULL,
+    title_key TEXT NOT NULL,
+    author_key TEXT NOT NULL,
+    checked_out INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS books_by_title ON books (title_key);
+CREATE INDEX IF NOT EXISTS books_by_author ON books (author_key);
+CREATE VIRTUAL TABLE IF NOT EXISTS book_text USING fts5 (
+    isbn UNINDEXED, title, author, tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS customers (
+    customer_id PRIMARY KEY,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS loans (
+    customer_id NOT NULL,
+    isbn TEXT NOT NULL,
+    due REAL NOT NULL,
+    PRIMARY KEY (customer_id, isbn)
+);
+CREATE INDEX IF NOT EXISTS loans_by_due ON loans (due);
+CREATE TABLE IF NOT EXISTS borrowed (
+    customer_id NOT NULL,
+    isbn TEXT NOT NULL,
+    PRIMARY KEY (customer_id, isbn)
+);
+"""
+
+# Databases created before the borrowed table existed: their active loans are the only history left
+BACKFILL_BORROWED = ("INSERT OR IGNORE INTO borrowed (customer_id, isbn) "
+                     "SELECT customer_id, isbn FROM loans ORDER BY rowid")
+
+BOOK_COLUMNS = "b.isbn, b.title, b.author, b.checked_out"  # Books are always aliased as b
+
+
+class ConnectionPool:
+    """A fixed number of connections to one database file, shared between threads."""
+
+    def __init__(self, path: str, size: int = 4):
+        """
+        Args:
+            path (str): Database file. ':memory:' does not work: every connection would get its own database.
+            size (int): Number of connections; callers wait when all of them are in use.
+        """
+        self.path = path
+        self._idle = queue.SimpleQueue()  # C implementation: borrowing costs well under a microsecond
+        self._connections = [self._connect() for _ in range(size)]
+        for connection in self._connections:
+            self._idle.put(connection)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode: transactions are opened explicitly, see transaction()
+        connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False,
+                                     cached_statements=256, timeout=30)
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")  # WAL stays consistent; fsync at checkpoints
+        connection.execute("PRAGMA cache_size = -65536")  # 64 MB of pages per connection
+        connection.execute("PRAGMA mmap_size = 268435456")  # Reads map the file instead of copying pages
+        return connection
+
+    @contextlib.contextmanager
+    def connection(self):
+        """Borrows a connection for the duration of a `with` block."""
+        connection = self._idle.get()
+        try:
+            yield connection
+        finally:
+            self._idle.put(connection)
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Borrows a connection and runs the `with` block in one write transaction."""
+        with self.connection() as connection:
+            # IMMEDIATE takes the write lock up front, so two writers never deadlock upgrading a read lock
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+                connection.execute("COMMIT")
+            except BaseException:
+                # Also when COMMIT fails (e.g. SQLITE_BUSY): the connection goes back to the pool
+                # and must not hold a transaction open for the next borrower
+                if connection.in_transaction:
+                    connection.execute("ROLLBACK")
+                raise
+
+    def close(self):
+        for connection in self._connections:
+            connection.close()
+
+
+class SQLiteLibrary:
+    """A Library stored in a SQLite database file."""
+
+    def __init__(self, path: str, loan_days=14, pool_size: int = 4):
+        """
+        Args:
+            path (str): Database file, created if needed.
+            loan_days (int): Days before a checked out book is due.
+            pool_size (int): Connections kept open (see ConnectionPool).
+        """
+        self.loan_days = loan_days
+        self._recommendations = None  # CoBorrowingIndex, see build_recommendations
+        self._pool = ConnectionPool(path, pool_size)
+        with self._pool.connection() as connection:
+            new_history = connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'borrowed'").fetchone() is None
+            connection.executescript(SCHEMA)
+            if new_history:
+                connection.execute(BACKFILL_BORROWED)
+
+    def close(self):
+        self._pool.close()
+
+    def _book(self, row):
+        isbn, title, author, checked_out = row
+        book = Book(title, author, isbn)
+        book._checked_out = bool(checked_out)
+        book._library = self
+        return book
+
+    def _insert_books(self, connection, books) -> int:
+        added = 0
+        for book in books:
+            cursor = connection.execute(
+                "INSERT OR IGNORE INTO books (isbn, title, author, title_key, author_key, checked_out) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (book.isbn, book.title, book.author, _normalize(book.title), _normalize(book.author),
+                 int(book.checked_out)))
+            if cursor.rowcount:
+                connection.execute("INSERT INTO book_text (isbn, title, author) VALUES (?, ?, ?)",
+                                   (book.isbn, book.title, book.author))
+                book._library = self
+                added += 1
+        return added
+
+    def add_book(self, book):
+        with self._pool.transaction() as connection:
+            if not self._insert_books(connection, [book]):
+                print(f"A book with ISBN {book.isbn} is already in the library.")
+
+    def add_books(self, books) -> int:
+        """
+        Adds many books in one transaction. Books whose ISBN is already in the
+        library are skipped silently.
+
+        Returns:
+            int: number of books added.
+        """
+        with self._pool.transaction() as connection:
+            return self._insert_books(connection, books)
+
+    def add_customer(self, customer):
+        with self._pool.transaction() as connection:
+            cursor = connection.execute("INSERT OR IGNORE INTO customers (customer_id, name) VALUES (?, ?)",
+                                        (customer.customer_id, customer.name))
+        if not cursor.rowcount:
+            print(f"A customer with ID {customer.customer_id} is already registered.")
+
+    def find_book(self, isbn):
+        with self._pool.connection() as connection:
+            row = connection.execute(f"SELECT {BOOK_COLUMNS} FROM books b WHERE isbn = ?", (isbn,)).fetchone()
+        return self._book(row) if row else None
+
+    def find_customer(self, customer_id):
+        with self._pool.connection() as connection:
+            row = connection.execute("SELECT name FROM customers WHERE customer_id = ?",
+                                     (customer_id,)).fetchone()
+            if row is None:
+                return None
+            books = connection.execute(
+                f"SELECT {BOOK_COLUMNS} "
+                "FROM loans l JOIN books b ON b.isbn = l.isbn WHERE l.customer_id = ? ORDER BY l.rowid",
+                (customer_id,)).fetchall()
+            borrowed = connection.execute("SELECT isbn FROM borrowed WHERE customer_id = ? ORDER BY rowid",
+                                          (customer_id,)).fetchall()
+        customer = Customer(row[0], customer_id)
+        for book_row in books:
+            book = self._book(book_row)
+            customer._checked_out_books[book.isbn] = book
+        customer._borrowed = dict.fromkeys(isbn for isbn, in borrowed)
+        return customer
+
+    def find_books_by_author(self, author):
+        """Returns the books of an author (case-insensitive), in insertion order."""
+        with self._pool.connection() as connection:
+            rows = connection.execute(f"SELECT {BOOK_COLUMNS} FROM books b WHERE author_key = ? ORDER BY rowid",
+                                      (_normalize(author),)).fetchall()
+        return [self._book(row) for row in rows]
+
+    def find_books_by_title(self, prefix, limit=None):
+        """Returns the books whose title starts with `prefix` (case-insensitive), sorted by title."""
+        key = _normalize(prefix)
+        # Every key starting with `key` sorts between `key` and `key` followed by the last code point
+        with self._pool.connection() as connection:
+            rows = connection.execute(
+                f"SELECT {BOOK_COLUMNS} FROM books b WHERE title_key >= ? AND title_key < ? "
+                "ORDER BY title_key, rowid LIMIT ?",
+                (key, key + '\U0010ffff', -1 if limit is None else limit)).fetchall()
+        return [self._book(row) for row in rows]
+
+    def search(self, query, limit=20):
+        """Returns the books best matching any word of the query, ranked with BM25."""
+        terms = tokenize(query)
+        if not terms or limit <= 0:
+            return []
+        match = " OR ".join(f'"{term}"' for term in terms)
+        with self._pool.connection() as connection:
+            rows = connection.execute(
+                f"SELECT {BOOK_COLUMNS} "
+                "FROM book_text t JOIN books b ON b.isbn = t.isbn "
+                "WHERE book_text MATCH ? ORDER BY t.rank, t.rowid LIMIT ?",
+                (match, limit)).fetchall()
+        return [self._book(row) for row in rows]
+
+    def _reindex_title(self, book, old_title, new_title):
+        with self._pool.transaction() as connection:
+            connection.execute("UPDATE books SET title = ?, title_key = ? WHERE isbn = ?",
+                               (new_title, _normalize(new_title), book.isbn))
+            connection.execute("UPDATE book_text SET title = ? WHERE isbn = ?", (new_title, book.isbn))
+
+    def _reindex_author(self, book, old_author, new_author):
+        with self._pool.transaction() as connection:
+            connection.execute("UPDATE books SET author = ?, author_key = ? WHERE isbn = ?",
+                               (new_author, _normalize(new_author), book.isbn))
+            connection.execute("UPDATE book_text SET author = ? WHERE isbn = ?", (new_author, book.isbn))
+
+    def _check_out(self, connection, customer_id, isbn, due):
+        """
+        Checks out a book inside a transaction.
+
+        Returns:
+            str: None on success, otherwise why it failed ('customer', 'book' or 'checked_out').
+        """
+        if connection.execute("SELECT 1 FROM customers WHERE customer_id = ?", (customer_id,)).fetchone() is None:
+            return 'customer'
+        # The WHERE clause is the availability check, so it cannot race with another writer
+        if connection.execute("UPDATE books SET checked_out = 1 WHERE isbn = ? AND checked_out = 0",
+                              (isbn,)).rowcount:
+            connection.execute("INSERT INTO loans (customer_id, isbn, due) VALUES (?, ?, ?)",
+                               (customer_id, isbn, due))
+            connection.execute("INSERT OR IGNORE INTO borrowed (customer_id, isbn) VALUES (?, ?)",
+                               (customer_id, isbn))
+            return None
+        exists = connection.execute("SELECT 1 FROM books b WHERE isbn = ?", (isbn,)).fetchone()
+        return 'checked_out' if exists else 'book'
+
+    def _check_in(self, connection, customer_id, isbn):
+        """Checks in a book inside a transaction. Returns True if the customer had it."""
+        if connection.execute("DELETE FROM loans WHERE customer_id = ? AND isbn = ?",
+                              (customer_id, isbn)).rowcount:
+            connection.execute("UPDATE books SET checked_out = 0 WHERE isbn = ?", (isbn,))
+            return True
+        return False
+
+    def check_out_book(self, customer_id, isbn):
+        """Returns True if the book was checked out to the customer."""
+        with self._pool.transaction() as connection:
+            error = self._check_out(connection, customer_id, isbn, time.time() + self.loan_days * 86400)
+            if error != 'customer':
+                title, name = self._names(connection, customer_id, isbn)
+        if error == 'customer':
+            print("Customer not found.")
+        elif error == 'book':
+            print("Book not found.")
+        elif error == 'checked_out':
+            print(f"Book '{title}' is already checked out.")
+        else:
+            print(f"Book '{title}' checked out to {name}.")
+        return error is None
+
+    def check_in_book(self, customer_id, isbn):
+        """Returns True if the customer had the book and returned it."""
+        returned = False
+        with self._pool.transaction() as connection:
+            title, name = self._names(connection, customer_id, isbn)
+            if name is not None and title is not None:
+                returned = self._check_in(connection, customer_id, isbn)
+        if name is None:
+            print("Customer not found.")
+        elif title is None:
+            print("Book not found.")
+        elif returned:
+            print(f"Book '{title}' checked in from {name}.")
+        else:
+            print(f"Book '{title}' not found in {name}'s list.")
+        return returned
+
+    def _names(self, connection, customer_id, isbn):
+        """(book title, customer name), None for the ones that do not exist."""
+        book = connection.execute("SELECT title FROM books b WHERE isbn = ?", (isbn,)).fetchone()
+        customer = connection.execute("SELECT name FROM customers WHERE customer_id = ?",
+                                      (customer_id,)).fetchone()
+        return book and book[0], customer and customer[0]
+
+    def check_out_books(self, loans) -> list:
+        """
+        Checks out many (customer_id, isbn) pairs in one transaction, without printing.
+
+        Returns:
+            list: True for every pair that was checked out.
+        """
+        due = time.time() + self.loan_days * 86400
+        with self._pool.transaction() as connection:
+            return [self._check_out(connection, customer_id, isbn, due) is None for customer_id, isbn in loans]
+
+    def check_in_books(self, loans) -> list:
+        """
+        Checks in many (customer_id, isbn) pairs in one transaction, without printing.
+
+        Returns:
+            list: True for every pair that was checked in.
+        """
+        with self._pool.transaction() as connection:
+            return [self._check_in(connection, customer_id, isbn) for customer_id, isbn in loans]
+
+    def due_date(self, customer_id, isbn):
+        """Due timestamp of a loan, or None if the customer does not have the book."""
+        with self._pool.connection() as connection:
+            row = connection.execute("SELECT due FROM loans WHERE customer_id = ? AND isbn = ?",
+                                     (customer_id, isbn)).fetchone()
+        return row[0] if row else None
+
+    def overdue_loans(self, now=None):
+        """Returns (customer, book, due timestamp) for every loan due before `now`, oldest first."""
+        now = time.time() if now is None else now
+        # One join for every loan of the customers with an overdue loan, and one for their
+        # history, so each customer is built once, complete, like find_customer does
+        with self._pool.connection() as connection:
+            rows = connection.execute(
+                f"SELECT l.customer_id, c.name, l.due, {BOOK_COLUMNS} "
+                "FROM loans l JOIN customers c ON c.customer_id = l.customer_id JOIN books b ON b.isbn = l.isbn "
+                "WHERE l.customer_id IN (SELECT customer_id FROM loans WHERE due < ?) ORDER BY l.rowid",
+                (now,)).fetchall()
+            borrowed = connection.execute(
+                "SELECT customer_id, isbn FROM borrowed "
+                "WHERE customer_id IN (SELECT customer_id FROM loans WHERE due < ?) ORDER BY rowid",
+                (now,)).fetchall()
+        customers, overdue = {}, []
+        for customer_id, name, due, *book_row in rows:
+            customer = customers.get(customer_id)
+            if customer is None:
+                customer = customers[customer_id] = Customer(name, customer_id)
+            book = self._book(book_row)
+            customer._checked_out_books[book.isbn] = book
+            if due < now:
+                overdue.append((customer, book, due))
+        for customer_id, isbn in borrowed:
+            customers[customer_id]._borrowed[isbn] = None
+        overdue.sort(key=itemgetter(2))
+        return overdue
+
+    def borrowing_history(self):
+        """Yields (customer_id, isbn) for every book every customer has checked out."""
+        with self._pool.connection() as connection:
+            cursor = connection.execute(
+                "SELECT h.customer_id, h.isbn FROM borrowed h JOIN customers c ON c.customer_id = h.customer_id "
+                "ORDER BY c.rowid, h.rowid")
+            while rows := cursor.fetchmany(10_000):
+                yield from rows
+
+    def build_recommendations(self, k=20, similarity='count'):
+        """Builds the co-borrowing index used by also_borrowed from the borrowed table."""
+        self._recommendations = CoBorrowingIndex.build(self.borrowing_history(), k, similarity)
+
+    def also_borrowed(self, isbn, limit=10):
+        """Returns the books most often borrowed by the readers of a book, best first."""
+        if self._recommendations is None:
+            return []
+        isbns = [other for other, _ in self._recommendations.recommend(isbn, limit)]
+        if not isbns:
+            return []
+        # json_each keeps the SQL constant whatever the number of ISBNs
+        with self._pool.connection() as connection:
+            rows = connection.execute(
+                f"SELECT {BOOK_COLUMNS} FROM books b WHERE b.isbn IN (SELECT value FROM json_each(?))",
+                (json.dumps(isbns),)).fetchall()
+        books = {row[0]: self._book(row) for row in rows}
+        return [books[other] for other in isbns if other in books]
+
+    def page_books(self, cursor=None, limit=100, order='added'):
+        """
+        Returns one page of books, like Library.page_books.
+
+        Pages are read with keyset pagination: the cursor holds the sort key of
+        the last book, and the next page starts from it in the index, so deep
+        pages cost the same as the first one.
+        """
+        if order == 'added':
+            last = decode_cursor(cursor) if cursor else -1
+            sql = f"SELECT b.rowid, {BOOK_COLUMNS} FROM books b WHERE b.rowid > ? ORDER BY b.rowid LIMIT ?"
+            parameters = (last, limit + 1)
+        elif order == 'title':
+            last_key, last = decode_cursor(cursor) if cursor else ('', -1)
+            sql = (f"SELECT b.rowid, {BOOK_COLUMNS} FROM books b WHERE (b.title_key, b.rowid) > (?, ?) "
+                   "ORDER BY b.title_key, b.rowid LIMIT ?")
+            parameters = (last_key, last, limit + 1)
+        else:
+            raise ValueError(f"Unknown order: {order}")
+        with self._pool.connection() as connection:
+            rows = connection.execute(sql, parameters).fetchall()
+        books = [self._book(row[1:]) for row in rows[:limit]]
+        if len(rows) <= limit:
+            return books, None
+        last_row = rows[limit - 1]
+        return books, encode_cursor(last_row[0] if order == 'added' else (_normalize(last_row[2]), last_row[0]))
+
+    def page_customers(self, cursor=None, limit=100):
+        """Returns one page of customers in insertion order, like Library.page_customers."""
+        last = decode_cursor(cursor) if cursor else -1
+        # The page, then the loans and the history of all its customers: three queries whatever the page size
+        with self._pool.connection() as connection:
+            rows = connection.execute(
+                "SELECT rowid, customer_id, name FROM customers WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                (last, limit + 1)).fetchall()
+            page = rows[:limit]
+            if page:
+                first, last_in_page = page[0][0], page[-1][0]
+                loans = connection.execute(
+                    f"SELECT l.customer_id, {BOOK_COLUMNS} FROM loans l JOIN books b ON b.isbn = l.isbn "
+                    "WHERE l.customer_id IN (SELECT customer_id FROM customers WHERE rowid BETWEEN ? AND ?) "
+                    "ORDER BY l.rowid",
+                    (first, last_in_page)).fetchall()
+                borrowed = connection.execute(
+                    "SELECT customer_id, isbn FROM borrowed "
+                    "WHERE customer_id IN (SELECT customer_id FROM customers WHERE rowid BETWEEN ? AND ?) "
+                    "ORDER BY rowid",
+                    (first, last_in_page)).fetchall()
+        customers = {customer_id: Customer(name, customer_id) for _, customer_id, name in page}
+        if page:
+            for customer_id, *book_row in loans:
+                book = self._book(book_row)
+                customers[customer_id]._checked_out_books[book.isbn] = book
+            for customer_id, isbn in borrowed:
+                customers[customer_id]._borrowed[isbn] = None
+        return list(customers.values()), encode_cursor(rows[limit - 1][0]) if len(rows) > limit else None
+
+    def display_books(self, sink=None, format='text', order='added', page_size=1000):
+        """Writes every book to `sink` (default: stdout), a page at a time (see display.write_books)."""
+        if format == 'text':
+            (sys.stdout if sink is None else sink).write("Library Books:\n")
+        write_books(self, sink, format, order, page_size)
+
+    def display_customers(self, sink=None, format='text', page_size=1000):
+        """Writes every customer to `sink` (default: stdout), a page at a time."""
+        if format == 'text':
+            (sys.stdout if sink is None else sink).write("Library Customers:\n")
+        write_customers(self, sink, format, page_size)
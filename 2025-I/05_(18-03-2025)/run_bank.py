@@ -0,0 +1,85 @@
+import os
+import tempfile
+import time
+
+from bank_system import (BankAccount, BatchEngine, DrainRule, FraudMonitor, NullJournal, ThreadSafeBankAccount,
+                         TransactionJournal, WithdrawalCountRule, transfer)
+
+def test_account():
+    # Same scenario as `oop_part2.py`
+    account = BankAccount("Alice", 1000)
+    print(account.deposit(500))
+    print(account.withdraw(200))
+    print(account.get_balance())
+    print(account.get_owner())
+
+def test_journal():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "transactions.journal")
+        journal = TransactionJournal(path)
+        account = BankAccount("Alice", 1000, balance=100, journal=journal)
+        account.deposit(500)
+        before_withdrawal = time.time_ns()
+        account.withdraw(200)
+        journal.close()
+
+        # Reopen the journal as after a restart
+        journal = TransactionJournal(path)
+        account = BankAccount.from_journal("Alice", 1000, journal)
+        print(account.get_balance())
+        print(account.balance_as_of(before_withdrawal))
+        print(journal.history(1000)['amount'].tolist())
+        journal.close()
+
+def test_transfer():
+    alice = ThreadSafeBankAccount("Alice", 1000, balance=300, journal=NullJournal())
+    bob = ThreadSafeBankAccount("Bob", 1001, balance=50, journal=NullJournal())
+    transfer(alice, bob, 100)
+    try:
+        transfer(bob, alice, 500)
+    except ValueError as error:
+        print(error)
+    print(alice.get_balance(), bob.get_balance())
+
+def test_batch():
+    # Same transfers as test_transfer, plus 1% interest: account 0 is Alice, 1 is Bob
+    engine = BatchEngine([300, 50])
+    print(engine.apply_transfers([0, 1], [1, 0], [100, 500]).tolist())
+    print(engine.apply_interest(0.01).tolist(), engine.balances.tolist())
+
+def test_fraud():
+    monitor = FraudMonitor([WithdrawalCountRule(count=3), DrainRule(fraction=0.9, minimum=100)])
+    account = BankAccount("Alice", 1000, balance=1000, journal=monitor)
+    for _ in range(4):
+        account.withdraw(10)
+    account.withdraw(900)
+    for alert in monitor.alerts:
+        print(alert.rule, alert.account, alert.amount, alert.balance)
+
+if __name__=='__main__':
+    test_account()
+    test_journal()
+    test_transfer()
+    test_batch()
+    test_fraud()
+
+'''
+The output should be:
+
+Transaction Log: Deposited: 500 - Balance: 500
+None
+Transaction Log: Withdrew: 200 - Balance: 300
+None
+300
+Alice
+400.0
+600.0
+[100.0, 500.0, -200.0]
+Insufficient funds
+200 150
+[True, False]
+[2, 2] [202, 152]
+withdrawal_count 1000 -10 960
+withdrawal_count 1000 -900 60
+drain 1000 -900 60
+'''
@@ -0,0 +1,147 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+
+from library_system import Book, Customer, Library, SQLiteLibrary, import_catalog
+
+def test_library():
+    # Same scenario as the library solution in `_solution(1).py`
+    book1 = Book("The Great Gatsby", "F. Scott Fitzgerald", "9780743273565")
+    book2 = Book("1984", "George Orwell", "9780451524935")
+
+    customer1 = Customer("Alice Smith", "C001")
+    customer2 = Customer("Bob Johnson", "C002")
+
+    library = Library()
+    library.add_book(book1)
+    library.add_book(book2)
+    library.add_customer(customer1)
+    library.add_customer(customer2)
+
+    library.check_out_book("C001", "9780743273565")  # Alice checks out The Great Gatsby
+    library.check_out_book("C001", "9780451524935")  # Alice checks out 1984
+    library.check_out_book("C002", "9780743273565")  # Bob tries to check out an already checked-out book
+
+    library.display_books()
+    library.display_customers()
+
+    library.check_in_book("C001", "9780743273565")  # Alice returns The Great Gatsby
+    library.check_in_book("C002", "9780743273565")  # Bob tries to return a book he didn't check out
+
+    library.display_books()
+
+def test_indexes():
+    library = Library()
+    library.add_book(Book("Animal Farm", "George Orwell", "9780451526342"))
+    library.add_book(Book("1984", "George Orwell", "9780451524935"))
+    library.add_book(Book("The Great Gatsby", "F. Scott Fitzgerald", "9780743273565"))
+    library.add_book(Book("The Grapes of Wrath", "John Steinbeck", "9780143039433"))
+
+    print([book.title for book in library.find_books_by_author("george orwell")])
+    print([book.title for book in library.find_books_by_title("the gr")])
+
+    # Indexes follow changes made through the properties
+    library.find_book("9780451526342").title = "Animal Farm: A Fairy Story"
+    print([book.title for book in library.find_books_by_title("animal farm:")])
+
+    # Full-text search on any word of the title or the author
+    print([book.title for book in library.search("orwell farm")])
+
+def test_loans():
+    library = Library(loan_days=14)
+    library.add_book(Book("1984", "George Orwell", "9780451524935"))
+    library.add_book(Book("The Great Gatsby", "F. Scott Fitzgerald", "9780743273565"))
+    library.add_customer(Customer("Alice Smith", "C001"))
+    library.check_out_book("C001", "9780451524935")
+    library.check_out_book("C001", "9780743273565")
+    library.check_in_book("C001", "9780743273565")
+
+    # Three weeks later, only 1984 is still out and overdue
+    in_three_weeks = time.time() + 21 * 86400
+    for customer, book, due in library.overdue_loans(now=in_three_weeks):
+        print(f"{customer.name} has '{book.title}', overdue by {(in_three_weeks - due) / 86400:.0f} days")
+
+def test_sqlite_loans():
+    # Same loans as test_loans, stored in SQLite
+    with tempfile.TemporaryDirectory() as directory:
+        library = SQLiteLibrary(os.path.join(directory, "library.db"), loan_days=14)
+        with contextlib.redirect_stdout(io.StringIO()):
+            library.add_book(Book("1984", "George Orwell", "9780451524935"))
+            library.add_book(Book("The Great Gatsby", "F. Scott Fitzgerald", "9780743273565"))
+            library.add_customer(Customer("Alice Smith", "C001"))
+            library.check_out_book("C001", "9780451524935")
+            library.check_out_book("C001", "9780743273565")
+            library.check_in_book("C001", "9780743273565")
+
+        in_three_weeks = time.time() + 21 * 86400
+        for customer, book, due in library.overdue_loans(now=in_three_weeks):
+            print(f"{customer.name} has '{book.title}', overdue by {(in_three_weeks - due) / 86400:.0f} days")
+        # Returned books stay in the history
+        print(list(library.borrowing_history()))
+        library.close()
+
+def test_import():
+    records = [{"title": "Animal Farm", "author": "George Orwell", "isbn": "978-0-451-52634-2"},
+               {"title": "Brave New World", "author": "Aldous Huxley", "isbn": "0060850523"},
+               {"title": "Typo", "author": "Nobody", "isbn": "9780451526343"},
+               {"title": "Animal Farm", "author": "George Orwell", "isbn": "9780451526342"}]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "catalog.jsonl")
+        with open(path, "w") as file:
+            file.writelines(json.dumps(record) + "\n" for record in records)
+        library = Library()
+        report = import_catalog(library, path)
+    print({name: report[name] for name in ("read", "imported", "invalid", "duplicates")})
+    print([book.title for book in library.find_books_by_title("")])
+
+def test_recommendations():
+    # The same history on both backends gives the same recommendations
+    borrowed = {"C001": ["9780451524935", "9780451526342", "9780060850524"],
+                "C002": ["9780451524935", "9780060850524"],
+                "C003": ["9780451524935", "9780743273565"]}
+    with tempfile.TemporaryDirectory() as directory:
+        for library in (Library(), SQLiteLibrary(os.path.join(directory, "library.db"))):
+            with contextlib.redirect_stdout(io.StringIO()):
+                library.add_book(Book("1984", "George Orwell", "9780451524935"))
+                library.add_book(Book("Animal Farm", "George Orwell", "9780451526342"))
+                library.add_book(Book("Brave New World", "Aldous Huxley", "9780060850524"))
+                library.add_book(Book("The Great Gatsby", "F. Scott Fitzgerald", "9780743273565"))
+                for customer_id, isbns in borrowed.items():
+                    library.add_customer(Customer(f"Customer {customer_id}", customer_id))
+                    for isbn in isbns:
+                        library.check_out_book(customer_id, isbn)
+                        library.check_in_book(customer_id, isbn)
+            library.build_recommendations()
+            print([book.title for book in library.also_borrowed("9780451524935")])
+            if isinstance(library, SQLiteLibrary):
+                library.close()
+
+if __name__=='__main__':
+    test_library()
+    test_indexes()
+    test_loans()
+    test_sqlite_loans()
+    test_import()
+    test_recommendations()
+
+'''
+The last lines of the output should be:
+
+['Animal Farm', '1984']
+['The Grapes of Wrath', 'The Great Gatsby']
+['Animal Farm: A Fairy Story']
+['Animal Farm: A Fairy Story', '1984']
+Book '1984' checked out to Alice Smith.
+Book 'The Great Gatsby' checked out to Alice Smith.
+Book 'The Great Gatsby' checked in from Alice Smith.
+Alice Smith has '1984', overdue by 7 days
+Alice Smith has '1984', overdue by 7 days
+[('C001', '9780451524935'), ('C001', '9780743273565')]
+{'read': 4, 'imported': 2, 'invalid': 1, 'duplicates': 1}
+['Animal Farm', 'Brave New World']
+['Brave New World', 'Animal Farm', 'The Great Gatsby']
+['Brave New World', 'Animal Farm', 'The Great Gatsby']
+'''
@@ -0,0 +1,200 @@
+"""
+Stress test of concurrent checkouts.
+
+Hundreds of threads check out and return the same few books. A separate,
+lock-protected tally counts how many customers hold each book at the same
+time: more than one is a double checkout. ConcurrentLibrary must never double
+check out. The plain Library is run for comparison: on CPython builds with a
+GIL, threads only switch at calls and loop iterations, so its check-then-set
+rarely interleaves; free-threaded builds have no such luck. Both are run
+again with RacyBook, which yields inside the check-then-set: the plain
+Library must then double check out, or the test could not see the race.
+
+A second test searches and pages through the catalog while another thread
+imports books, and counts the reads that fail on a half-updated index.
+
+Usage:
+    python stress_library.py
+    python stress_library.py --threads 500 --throughput 1 4 16 64 256
+"""
+import argparse
+import contextlib
+import os
+import random
+import sys
+import threading
+import time
+
+from library_system import Book, ConcurrentLibrary, Customer, Library
+from benchmark_library import make_books, make_isbn
+
+
+class RacyBook(Book):
+    """A Book that lets other threads run between its availability check and its update."""
+
+    __slots__ = ()
+
+    def check_out(self):
+        if not self._checked_out:
+            time.sleep(0)  # Another thread can find the book still available here
+            self._checked_out = True
+            return True
+        return False
+
+
+def test_no_double_checkouts(library_class, n_threads: int = 300, n_books: int = 20, rounds: int = 200,
+                             seed: int = 0, book_class=Book) -> int:
+    """
+    Runs the stress test on a new library.
+
+    With book_class=RacyBook, the race is forced: a library without locks
+    must show double checkouts, which shows the test can see them.
+
+    Returns:
+        int: number of double checkouts seen (0 for a thread-safe library).
+    """
+    library = library_class()
+    isbns = [make_isbn(i) for i in range(n_books)]
+    for i, isbn in enumerate(isbns):
+        library.add_book(book_class(f"Book {i}", "Stress Test", isbn))
+    for i in range(n_threads):
+        library.add_customer(Customer(f"Customer {i}", f"C{i}"))
+
+    holders = dict.fromkeys(isbns, 0)  # Customers holding each book right now
+    tally_lock = threading.Lock()
+    double_checkouts = 0
+    start = threading.Barrier(n_threads)
+
+    def borrow(customer_id, rng):
+        nonlocal double_checkouts
+        start.wait()
+        for _ in range(rounds):
+            isbn = rng.choice(isbns)
+            if not library.check_out_book(customer_id, isbn):
+                continue
+            with tally_lock:
+                holders[isbn] += 1
+                if holders[isbn] > 1:
+                    double_checkouts += 1
+            time.sleep(0)  # Keep the book a little while, so other threads try to get it
+            with tally_lock:
+                holders[isbn] -= 1
+            library.check_in_book(customer_id, isbn)
+
+    threads = [threading.Thread(target=borrow, args=(f"C{i}", random.Random(seed + i))) for i in range(n_threads)]
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # Switch threads as often as possible to expose races
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    if library_class is ConcurrentLibrary:
+        # Every book was returned: nothing may be left checked out or in the ledger
+        assert double_checkouts == 0, f"{double_checkouts} double checkouts"
+        assert not any(library.find_book(isbn).checked_out for isbn in isbns)
+        assert not any(library.find_customer(f"C{i}").checked_out_books for i in range(n_threads))
+        assert len(library._loans) == 0
+    return double_checkouts
+
+
+def test_reads_during_imports(library_class, n_readers: int = 8, n_books: int = 5_000, batch_size: int = 100,
+                              seed: int = 0) -> int:
+    """
+    Searches and pages through a library while one thread adds books in batches.
+
+    Returns:
+        int: number of reads that raised (0 for a thread-safe library).
+    """
+    library = library_class()
+    books = list(make_books(n_books, seed))
+    done = threading.Event()
+    errors = 0
+    errors_lock = threading.Lock()
+
+    def write():
+        for start in range(0, n_books, batch_size):
+            library.add_books(books[start:start + batch_size])
+        done.set()
+
+    def read(rng):
+        nonlocal errors
+        while not done.is_set():
+            try:
+                library.search(rng.choice(books).title)
+                library.find_books_by_title(rng.choice(books).title[:3], limit=10)
+                library.page_books(limit=50, order='title')
+            except Exception:
+                with errors_lock:
+                    errors += 1
+
+    threads = [threading.Thread(target=read, args=(random.Random(seed + i),)) for i in range(n_readers)]
+    threads.append(threading.Thread(target=write))
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    if library_class is ConcurrentLibrary:
+        assert errors == 0, f"{errors} failed reads"
+    return errors
+
+
+def report_throughput(thread_counts, n_books: int = 100_000, n_operations: int = 200_000, seed: int = 0):
+    """Checkouts + check-ins per second on ConcurrentLibrary, for each number of threads."""
+    library = ConcurrentLibrary()
+    library.add_books(make_books(n_books, seed))
+    n_customers = n_books // 10
+    for i in range(n_customers):
+        library.add_customer(Customer(f"Customer {i}", f"C{i}"))
+
+    print(f"{'threads':>8} {'operations/s':>14}")
+    for n_threads in thread_counts:
+        per_thread = n_operations // n_threads
+
+        def work(rng):
+            for _ in range(per_thread):
+                customer_id, isbn = f"C{rng.randrange(n_customers)}", make_isbn(rng.randrange(n_books))
+                if library.check_out_book(customer_id, isbn):
+                    library.check_in_book(customer_id, isbn)
+
+        threads = [threading.Thread(target=work, args=(random.Random(seed + i),)) for i in range(n_threads)]
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+        print(f"{n_threads:>8} {per_thread * n_threads / elapsed:>14,.0f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=300)
+    parser.add_argument('--throughput', type=int, nargs='*', default=[1, 2, 4, 8, 16, 32, 64, 128, 256])
+    args = parser.parse_args()
+    for library_class in (Library, ConcurrentLibrary):
+        doubles = test_no_double_checkouts(library_class, n_threads=args.threads)
+        print(f"{library_class.__name__}: {doubles} double checkouts with {args.threads} threads")
+    # Negative control: with the race forced, Library must fail and ConcurrentLibrary must not
+    racy_doubles = test_no_double_checkouts(Library, n_threads=args.threads, book_class=RacyBook)
+    assert racy_doubles > 0, "the stress test saw no double checkout even with the race forced"
+    print(f"Library, forced race: {racy_doubles} double checkouts")
+    test_no_double_checkouts(ConcurrentLibrary, n_threads=args.threads, book_class=RacyBook)
+    print("ConcurrentLibrary, forced race: 0 double checkouts")
+    for library_class in (Library, ConcurrentLibrary):
+        errors = test_reads_during_imports(library_class)
+        print(f"{library_class.__name__}: {errors} failed reads during an import")
+    if args.throughput:
+        print()
+        report_throughput(args.throughput)
@@ -0,0 +1,104 @@
+"""
+Benchmark of BurgerBuilder against BurgerPrototypes (see builder.py).
+
+Orders are 90% the five usual configurations and 10% random ones. Every
+order is kept, as an order queue would, to measure the memory they take.
+
+Usage:
+    python benchmark_builder.py
+    python benchmark_builder.py --orders 100000 --modified 0.2
+"""
+import argparse
+import contextlib
+import io
+import random
+import time
+import tracemalloc
+
+with contextlib.redirect_stdout(io.StringIO()):  # builder.py prints its demo when imported
+    from builder import BurgerBuilder, BurgerPrototypes
+
+BUNS = ["Sesame Bun", "Plain Bun", "Brioche Bun", "Whole Wheat Bun"]
+PATTIES = ["Beef Patty", "Chicken Patty", "Veggie Patty", "Fish Patty"]
+CHEESES = [None, "Cheddar Cheese", "Swiss Cheese", "Blue Cheese"]
+USUAL = [("Sesame Bun", "Beef Patty", "Cheddar Cheese", None),
+         ("Plain Bun", "Chicken Patty", None, None),
+         ("Brioche Bun", "Beef Patty", "Swiss Cheese", True),
+         ("Sesame Bun", "Veggie Patty", None, True),
+         ("Plain Bun", "Beef Patty", None, None)]
+
+
+def make_orders(n_orders: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [rng.choice(USUAL) if rng.random() < 0.9 else
+            (rng.choice(BUNS), rng.choice(PATTIES), rng.choice(CHEESES), rng.choice([None, True]))
+            for _ in range(n_orders)]
+
+
+def build(bun, patty, cheese, tomato):
+    """One order with the builder, as before the prototypes."""
+    builder = BurgerBuilder().add_bun(bun).add_patty(patty)
+    if cheese is not None:
+        builder.add_cheese(cheese)
+    if tomato:
+        builder.add_tomato()
+    return builder.build()
+
+
+def measure(label: str, func, orders, modified):
+    """Runs func(order, modify) for every order; prints the time and the memory of the kept burgers."""
+    start = time.perf_counter()
+    burgers = [func(order, modify) for order, modify in zip(orders, modified)]
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    burgers = None
+    burgers = [func(order, modify) for order, modify in zip(orders, modified)]
+    memory, _ = tracemalloc.get_traced_memory()
+    blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+    tracemalloc.stop()
+    print(f"  {label:<32} {elapsed / len(orders) * 1e6:8.2f} us/order {memory / 1e6:9.1f} MB"
+          f" {blocks / len(orders):8.2f} blocks/order")
+    return burgers
+
+
+def benchmark(n_orders: int, modified_share: float, seed: int = 0):
+    print(f"\n{n_orders:,} orders, {modified_share:.0%} of them modified (tomato added)")
+    orders = make_orders(n_orders, seed)
+    rng = random.Random(seed + 1)
+    modified = [rng.random() < modified_share for _ in orders]
+
+    def with_builder(order, modify):
+        burger = build(*order)
+        if modify:
+            burger = BurgerBuilder().take_burger(burger).add_tomato().build()
+        return burger
+
+    prototypes = BurgerPrototypes()
+
+    def shared(order, modify):
+        burger = prototypes.order(*order)
+        if modify:
+            burger = BurgerBuilder().take_burger(burger).add_tomato().build()  # Copy-on-write
+        return burger
+
+    def copies(order, modify):
+        burger = prototypes.order_copy(*order)
+        if modify:
+            burger = BurgerBuilder().take_burger(burger).add_tomato().build()
+        return burger
+
+    expected = [str(burger) + str(burger.tomato) for burger in measure("BurgerBuilder", with_builder, orders, modified)]
+    for label, func in (("BurgerPrototypes.order (shared)", shared), ("BurgerPrototypes.order_copy", copies)):
+        burgers = measure(label, func, orders, modified)
+        assert [str(burger) + str(burger.tomato) for burger in burgers] == expected
+    print(f"  {'configurations built once':<32} {len(prototypes):8}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, nargs='*', default=[1_000_000])
+    parser.add_argument('--modified', type=float, default=0.1)
+    args = parser.parse_args()
+    for n_orders in args.orders:
+        benchmark(n_orders, args.modified)
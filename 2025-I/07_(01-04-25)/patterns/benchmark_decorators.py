@@ -0,0 +1,112 @@
+"""
+Overhead of the decorators of this folder, measured with decorators_benchmark.benchmark.
+
+Usage:
+    python benchmark_decorators.py
+"""
+import functools
+import random
+import threading
+import time
+
+from decorators_benchmark import benchmark, format_time
+from decorators_memoize import memoize
+from decorators_resilience import circuit_breaker, retry, timeout
+
+
+def median(label: str, func, *args, **kwargs) -> float:
+    """Median time of func(*args, **kwargs), after printing the report of `benchmark`."""
+    measured = benchmark(name=label, repeat=5, trace_memory=False)(func)
+    measured(*args, **kwargs)
+    return measured.stats["median"]
+
+
+def benchmark_memoize():
+    print("=== memoize: cost of a cache hit against the uncached call\n")
+
+    def add(a, b=2):
+        return a + b
+
+    def catalog_lookup(isbn, fields=("title",)):
+        # An expensive pure function: ~50 us of work
+        return sum(hash((isbn, field, i)) for field in fields for i in range(500))
+
+    plain = median("add, uncached", add, 1, 2)
+    results = {
+        "add, functools.lru_cache hit": median("add, functools.lru_cache hit", functools.lru_cache(128)(add), 1, 2),
+        "add, memoize hit (positional)": median("add, memoize hit (positional)", memoize(128)(add), 1, 2),
+        "add, memoize hit (keyword)": median("add, memoize hit (keyword)", memoize(128)(add), 1, b=2),
+        "add, memoize hit with ttl": median("add, memoize hit with ttl", memoize(128, ttl=60)(add), 1, 2),
+    }
+    lookup = median("catalog_lookup, uncached", catalog_lookup, "978-0132350884")
+    cached_lookup = median("catalog_lookup, memoize hit", memoize(128)(catalog_lookup), "978-0132350884")
+
+    print(f"\n  {'call':<32} {'median':>10} {'overhead':>10}")
+    print(f"  {'add, uncached':<32} {format_time(plain):>10}")
+    for label, seconds in results.items():
+        print(f"  {label:<32} {format_time(seconds):>10} {format_time(seconds - plain):>10}")
+    print(f"  {'catalog_lookup, uncached':<32} {format_time(lookup):>10}")
+    print(f"  {'catalog_lookup, memoize hit':<32} {format_time(cached_lookup):>10}"
+          f" {lookup / cached_lookup:9.0f}x faster")
+
+    # Same missing result requested by many threads at once: computed once
+    calls = []
+
+    @memoize(maxsize=None)
+    def slow(key):
+        calls.append(key)
+        time.sleep(0.05)
+        return key
+
+    threads = [threading.Thread(target=slow, args=("same key",)) for _ in range(32)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f"\n  32 threads, one missing key: {len(calls)} computation in"
+          f" {format_time(time.perf_counter() - start)}, {slow.cache_info()['waits']} threads waited")
+
+
+def benchmark_resilience():
+    print("\n=== retry, timeout, circuit_breaker: cost of a call that succeeds\n")
+
+    def read(path):
+        return path
+
+    plain = median("read, no decorator", read, "settings.ini")
+    stacked = timeout(1)(circuit_breaker()(retry((OSError,))(read)))
+    results = {
+        "read, retry": median("read, retry", retry((OSError,))(read), "settings.ini"),
+        "read, circuit_breaker": median("read, circuit_breaker", circuit_breaker()(read), "settings.ini"),
+        "read, timeout": median("read, timeout", timeout(1)(read), "settings.ini"),
+        "read, timeout(interrupt=True)": median("read, timeout(interrupt=True)",
+                                                timeout(1, interrupt=True)(read), "settings.ini"),
+        "read, all three": median("read, all three", stacked, "settings.ini"),
+    }
+    print(f"\n  {'call':<32} {'median':>10} {'overhead':>10}")
+    print(f"  {'read, no decorator':<32} {format_time(plain):>10}")
+    for label, seconds in results.items():
+        print(f"  {label:<32} {format_time(seconds):>10} {format_time(seconds - plain):>10}")
+
+    # A service failing 30% of the time: retries hide the failures, a circuit breaker stops the calls
+    # when it is down
+    def flaky(path):
+        if random.random() < 0.3:
+            raise ConnectionError("Connection reset")
+        return path
+
+    flaky_read = retry((ConnectionError,), attempts=4, base_delay=0.0001)(flaky)
+    failures = 0
+    for _ in range(10_000):
+        try:
+            flaky_read("settings.ini")
+        except ConnectionError:
+            failures += 1
+    print(f"\n  10,000 calls failing 30% of the time, 4 attempts: {failures} failures left"
+          f" (0.3^4 = 0.8% expected), metrics {flaky_read.metrics}")
+
+
+if __name__ == "__main__":
+    benchmark_memoize()
+    benchmark_resilience()
@@ -0,0 +1,110 @@
+"""
+Startup cost of document creators: eager imports against CreatorRegistry (see factory.py).
+
+For every number of formats, a temporary directory gets one plugin module
+per format, each with a slow import (standing for its heavy dependencies),
+and an installed-package entry (.dist-info) declaring them as entry points.
+Each measure runs in a new interpreter, so nothing is imported already.
+
+Usage:
+    python benchmark_factory.py
+    python benchmark_factory.py --formats 10 100 1000 --import-ms 1
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+GROUP = "document_creators"
+
+PLUGIN = '''import time
+_start = time.perf_counter()
+while time.perf_counter() - _start < {import_seconds}:
+    pass  # Heavy dependencies being imported
+
+
+class Document{i}:
+    def open(self): print("Opening format {i} Document")
+
+
+class Creator{i}:
+    def factory_method(self):
+        return Document{i}()
+'''
+
+MEASURE = '''import contextlib, io, json, sys, time
+sys.path.insert(0, {directory!r})
+sys.path.insert(0, {patterns!r})
+with contextlib.redirect_stdout(io.StringIO()):
+    from factory import CreatorRegistry
+import importlib
+n_formats, results = {n_formats}, {{}}
+
+start = time.perf_counter()
+if {eager}:
+    # Every creator imported up front, as with the if/elif of create_document_no_factory
+    creators = {{f"format{{i}}": getattr(importlib.import_module(f"doc_plugin_{{i}}"), f"Creator{{i}}")
+                for i in range(n_formats)}}
+    results["startup"] = time.perf_counter() - start
+    start = time.perf_counter()
+    creators["format0"]().factory_method()
+    results["first use"] = time.perf_counter() - start
+else:
+    registry = CreatorRegistry({group!r})
+    registry.discover()
+    results["startup"] = time.perf_counter() - start
+    assert len(registry.types()) == n_formats
+    start = time.perf_counter()
+    registry.create("format0")
+    results["first use"] = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(100_000):
+        registry.get("format0")
+    results["cached get"] = (time.perf_counter() - start) / 100_000
+results["modules imported"] = sum(name.startswith("doc_plugin_") for name in sys.modules)
+print(json.dumps(results))
+'''
+
+
+def write_plugins(directory: str, n_formats: int, import_seconds: float):
+    """Plugin modules and the .dist-info that declares them as entry points."""
+    for i in range(n_formats):
+        with open(os.path.join(directory, f"doc_plugin_{i}.py"), "w") as file:
+            file.write(PLUGIN.format(i=i, import_seconds=import_seconds))
+    dist_info = os.path.join(directory, "doc_plugins-1.0.dist-info")
+    os.mkdir(dist_info)
+    with open(os.path.join(dist_info, "METADATA"), "w") as file:
+        file.write("Metadata-Version: 2.1\nName: doc-plugins\nVersion: 1.0\n")
+    with open(os.path.join(dist_info, "entry_points.txt"), "w") as file:
+        file.write(f"[{GROUP}]\n" + "".join(f"format{i} = doc_plugin_{i}:Creator{i}\n" for i in range(n_formats)))
+
+
+def measure(directory: str, n_formats: int, eager: bool) -> dict:
+    code = MEASURE.format(directory=directory, patterns=os.path.dirname(os.path.abspath(__file__)),
+                          n_formats=n_formats, eager=eager, group=GROUP)
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+
+def benchmark(format_counts, import_ms: float):
+    print(f"Each plugin takes {import_ms} ms to import")
+    print(f"  {'formats':>8} {'eager startup':>14} {'lazy startup':>13} {'lazy first use':>15}"
+          f" {'cached get':>11} {'imported (eager/lazy)':>22}")
+    for n_formats in format_counts:
+        with tempfile.TemporaryDirectory() as directory:
+            write_plugins(directory, n_formats, import_ms / 1000)
+            eager = measure(directory, n_formats, eager=True)
+            lazy = measure(directory, n_formats, eager=False)
+        print(f"  {n_formats:>8} {eager['startup'] * 1e3:11.1f} ms {lazy['startup'] * 1e3:10.1f} ms"
+              f" {lazy['first use'] * 1e3:12.1f} ms {lazy['cached get'] * 1e6:8.2f} us"
+              f" {eager['modules imported']:>14} / {lazy['modules imported']}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--formats', type=int, nargs='*', default=[10, 50, 200])
+    parser.add_argument('--import-ms', type=float, default=5)
+    args = parser.parse_args()
+    benchmark(args.formats, args.import_ms)
@@ -28,6 +28,8 @@ print("\n--- Using the Builder Pattern ---")
 
 # --- Product ---
 class Burger:
+    __slots__ = ('bun', 'patty', 'cheese', 'tomato') # No per-burger __dict__: smaller and faster to copy
+
     def __init__(self):
         self.bun = None
         self.patty = None
@@ -38,25 +40,56 @@ class Burger:
         ingredients = filter(None, [self.bun, self.patty, self.cheese])
         return f"Burger with: {' + '.join(ingredients)}"
 
+# --- Shared product ---
+class SharedBurger(Burger):
+    """A burger handed out to many orders at once (see BurgerPrototypes): it cannot be modified."""
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError("A shared burger cannot be modified, use BurgerBuilder().take_burger() on it")
+
+    def __delattr__(self, name):
+        # Without this, `del` would empty the slot of the prototype every order shares
+        raise AttributeError("A shared burger cannot be modified, use BurgerBuilder().take_burger() on it")
+
+def share(burger):
+    """Read-only version of a burger, without running __init__ or the setters again."""
+    shared = SharedBurger.__new__(SharedBurger)
+    for name in Burger.__slots__:
+        object.__setattr__(shared, name, getattr(burger, name))
+    return shared
+
+def unshare(burger):
+    """Modifiable copy of a (shared) burger."""
+    copy = Burger.__new__(Burger)
+    copy.bun, copy.patty, copy.cheese, copy.tomato = burger.bun, burger.patty, burger.cheese, burger.tomato
+    return copy
+
 # --- Builder ---
 class BurgerBuilder:
     def __init__(self):
         self._burger = Burger()
 
+    def _writable(self):
+        # Copy-on-write: a shared burger is copied on its first modification only
+        if type(self._burger) is SharedBurger:
+            self._burger = unshare(self._burger)
+        return self._burger
+
     def add_bun(self, bun_type):
-        self._burger.bun = bun_type
+        self._writable().bun = bun_type
         return self # Allows chaining
 
     def add_patty(self, patty_type):
-        self._burger.patty = patty_type
+        self._writable().patty = patty_type
         return self
 
     def add_cheese(self, cheese_type):
-        self._burger.cheese = cheese_type
+        self._writable().cheese = cheese_type
         return self
     
     def add_tomato(self):
-        self._burger.tomato = True
+        self._writable().tomato = True
         return self
 
     def build(self):
@@ -80,4 +113,66 @@ simple_burger = BurgerBuilder().add_bun("Plain Bun").add_patty("Chicken Patty").
 print(simple_burger) 
 # print("Excuse, I forgot to order tomato")
 # modified_burger = BurgerBuilder().take_burger(simple_burger).add_tomato()
-# print("This order has been modified")
\ No newline at end of file
+# print("This order has been modified")
+
+print("\n--- Using Prototypes ---")
+
+# --- Prototype registry ---
+class BurgerPrototypes:
+    """
+    Burgers already built, keyed by their ingredients.
+
+    Most orders are one of a few configurations: the first order of a
+    configuration runs the builder, the next ones get the same SharedBurger
+    back. Modifying an order goes through take_burger, which copies the shared
+    burger on its first change and leaves the prototype untouched.
+    """
+
+    def __init__(self):
+        self._prototypes = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._prototypes)
+
+    def order(self, bun=None, patty=None, cheese=None, tomato=None) -> SharedBurger:
+        """Shared burger with these ingredients."""
+        key = (bun, patty, cheese, tomato)
+        burger = self._prototypes.get(key)
+        if burger is not None:
+            self.hits += 1
+            return burger
+        self.misses += 1
+        builder = BurgerBuilder()
+        if bun is not None:
+            builder.add_bun(bun)
+        if patty is not None:
+            builder.add_patty(patty)
+        if cheese is not None:
+            builder.add_cheese(cheese)
+        if tomato:
+            builder.add_tomato()
+        burger = self._prototypes[key] = share(builder.build())
+        return burger
+
+    def order_copy(self, bun=None, patty=None, cheese=None, tomato=None) -> Burger:
+        """Modifiable burger with these ingredients: a copy of the shared one."""
+        return unshare(self.order(bun, patty, cheese, tomato))
+
+# --- Client Code ---
+prototypes = BurgerPrototypes()
+first_order = prototypes.order(bun="Sesame Bun", patty="Beef Patty", cheese="Cheddar Cheese")
+second_order = prototypes.order(bun="Sesame Bun", patty="Beef Patty", cheese="Cheddar Cheese")
+print(first_order)
+print(first_order is second_order) # Same instance: built only once
+
+print("Excuse, I forgot to order tomato")
+modified_burger = BurgerBuilder().take_burger(second_order).add_tomato().build()
+print(modified_burger.tomato, first_order.tomato) # The shared burger is not modified
+
+try:
+    del second_order.bun # Removing an ingredient is a modification too
+except AttributeError as error:
+    print(error)
+print(first_order.bun) # Still there
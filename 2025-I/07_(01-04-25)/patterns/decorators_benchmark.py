@@ -0,0 +1,174 @@
+### Decorator that takes arguments, to measure performance
+# Same idea as `repeat` (decorators_with_deco_args.py): the decorated function is called many times,
+# but the wrapper times the calls instead of printing them:
+#   - warmup calls first (caches, lazy imports, ...), not measured;
+#   - the number of calls per sample is calibrated so that a sample lasts long enough for the clock;
+#   - the garbage collector is disabled while timing, so a collection does not land in one sample;
+#   - min / median / p95 time per call over the samples;
+#   - memory allocated by one call, with tracemalloc (in a separate call: tracing slows everything down);
+#   - comparison with the results saved in a baseline file (JSON).
+import functools
+import gc
+import json
+import math
+import os
+import statistics
+import time
+import tracemalloc
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.1f} ns"
+
+
+def format_bytes(size: float) -> str:
+    for unit, scale in (("MB", 1 << 20), ("KB", 1 << 10)):
+        if abs(size) >= scale:
+            return f"{size / scale:.1f} {unit}"
+    return f"{size:.0f} B"
+
+
+def calibrate(call, min_sample_time: float) -> int:
+    """Smallest number of calls in 1, 2, 5, 10, 20, 50... lasting at least `min_sample_time`."""
+    number = 1
+    while True:
+        for multiple in (1, 2, 5):
+            start = time.perf_counter()
+            for _ in range(number * multiple):
+                call()
+            if time.perf_counter() - start >= min_sample_time:
+                return number * multiple
+        number *= 10
+
+
+def percentile(samples, fraction: float) -> float:
+    """Nearest-rank percentile of sorted samples."""
+    return samples[max(0, math.ceil(fraction * len(samples)) - 1)]
+
+
+def load_baseline(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_baseline(path: str, name: str, stats: dict):
+    baseline = load_baseline(path)
+    baseline[name] = {key: stats[key] for key in ("min", "median", "p95", "peak_bytes")}
+    temporary = path + ".tmp"
+    with open(temporary, "w") as file:
+        json.dump(baseline, file, indent=2, sort_keys=True)
+    os.replace(temporary, path)
+
+
+def benchmark(repeat=7, warmup=3, number=None, min_sample_time=0.02, disable_gc=True, trace_memory=True,
+              baseline=None, update_baseline=False, tolerance=0.1, name=None):
+    """
+    Decorator factory: creates a decorator that measures a function each time it is called.
+
+    Args:
+        repeat (int): Timed samples.
+        warmup (int): Calls before timing, not measured.
+        number (int): Calls per sample; calibrated with `min_sample_time` if None.
+        min_sample_time (float): Shortest duration of a sample in seconds, for the calibration.
+        disable_gc (bool): Disable the garbage collector while timing.
+        trace_memory (bool): Measure the memory allocated by one call with tracemalloc.
+        baseline (str): JSON file of previous results to compare with; a missing entry is added.
+        update_baseline (bool): Replace the entry of the function with the new results.
+        tolerance (float): Median slowdown over the baseline reported as a regression (0.1: 10%).
+        name (str): Name in the report and the baseline; the function's qualified name by default.
+
+    The wrapper returns the result of the last call, like `repeat`, and keeps
+    the statistics of its last run in `wrapper.stats`.
+    """
+    def decorator_benchmark(func):
+        """The actual decorator returned by the factory."""
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            """The final wrapper executing the measurement."""
+            def call():
+                return func(*args, **kwargs)
+
+            result = None
+            for _ in range(warmup):
+                result = call()
+            calls = number or calibrate(call, min_sample_time)
+
+            samples = []
+            gc_was_enabled = gc.isenabled()
+            gc.collect()
+            if disable_gc:
+                gc.disable()
+            try:
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    for _ in range(calls):
+                        result = call()
+                    samples.append((time.perf_counter() - start) / calls)
+            finally:
+                if gc_was_enabled:
+                    gc.enable()
+            samples.sort()
+            stats = {"name": label, "repeat": repeat, "number": calls, "min": samples[0],
+                     "median": statistics.median(samples), "p95": percentile(samples, 0.95),
+                     "peak_bytes": None, "retained_bytes": None}
+
+            print(f"Benchmark '{label}': {repeat} x {calls:,} calls, {warmup} warmup")
+            print(f"  min {format_time(stats['min'])}  median {format_time(stats['median'])}"
+                  f"  p95 {format_time(stats['p95'])}")
+            if trace_memory:
+                already_tracing = tracemalloc.is_tracing()
+                if not already_tracing:
+                    tracemalloc.start()
+                before, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                result = call()
+                after, peak = tracemalloc.get_traced_memory()
+                if not already_tracing:
+                    tracemalloc.stop()
+                stats["peak_bytes"], stats["retained_bytes"] = peak - before, after - before
+                print(f"  memory per call: peak {format_bytes(stats['peak_bytes'])},"
+                      f" retained {format_bytes(stats['retained_bytes'])}")
+
+            if baseline is not None:
+                previous = load_baseline(baseline).get(label)
+                if previous is None or update_baseline:
+                    save_baseline(baseline, label, stats)
+                    print(f"  baseline saved to {baseline}")
+                else:
+                    change = stats["median"] / previous["median"] - 1
+                    verdict = "REGRESSION" if change > tolerance else "ok"
+                    print(f"  baseline median {format_time(previous['median'])}: {change:+.1%} ({verdict})")
+                    stats["baseline_change"] = change
+            wrapper.stats = stats
+            return result # Return the result of the last call
+        wrapper.stats = None
+        return wrapper
+    return decorator_benchmark # Return the decorator
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    baseline_file = os.path.join(tempfile.gettempdir(), "decorators_benchmark_baseline.json")
+
+    @benchmark(baseline=baseline_file)
+    def join_squares(n):
+        """Builds a string of n squares."""
+        return ",".join(str(i * i) for i in range(n))
+
+    # Calling the decorated function measures it (the first run saves the baseline, the next ones compare)
+    print("Calling join_squares:")
+    result = join_squares(1_000)
+    print(f"Final returned value: {result[:30]}...")
+    print(f"Median: {format_time(join_squares.stats['median'])}")
+
+    # Inspecting the function name (kept by functools.wraps)
+    print("\nInspecting the function name:")
+    print(join_squares.__name__)
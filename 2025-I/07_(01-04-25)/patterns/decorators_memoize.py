@@ -0,0 +1,200 @@
+### Decorator with args and kwargs, that remembers results
+# Same wrapper(*args, **kwargs) as decorators_with_args_kwargs.py, but the wrapper first looks for the
+# result of a previous call with the same arguments:
+#   - arguments are normalized: f(1, 2), f(1, b=2), f(a=1, b=2) and f(1) (if b defaults to 2) share one entry;
+#   - at most `maxsize` results per function, the least recently used one is evicted first (LRU);
+#   - optionally, results expire `ttl` seconds after they were computed;
+#   - one lock per function, so it can be called from several threads;
+#   - if several threads ask for the same missing result at once, one computes it and the others wait
+#     for it instead of computing it again;
+#   - wrapper.cache_info() gives hits, misses, evictions...
+# Only use it for pure functions: the cached result is returned without calling the function.
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+
+_KEYWORDS = object()  # Separates positional and keyword arguments in keys
+
+
+class _Call:
+    """A computation in progress, that other threads can wait for."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def make_key_function(func):
+    """
+    Returns key(args, kwargs): the same hashable key for every way of passing the same arguments.
+
+    key.arity is the number of arguments for which `args` alone is already the
+    key, when they are all given by position; None if there is no such case.
+    """
+    signature = inspect.signature(func)
+    parameters = list(signature.parameters.values())
+    positional = (inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.POSITIONAL_ONLY)
+    if all(parameter.kind in positional for parameter in parameters):
+        # Usual case: the key is the tuple of all the arguments in order, defaults included
+        names = [parameter.name for parameter in parameters
+                 if parameter.kind == inspect.Parameter.POSITIONAL_OR_KEYWORD]
+        first_keyword = len(parameters) - len(names)
+        defaults = {parameter.name: parameter.default for parameter in parameters
+                    if parameter.default is not inspect.Parameter.empty}
+        missing = object()
+
+        def key(args, kwargs):
+            if len(args) < first_keyword or len(args) > len(parameters):
+                return general_key(args, kwargs)  # Raises the TypeError of the call
+            values = list(args)
+            used = 0
+            for name in names[len(args) - first_keyword:]:
+                value = kwargs.get(name, missing)
+                if value is missing:
+                    value = defaults.get(name, missing)
+                    if value is missing:
+                        return general_key(args, kwargs)
+                else:
+                    used += 1
+                values.append(value)
+            if used != len(kwargs):
+                return general_key(args, kwargs)  # Unknown or repeated keyword
+            return tuple(values)
+        key.arity = len(parameters)
+    else:
+        key = None
+
+    def general_key(args, kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        if bound.kwargs:
+            return bound.args + (_KEYWORDS,) + tuple(sorted(bound.kwargs.items()))
+        return bound.args
+    general_key.arity = None
+
+    return key or general_key
+
+
+def memoize(maxsize=128, ttl=None):
+    """
+    Decorator factory: creates a decorator that caches the results of a function.
+
+    Args:
+        maxsize (int): Results kept for this function; None for no limit.
+        ttl (float): Seconds a result stays valid; None for ever.
+    """
+    def decorator_memoize(func):
+        """The actual decorator returned by the factory."""
+        make_key = make_key_function(func)
+        arity = make_key.arity
+        cache = OrderedDict()   # key -> (result, expiry time)
+        cache_get, move_to_end = cache.get, cache.move_to_end
+        pending = {}            # key -> _Call being computed
+        lock = threading.Lock()
+        stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "waits": 0}
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            """The final wrapper: cached result, or one computation for all the threads asking for it."""
+            # All the arguments given by position: usually already the key (see make_key_function)
+            key = args if not kwargs and len(args) == arity else make_key(args, kwargs)
+            # acquire/release: `with lock` costs about as much as the rest of a cache hit
+            lock.acquire()
+            try:
+                entry = cache_get(key)
+                if entry is not None:
+                    if ttl is None or entry[1] > time.monotonic():
+                        move_to_end(key)
+                        stats["hits"] += 1
+                        return entry[0]
+                    del cache[key]
+                    stats["expirations"] += 1
+                call = pending.get(key)
+                if call is None:
+                    call = pending[key] = _Call()
+                    owner = True
+                    stats["misses"] += 1
+                else:
+                    owner = False
+                    stats["waits"] += 1
+            finally:
+                lock.release()
+
+            if not owner:
+                call.done.wait()
+                if call.error is not None:
+                    raise call.error
+                return call.result
+
+            try:
+                call.result = func(*args, **kwargs)
+            except BaseException as error:
+                call.error = error  # Not cached: the next call tries again
+                raise
+            finally:
+                with lock:
+                    del pending[key]
+                    if call.error is None:
+                        cache[key] = (call.result, None if ttl is None else time.monotonic() + ttl)
+                        if maxsize is not None and len(cache) > maxsize:
+                            cache.popitem(last=False)
+                            stats["evictions"] += 1
+                call.done.set()
+            return call.result
+
+        def cache_info():
+            with lock:
+                return dict(stats, size=len(cache), maxsize=maxsize, ttl=ttl)
+
+        def cache_clear():
+            with lock:
+                cache.clear()
+                for name in stats:
+                    stats[name] = 0
+
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    return decorator_memoize # Return the decorator
+
+
+def lru_cache(maxsize=128):
+    """Results of the last `maxsize` different calls."""
+    return memoize(maxsize=maxsize)
+
+
+def ttl_cache(ttl, maxsize=128):
+    """Results of the last `maxsize` different calls, for `ttl` seconds each."""
+    return memoize(maxsize=maxsize, ttl=ttl)
+
+
+if __name__ == "__main__":
+    @memoize(maxsize=2)
+    def price(product, quantity=1, discount=0.0):
+        """An expensive pricing rule."""
+        print(f"  Computing price of {quantity} x {product}")
+        time.sleep(0.1)
+        return round(10.0 * quantity * (1 - discount), 2)
+
+    print("Calling price:")
+    print(price("apple", 3))
+    print(price("apple", quantity=3))            # Same arguments: cached
+    print(price(product="apple", quantity=3, discount=0.0))
+    print(price("pear"))
+    print(price("plum"))                         # Evicts apple, the least recently used
+    print(price.cache_info())
+
+    print("\nEight threads asking for the same new price:")
+    threads = [threading.Thread(target=price, args=("kiwi", 5)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(price.cache_info())
+
+    # Inspecting the function name (kept by functools.wraps)
+    print("\nInspecting the function name:")
+    print(price.__name__)
@@ -0,0 +1,320 @@
+### Decorators that handle errors for us
+# basic_error_handling.py, specific_error_catching.py and error_handling_else.py catch an exception and
+# print it. Network and file calls also fail for a moment (a timeout, a busy server...) and often work
+# on a second try. These decorators take care of it, for normal and for async functions:
+#   - retry: calls the function again after some exceptions only, waiting longer each time
+#     (exponential backoff) and a random part of it (jitter), so that many clients do not retry together;
+#   - timeout: a deadline for the call; retries and nested calls inside it never wait past it;
+#   - circuit_breaker: after several failures in a row, fails at once without calling the function
+#     for a while, instead of making every caller wait for a service that is down.
+# Each decorated function counts what happened (retries, open circuits...): see export_metrics().
+import asyncio
+import contextvars
+import functools
+import inspect
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+_deadline = contextvars.ContextVar("deadline", default=None)  # time.monotonic() value, or None
+_metrics = {}  # "decorator:module.function" -> metrics dict of a decorated function
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a function whose circuit is open."""
+
+
+def remaining_time():
+    """Seconds left before the deadline of the current call (see timeout), or None without deadline."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def export_metrics() -> dict:
+    """
+    Metrics of every decorated function, by "decorator:module.function" name.
+
+    The counters of retry and timeout are not locked, to keep the calls cheap:
+    with many threads they can miss a few increments.
+    """
+    return {name: dict(metrics) for name, metrics in _metrics.items()}
+
+
+def _register(kind, func, **metrics):
+    # With the module, functions of the same name in different modules keep their own counters
+    metrics = _metrics[f"{kind}:{func.__module__}.{func.__qualname__}"] = metrics
+    return metrics
+
+
+def retry(exceptions=(Exception,), attempts=3, base_delay=0.1, max_delay=5.0, multiplier=2.0,
+          give_up_on=()):
+    """
+    Decorator factory: calls the function again when it raises one of `exceptions`.
+
+    Args:
+        exceptions (tuple): Exception classes worth retrying (e.g. ConnectionError, TimeoutError).
+        attempts (int): Calls at most, the first one included.
+        base_delay (float): Longest wait in seconds before the first retry; it is multiplied by
+            `multiplier` at every retry, up to `max_delay`. The actual wait is random between 0 and
+            that value ("full jitter").
+        give_up_on (tuple): Subclasses of `exceptions` that are raised at once.
+
+    The last exception is raised if every attempt fails, or if the next wait
+    would end after the deadline of an enclosing `timeout`.
+    """
+    def decorator_retry(func):
+        metrics = _register("retry", func, calls=0, retries=0, recovered=0, gave_up=0)
+
+        def delay_or_raise(error, attempt):
+            """Seconds to wait before the next attempt; raises `error` if there should be none."""
+            if not isinstance(error, exceptions) or isinstance(error, give_up_on) or attempt + 1 >= attempts:
+                if isinstance(error, exceptions):
+                    metrics["gave_up"] += 1
+                raise error
+            delay = random.uniform(0, min(max_delay, base_delay * multiplier ** attempt))
+            left = remaining_time()
+            if left is not None and delay >= left:
+                metrics["gave_up"] += 1
+                raise error
+            metrics["retries"] += 1
+            return delay
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                metrics["calls"] += 1
+                for attempt in range(attempts):
+                    try:
+                        result = await func(*args, **kwargs)
+                    except BaseException as error:
+                        await asyncio.sleep(delay_or_raise(error, attempt))
+                    else:
+                        if attempt:
+                            metrics["recovered"] += 1
+                        return result
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                metrics["calls"] += 1
+                for attempt in range(attempts):
+                    try:
+                        result = func(*args, **kwargs)
+                    except BaseException as error:
+                        time.sleep(delay_or_raise(error, attempt))
+                    else:
+                        if attempt:
+                            metrics["recovered"] += 1
+                        return result
+        wrapper.metrics = metrics
+        return wrapper
+    return decorator_retry
+
+
+_executors = {}  # max_workers -> worker threads of timeout(interrupt=True), started on first use
+_executors_lock = threading.Lock()
+
+
+def _executor(max_workers):
+    """The pool of `max_workers` threads shared by the timeouts asking for that size."""
+    executor = _executors.get(max_workers)
+    if executor is None:
+        with _executors_lock:  # Two threads starting the first call must not both create a pool
+            executor = _executors.get(max_workers)
+            if executor is None:
+                executor = _executors[max_workers] = ThreadPoolExecutor(
+                    max_workers, thread_name_prefix=f"timeout-{max_workers}")
+    return executor
+
+
+def timeout(seconds, interrupt=False, max_workers=32):
+    """
+    Decorator factory: gives each call a deadline `seconds` from its start.
+
+    An async function is cancelled at the deadline, and TimeoutError is raised.
+    A normal function cannot be stopped from outside: by default it runs as
+    usual, but everything it calls (retry, nested timeouts, remaining_time())
+    knows the deadline. With `interrupt=True`, it runs in a worker thread
+    and the caller gets TimeoutError at the deadline (the call finishes in the
+    background); this costs a thread switch per call. The worker threads
+    come from a pool of `max_workers` threads, shared by every timeout
+    decorator with the same `max_workers`.
+
+    Deadlines nest: an inner timeout never extends the deadline of an outer one.
+    """
+    def decorator_timeout(func):
+        metrics = _register("timeout", func, calls=0, timeouts=0)
+
+        def start_deadline():
+            deadline = time.monotonic() + seconds
+            outer = _deadline.get()
+            if outer is not None and outer < deadline:
+                deadline = outer
+            if deadline <= time.monotonic():
+                metrics["timeouts"] += 1
+                raise TimeoutError(f"{func.__qualname__}: deadline already passed")
+            return deadline, _deadline.set(deadline)
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                metrics["calls"] += 1
+                deadline, token = start_deadline()
+                try:
+                    return await asyncio.wait_for(func(*args, **kwargs), deadline - time.monotonic())
+                except TimeoutError:
+                    metrics["timeouts"] += 1
+                    raise
+                finally:
+                    _deadline.reset(token)
+        elif interrupt:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                metrics["calls"] += 1
+                deadline, token = start_deadline()
+                try:
+                    # The worker sees the same deadline through a copy of the context
+                    future = _executor(max_workers).submit(contextvars.copy_context().run, func, *args, **kwargs)
+                    try:
+                        return future.result(deadline - time.monotonic())
+                    except FutureTimeoutError:
+                        metrics["timeouts"] += 1
+                        raise TimeoutError(f"{func.__qualname__}: no result after {seconds} s") from None
+                finally:
+                    _deadline.reset(token)
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                metrics["calls"] += 1
+                deadline, token = start_deadline()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    _deadline.reset(token)
+        wrapper.metrics = metrics
+        return wrapper
+    return decorator_timeout
+
+
+def circuit_breaker(failure_threshold=5, reset_timeout=30.0, exceptions=(Exception,)):
+    """
+    Decorator factory: stops calling a function that keeps failing.
+
+    Args:
+        failure_threshold (int): Failures in a row (of `exceptions` only) that open the circuit.
+        reset_timeout (float): Seconds the circuit stays open; then a single trial call is let
+            through ("half-open"): if it works the circuit closes; if it raises anything, even an
+            exception outside `exceptions`, it opens again.
+        exceptions (tuple): Exception classes that count as failures; others are only raised.
+
+    While the circuit is open, calls raise CircuitOpenError without calling the function.
+    """
+    def decorator_circuit_breaker(func):
+        metrics = _register("circuit_breaker", func, state="closed", calls=0, failures=0, opened=0, rejected=0)
+        lock = threading.Lock()
+        circuit = {"failures": 0, "opened_at": 0.0, "trial": False}
+
+        def before_call():
+            """Raises CircuitOpenError if the call should not go through."""
+            lock.acquire()
+            try:
+                metrics["calls"] += 1
+                if metrics["state"] == "closed":
+                    return
+                if metrics["state"] == "open" and time.monotonic() - circuit["opened_at"] >= reset_timeout:
+                    metrics["state"] = "half-open"
+                if metrics["state"] == "half-open" and not circuit["trial"]:
+                    circuit["trial"] = True  # This call is the trial
+                    return
+                metrics["rejected"] += 1
+                raise CircuitOpenError(f"{func.__qualname__}: circuit open after {circuit['failures']} failures")
+            finally:
+                lock.release()
+
+        def after_call(error):
+            if error is None and not circuit["failures"] and metrics["state"] == "closed":
+                return  # Usual case, nothing to change: no need to lock
+            lock.acquire()
+            try:
+                # During the half-open trial any exception (even CancelledError) is a failure:
+                # the service has not shown it works again
+                trial_failed = error is not None and metrics["state"] == "half-open"
+                if not trial_failed and (error is None or not isinstance(error, exceptions)):
+                    if metrics["state"] != "closed" or circuit["failures"]:
+                        metrics["state"], circuit["failures"], circuit["trial"] = "closed", 0, False
+                    return
+                metrics["failures"] += 1
+                circuit["failures"] += 1
+                if metrics["state"] == "half-open" or circuit["failures"] >= failure_threshold:
+                    if metrics["state"] != "open":
+                        metrics["opened"] += 1
+                    metrics["state"], circuit["opened_at"], circuit["trial"] = "open", time.monotonic(), False
+            finally:
+                lock.release()
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                before_call()
+                try:
+                    result = await func(*args, **kwargs)
+                except BaseException as error:
+                    after_call(error)
+                    raise
+                after_call(None)
+                return result
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                before_call()
+                try:
+                    result = func(*args, **kwargs)
+                except BaseException as error:
+                    after_call(error)
+                    raise
+                after_call(None)
+                return result
+        wrapper.metrics = metrics
+        return wrapper
+    return decorator_circuit_breaker
+
+
+if __name__ == "__main__":
+    failures_left = {"count": 2}
+
+    @retry(exceptions=(ConnectionError,), attempts=4, base_delay=0.01)
+    def fetch(url):
+        """Fails twice, then works."""
+        if failures_left["count"]:
+            failures_left["count"] -= 1
+            raise ConnectionError("Connection reset")
+        return f"Contents of {url}"
+
+    print("Calling fetch:")
+    print(fetch("http://example.com"))
+
+    @circuit_breaker(failure_threshold=3, reset_timeout=0.05)
+    def read_config(path):
+        raise OSError(f"Cannot read {path}")
+
+    print("\nCalling read_config 5 times:")
+    for _ in range(5):
+        try:
+            read_config("settings.ini")
+        except (OSError, CircuitOpenError) as error:
+            print(f"  {type(error).__name__}: {error}")
+
+    @timeout(0.05)
+    async def slow_query():
+        await asyncio.sleep(1)
+
+    print("\nCalling slow_query:")
+    try:
+        asyncio.run(slow_query())
+    except TimeoutError:
+        print("  TimeoutError")
+
+    print("\nMetrics:")
+    for name, metrics in export_metrics().items():
+        print(f"  {name}: {metrics}")
@@ -1,4 +1,6 @@
 import abc
+import importlib
+from importlib.metadata import entry_points
 
 class Document(abc.ABC):
     @abc.abstractmethod
@@ -65,3 +67,71 @@ print("#########Using factory pattern")
 client_code_factory(PdfCreator())
 client_code_factory(WordCreator())
 
+
+
+# USING A LAZY REGISTRY
+# With dozens of document types, importing every concrete creator up front (to put it in an if/elif
+# or a dict) means paying for all their dependencies at startup, even for the ones never used.
+# The registry below only keeps *where* each creator is ("module:Class"), from package entry points
+# or from register(), and imports a creator the first time its document type is requested.
+
+class CreatorRegistry:
+    """Document type -> DocumentCreator class, imported on first use and cached."""
+
+    def __init__(self, group: str = "document_creators"):
+        """
+        Args:
+            group (str): Entry point group where installed packages declare their creators, e.g. in
+                pyproject.toml: [project.entry-points.document_creators] odt = "odt_plugin:OdtCreator"
+        """
+        self.group = group
+        self._targets = {}    # doc_type -> creator class, "module:Class" or EntryPoint (not imported yet)
+        self._creators = {}   # doc_type -> creator class, once imported
+        self._discovered = False
+
+    def register(self, doc_type: str, creator):
+        """Adds a creator class, or its "module:Class" path to import it only when needed."""
+        self._targets[doc_type] = creator
+        self._creators.pop(doc_type, None)
+
+    def discover(self):
+        """Reads the entry points of installed packages; nothing is imported."""
+        for entry_point in entry_points(group=self.group):
+            self._targets.setdefault(entry_point.name, entry_point)
+        self._discovered = True
+
+    def types(self) -> list:
+        if not self._discovered:
+            self.discover()
+        return sorted(self._targets)
+
+    def get(self, doc_type: str) -> type:
+        """Creator class of a document type, imported the first time it is requested."""
+        creator = self._creators.get(doc_type)
+        if creator is not None:
+            return creator
+        if doc_type not in self._targets and not self._discovered:
+            self.discover()
+        target = self._targets.get(doc_type)
+        if target is None:
+            raise ValueError("Unknown document type")
+        if isinstance(target, str):
+            module, _, name = target.partition(":")
+            creator = getattr(importlib.import_module(module), name)
+        elif isinstance(target, type):
+            creator = target
+        else:
+            creator = target.load()  # EntryPoint
+        self._creators[doc_type] = creator
+        return creator
+
+    def create(self, doc_type: str) -> Document:
+        """Replaces create_document_no_factory: no if/elif and no import of unused creators."""
+        return self.get(doc_type)().factory_method()
+
+print("#########Using a lazy registry")
+registry = CreatorRegistry()
+registry.register("pdf", PdfCreator)
+registry.register("word", f"{__name__}:WordCreator") # Imported by get("word")
+client_code_factory(registry.get("pdf")())
+registry.create("word").open()
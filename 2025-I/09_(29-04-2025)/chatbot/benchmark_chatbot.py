@@ -0,0 +1,257 @@
+# benchmark_chatbot.py
+"""
+Benchmarks of the chatbot app against a fake Ollama server (see fake_ollama.py).
+
+Reruns are timed with Streamlit's AppTest, which runs main.py like a
+browser interaction would, without a browser.
+
+Usage:
+    python benchmark_chatbot.py
+    python benchmark_chatbot.py --reruns 200 --list-latency 0.05 --requests 500 --turns 100 --budget 1024 --rounds 20
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from fake_ollama import FakeOllama
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return statistics.median(samples), samples[int(0.95 * (len(samples) - 1))]
+
+
+def time_reruns(n_reruns):
+    """Milliseconds of every rerun of main.py."""
+    from streamlit.testing.v1 import AppTest
+    app = AppTest.from_file(os.path.join(HERE, "main.py"), default_timeout=30)
+    app.run()  # First run: imports and caches
+    samples = []
+    for _ in range(n_reruns):
+        start = time.perf_counter()
+        app.run()
+        samples.append((time.perf_counter() - start) * 1e3)
+    assert not app.exception, app.exception
+    return samples
+
+
+def chat_in_app(prompt, streaming=True):
+    """Sends one message in a new session of the app; returns (answer shown, response cache hit rate)."""
+    from streamlit.testing.v1 import AppTest
+    app = AppTest.from_file(os.path.join(HERE, "main.py"), default_timeout=30)
+    app.run()
+    app.sidebar.toggle(key="use_streaming").set_value(streaming)
+    app.chat_input[0].set_value(prompt).run()
+    assert not app.exception, app.exception
+    hit_rate = next(metric.value for metric in app.sidebar.get("metric") if metric.label == "Response cache hit rate")
+    return app.session_state["messages"][-1]["content"], hit_rate
+
+
+def benchmark_response_cache(server, n_requests, n_prompts=20, seed=0):
+    """Latency of repeated prompts through OllamaChatbot.get_response, without and with the response cache."""
+    import random
+    import chatbot
+    from response_cache import ResponseCache
+
+    print(f"\nResponse cache: {n_requests} requests over {n_prompts} different prompts"
+          f" ({server.answer_tokens} tokens per answer, {server.token_latency * 1e3:.0f} ms per token)")
+    rng = random.Random(seed)
+    prompts = [f"Tell me about treasure number {rng.randrange(n_prompts)}" for _ in range(n_requests)]
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ResponseCache(os.path.join(directory, "responses.sqlite3"))
+        bot = chatbot.OllamaChatbot(cache=cache)
+        model = bot.available_models[0]
+        answers = {}
+        latencies = {"miss": [], "hit": []}
+        for prompt in prompts:
+            messages = [{"role": "user", "content": prompt}]
+            hits = cache.hits
+            start = time.perf_counter()
+            pieces = [chunk["message"]["content"] for chunk in bot.get_response(model, messages, stream=True)]
+            latencies["hit" if cache.hits > hits else "miss"].append((time.perf_counter() - start) * 1e3)
+            # A replayed answer comes in the same pieces as the first one
+            assert answers.setdefault(prompt, pieces) == pieces
+        for outcome, samples in latencies.items():
+            median, p95 = percentiles(samples)
+            print(f"  {outcome:<42} {median:8.2f} ms {p95:8.2f} ms {len(samples):>6} requests")
+        print(f"  {'hit rate':<42} {cache.hit_rate():8.1%}, {cache.size / 1e3:.1f} kB on disk")
+
+        # Bounded size: the least recently used answers go first
+        small = ResponseCache(os.path.join(directory, "small.sqlite3"), max_bytes=4_000)
+        for i in range(50):
+            small.put(f"key {i}", model, [f"answer {i} " * 20])
+        assert small.size <= 4_000 and small.get("key 49") is not None and small.get("key 0") is None
+        print(f"  {'4 kB cache after 50 answers':<42} {len(small)} kept, {small.evictions} evicted")
+
+        # In the app: the cached answer is shown exactly like the first one, streamed or not
+        os.environ["OLLAMA_CHATBOT_CACHE"] = os.path.join(directory, "app.sqlite3")
+        chatbot.get_response_cache.clear()
+        first, _ = chat_in_app("What be the best ship?")
+        second, hit_rate = chat_in_app("What be the best ship?")
+        third, _ = chat_in_app("What be the best ship?", streaming=False)
+        assert first == second == third
+        print(f"  {'app: same answer shown from the cache':<42} sidebar hit rate {hit_rate}")
+        chatbot.get_response_cache.clear()  # Close the file before the directory goes away
+
+
+def benchmark_context_window(server, n_turns, budget, seed=0):
+    """Prompt size and time to first token along a long chat, sending the whole history or a ContextWindow."""
+    import random
+    import chatbot
+    from context_window import ContextWindow
+
+    token_latency, server.token_latency = server.token_latency, 0.001  # Only the first token matters here
+    rng = random.Random(seed)
+    words = "ship sail treasure island map gold rum captain crew storm harbour cannon parrot compass".split()
+    questions = [" ".join(rng.choice(words) for _ in range(40)) + "?" for _ in range(n_turns)]
+    bot = chatbot.OllamaChatbot(cache=False)  # Every answer from the model
+    model = bot.available_models[0]
+    system = {"role": "system", "content": "You are pirate assistant."}
+
+    print(f"\nContext window: {n_turns} turns, budget {budget} tokens,"
+          f" {server.prompt_latency * 1e3:.2f} ms per prompt token")
+    print(f"  {'':<42} {'prompt tokens':>14} {'TTFT':>9} {'last TTFT':>10} {'summaries':>10}")
+    for label, window in (("whole history (before)", None),
+                          ("ContextWindow", ContextWindow(budget, lambda summary, messages: bot.summarize(
+                              model, summary, messages)))):
+        history = [system]
+        prompt_tokens, ttfts, summary_time = [], [], 0.0
+        for question in questions:
+            history.append({"role": "user", "content": question})
+            start = time.perf_counter()  # The summaries made on this turn are waited for too
+            messages = history if window is None else window.messages(history)
+            summary_time += time.perf_counter() - start
+            pieces, ttft = [], None
+            for chunk in bot.get_response(model, messages, stream=True):
+                if ttft is None and chunk["message"]["content"]:
+                    ttft = (time.perf_counter() - start) * 1e3
+                pieces.append(chunk["message"]["content"])
+                if chunk.get("done"):
+                    prompt_tokens.append(chunk["prompt_eval_count"])
+            ttfts.append(ttft)
+            history.append({"role": "assistant", "content": "".join(pieces)})
+        summaries = "" if window is None else f"{window.stats['summaries']} ({summary_time:.2f} s)"
+        print(f"  {label:<42} {sum(prompt_tokens):>14,} {statistics.mean(ttfts):6.1f} ms {ttfts[-1]:7.1f} ms"
+              f" {summaries:>10}")
+        if window is not None:
+            assert all(tokens <= budget for tokens in prompt_tokens[1:])  # Server count, close to the estimate
+    server.token_latency = token_latency
+
+
+def benchmark_fan_out(server, n_rounds, deadline=0.7):
+    """Comparing the models one after the other (before), or all at once with fan_out, with and without deadline."""
+    import chatbot
+    from fan_out import compare
+    from streamlit.testing.v1 import AppTest
+
+    bot = chatbot.OllamaChatbot(cache=False)
+    models = bot.available_models
+    # Models of different speeds: the last one is the slowest
+    server.model_token_latency = {model: server.token_latency * (1 + 1.5 * i) for i, model in enumerate(models)}
+    messages = [{"role": "system", "content": "You are pirate assistant."},
+                {"role": "user", "content": "Which one of ye is the fastest pirate?"}]
+
+    print(f"\nCompare {len(models)} models, {server.answer_tokens} tokens per answer,"
+          f" {', '.join(f'{latency * 1e3:.0f}' for latency in server.model_token_latency.values())} ms per token")
+    print(f"  {'':<42} {'median':>9} {'p95':>9}")
+    runs = {"one model after the other (before)": lambda: {model: "".join(
+                chunk["message"]["content"] for chunk in bot.get_response(model, messages, stream=True))
+                for model in models},
+            "fan_out": lambda: compare(models, messages),
+            f"fan_out, {deadline:.1f} s deadline": lambda: compare(models, messages, deadline=deadline)}
+    answers = {}
+    for label, run in runs.items():
+        samples = []
+        for _ in range(n_rounds):
+            start = time.perf_counter()
+            answers[label] = run()
+            samples.append((time.perf_counter() - start) * 1e3)
+        median, p95 = percentiles(samples)
+        print(f"  {label:<42} {median:6.0f} ms {p95:6.0f} ms")
+    # The same answers, concurrently; past the deadline, the slowest model is cut short
+    assert {model: answer.content for model, answer in answers["fan_out"].items()} == \
+        answers["one model after the other (before)"]
+    for model, answer in answers[f"fan_out, {deadline:.1f} s deadline"].items():
+        print(f"    {model:<40} {answer.status:<10} first token {answer.ttft * 1e3:5.1f} ms,"
+              f" {answer.tokens_per_second:5.1f} tokens/s, {answer.tokens:3d} tokens")
+
+    # In the app: one column per model, the answer of the selected one kept in the conversation
+    app = AppTest.from_file(os.path.join(HERE, "main.py"), default_timeout=30)
+    app.run()
+    app.sidebar.toggle(key="compare_mode").set_value(True).run()
+    app.chat_input[0].set_value("Which one of ye is the fastest pirate?").run()
+    assert not app.exception, app.exception
+    message = app.session_state["messages"][-1]
+    assert [answer["model"] for answer in message["comparison"]] == models
+    assert message["content"] == message["comparison"][0]["content"] and len(app.columns) == len(models)
+    print(f"  {'app: answers side by side':<42} {len(app.columns)} columns, captions:"
+          f" {' | '.join(caption.value for caption in app.caption[1:])}")
+    server.model_token_latency = {}
+
+
+def benchmark_reruns(server, n_reruns):
+    """Rerun latency when every rerun lists the models, as before, and with the shared ModelDiscovery."""
+    import chatbot
+    shared = chatbot.get_model_discovery
+
+    print(f"\nRerun latency, listing the models takes {server.list_latency * 1e3:.0f} ms")
+    print(f"  {'':<42} {'median':>9} {'p95':>9} {'list requests':>14}")
+    for label, discovery in (("list on every rerun (before)", lambda: chatbot.ModelDiscovery(ttl=0, background=False)),
+                             ("shared ModelDiscovery", shared)):
+        chatbot.get_model_discovery = discovery
+        requests = server.requests["tags"]
+        median, p95 = percentiles(time_reruns(n_reruns))
+        print(f"  {label:<42} {median:6.1f} ms {p95:6.1f} ms {server.requests['tags'] - requests:>14}")
+    chatbot.get_model_discovery = shared
+
+    # Server down: the reruns keep the models found before
+    discovery = shared()
+    discovery._next_refresh = 0  # Refresh now
+    server.available = False
+    median, p95 = percentiles(time_reruns(n_reruns))
+    models = discovery.models()
+    server.available = True
+    print(f"  {'shared ModelDiscovery, server down':<42} {median:6.1f} ms {p95:6.1f} ms"
+          f"   models kept: {models}, error: {type(discovery.last_error).__name__}")
+
+    # Server down before any list was found: only one rerun per retry_interval asks it
+    cold = chatbot.ModelDiscovery()
+    chatbot.get_model_discovery = lambda: cold
+    server.available = False
+    requests = server.requests["tags"]
+    median, p95 = percentiles(time_reruns(n_reruns))
+    server.available = True
+    chatbot.get_model_discovery = shared
+    print(f"  {'new ModelDiscovery, server down':<42} {median:6.1f} ms {p95:6.1f} ms"
+          f" {server.requests['tags'] - requests:>14}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reruns", type=int, default=100)
+    parser.add_argument("--list-latency", type=float, default=0.02)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=60)
+    parser.add_argument("--budget", type=int, default=1024)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+    # The cached functions of chatbot.py are also called outside of a rerun: no need to warn about it
+    # (a filter, because Streamlit sets the level of its loggers again when it loads its configuration)
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").addFilter(
+        lambda record: "missing ScriptRunContext" not in record.getMessage())
+
+    server = FakeOllama(list_latency=args.list_latency).start()
+    # The default ollama client reads OLLAMA_HOST when ollama is imported
+    os.environ["OLLAMA_HOST"] = server.host
+    sys.path.insert(0, HERE)
+    benchmark_reruns(server, args.reruns)
+    benchmark_response_cache(server, args.requests)
+    benchmark_context_window(server, args.turns, args.budget)
+    benchmark_fan_out(server, args.rounds)
+    server.stop()
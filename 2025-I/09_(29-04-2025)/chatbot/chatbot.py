@@ -1,26 +1,134 @@
 # chatbot.py
+import os
+import threading
+import time
+
 import ollama
 import streamlit as st
 
+from fan_out import compare
+from response_cache import ResponseCache, cache_key, record, replay
+
+SUMMARY_PROMPT = ("Summarize the conversation below in a few sentences, for the assistant to continue it. "
+                  "Keep names, facts, decisions and open questions; leave out greetings and repetitions.")
+
+
+class ModelDiscovery:
+    """
+    The list of models of the Ollama server, cached for the whole process.
+
+    Streamlit runs main.py again on every interaction, and asking Ollama for
+    its models every time adds a round-trip to each rerun. Here the list is
+    fetched once, and when it is older than `ttl` seconds it is refreshed in a
+    background thread while the reruns keep using the current one. If the
+    server does not answer, the last list found is kept (and the refresh is
+    tried again after `retry_interval` seconds).
+    """
+    def __init__(self, client=ollama, ttl=30.0, retry_interval=5.0, background=True):
+        """
+        Args:
+            client: Ollama client, or the ollama module for the default one.
+            ttl (float): Age in seconds after which the list is refreshed.
+            retry_interval (float): Seconds before trying again after a failed refresh.
+            background (bool): Refresh in a background thread; False refreshes while the caller waits.
+        """
+        self.client = client
+        self.ttl = ttl
+        self.retry_interval = retry_interval
+        self.background = background
+        self.last_error = None      # Exception of the last failed refresh, None after a success
+        self._models = None         # None until a list was found
+        self._next_refresh = 0.0    # time.monotonic() after which the list is refreshed
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def refresh(self):
+        """
+        Asks the server for its models now.
+
+        Returns:
+            list: The model names, or the last ones found if the server did not answer.
+        """
+        try:
+            models = [model.model for model in self.client.list().models]
+        except Exception as e:
+            self.last_error = e
+            self._next_refresh = time.monotonic() + self.retry_interval
+        else:
+            self._models, self.last_error = models, None
+            self._next_refresh = time.monotonic() + self.ttl
+        return self._models or []
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        finally:
+            self._refreshing = False
+
+    def models(self):
+        """
+        The model names, without waiting for the server unless no list was ever found.
+
+        Until a list is found, the server is asked at most every `retry_interval`
+        seconds, and an empty list is returned in between: reruns do not all wait
+        for a server that is down. Sessions starting together wait for a single
+        request, made by the first of them.
+        """
+        if self._models is None:
+            with self._lock:
+                # Checked again: another session may have refreshed while this one waited
+                if self._models is None:
+                    if time.monotonic() < self._next_refresh:
+                        return []
+                    return self.refresh()
+        if time.monotonic() >= self._next_refresh:
+            if not self.background:
+                return self.refresh()
+            with self._lock:
+                start = not self._refreshing
+                self._refreshing = True
+            if start:
+                threading.Thread(target=self._refresh_in_background, daemon=True).start()
+        return self._models
+
+
+@st.cache_resource(show_spinner=False)
+def get_model_discovery():
+    """The ModelDiscovery shared by every rerun and session of the app."""
+    return ModelDiscovery()
+
+
+@st.cache_resource(show_spinner=False)
+def get_response_cache():
+    """The ResponseCache shared by every rerun and session of the app (file set by OLLAMA_CHATBOT_CACHE)."""
+    path = os.environ.get("OLLAMA_CHATBOT_CACHE")
+    return ResponseCache(path) if path else ResponseCache()
+
+
 class OllamaChatbot:
     """
     A chatbot class to interact with Ollama models using the ollama library.
     """
-    def __init__(self):
+    def __init__(self, discovery=None, cache=None):
         """
-        Initializes the chatbot. Tries to fetch available models.
+        Initializes the chatbot with the available models.
         Handles potential connection errors.
+
+        Args:
+            discovery (ModelDiscovery): Where the models come from; by default the one shared by
+                every rerun and session of the app (see get_model_discovery).
+            cache (ResponseCache): Where answers are cached; by default the shared one
+                (see get_response_cache), False for no cache.
         """
-        self.available_models = []
-        try:
-            # Attempt to list models to check connection and availability
-            models_info = ollama.list()
-            self.available_models = [model.model for model in models_info.models]
-            if not self.available_models:
-                 st.warning("No models found. Make sure you have pulled models using 'ollama pull <model_name>'.")
-        except Exception as e:
-            st.error(f"Failed to connect to Ollama or list models. Please ensure Ollama is running. Error: {e}")
-            self.available_models = [] # Ensure it's empty if connection failed
+        self.discovery = discovery or get_model_discovery()
+        self.cache = get_response_cache() if cache is None else (None if cache is False else cache)
+        self.available_models = self.discovery.models()
+        if not self.available_models:
+            if self.discovery.last_error is not None:
+                st.error(f"Failed to connect to Ollama or list models. Please ensure Ollama is running. "
+                         f"Error: {self.discovery.last_error}")
+            else:
+                st.warning("No models found. Make sure you have pulled models using 'ollama pull <model_name>'.")
 
     def list_available_models(self):
         """
@@ -28,14 +136,19 @@ class OllamaChatbot:
         """
         return self.available_models
 
-    def get_response(self, model_name, messages, stream=False):
+    def get_response(self, model_name, messages, stream=False, options=None):
         """
         Gets a response from the specified Ollama model.
 
+        The same request (model, options and messages) is answered from the
+        response cache after the first time; a cached answer is streamed in the
+        same pieces as the original one.
+
         Args:
             model_name (str): The name of the Ollama model to use.
             messages (list): A list of message dictionaries (e.g., [{'role': 'user', 'content': '...'}, ...]).
             stream (bool): Whether to stream the response or get it all at once.
+            options (dict): Model options (e.g., {'temperature': 0}), part of the cache key.
 
         Returns:
             If stream=False: The complete response dictionary from ollama.chat.
@@ -49,23 +162,88 @@ class OllamaChatbot:
              st.error(f"Model '{model_name}' not found or Ollama is not running correctly. Available: {self.available_models}")
              return None
 
+        key = None
+        if self.cache is not None:
+            key = cache_key(model_name, messages, options)
+            pieces = self.cache.get(key)
+            if pieces is not None:
+                if stream:
+                    return replay(model_name, pieces)
+                return {"model": model_name, "message": {"role": "assistant", "content": "".join(pieces)},
+                        "done": True, "done_reason": "stop"}
+
         try:
             if stream:
                 # Return the generator directly for streaming
-                return ollama.chat(
+                response_stream = ollama.chat(
                     model=model_name,
                     messages=messages,
-                    stream=True
+                    stream=True,
+                    options=options
                 )
+                # Stored in the cache once it has been read to the end
+                return record(self.cache, key, model_name, response_stream) if key else response_stream
             else:
                 # Get the complete response
                 response = ollama.chat(
                     model=model_name,
                     messages=messages,
-                    stream=False # Ensure stream is False for non-streaming
+                    stream=False, # Ensure stream is False for non-streaming
+                    options=options
                 )
+                if key:
+                    self.cache.put(key, model_name, [response["message"]["content"]])
                 return response # Return the full response dictionary
         except Exception as e:
             st.error(f"Error interacting with Ollama model '{model_name}': {e}")
             return None
 
+    def summarize(self, model_name, summary, messages, options=None):
+        """
+        Summary of the given messages, for a ContextWindow (see context_window.py).
+
+        Args:
+            model_name (str): The name of the Ollama model that writes the summary.
+            summary (str): Summary of the messages before these ones, or None.
+            messages (list): The messages to add to the summary.
+            options (dict): Model options, as for get_response.
+
+        Returns:
+            str: The new summary, or None if an error occurs.
+        """
+        transcript = "\n".join(f"{message['role']}: {message['content']}" for message in messages)
+        if summary:
+            transcript = f"Summary so far: {summary}\n{transcript}"
+        response = self.get_response(model_name, [{"role": "system", "content": SUMMARY_PROMPT},
+                                                  {"role": "user", "content": transcript}],
+                                     stream=False, options=options)
+        if not response:
+            return None
+        return response["message"]["content"].strip() or None
+
+    def compare_responses(self, model_names, messages, deadline=60.0, options=None, on_update=None):
+        """
+        Gets the responses of several models to the same messages, concurrently (see fan_out.py).
+
+        The answers are not cached: each model answers, so that their timings can be compared.
+
+        Args:
+            model_names (list): The names of the Ollama models to compare.
+            messages (list): A list of message dictionaries, sent to every model.
+            deadline (float): Seconds after which the models still answering are cancelled.
+            options (dict): Model options, the same for every model.
+            on_update: on_update(answer), called with the fan_out.ModelAnswer of a model as it streams.
+
+        Returns:
+            dict: model name -> fan_out.ModelAnswer, or None if no model can be asked.
+        """
+        missing = [model for model in model_names if model not in self.available_models]
+        if not model_names or missing:
+            st.error(f"Model(s) {missing} not found or Ollama is not running correctly. "
+                     f"Available: {self.available_models}" if missing else "No models selected.")
+            return None
+        try:
+            return compare(model_names, messages, deadline=deadline, options=options, on_update=on_update)
+        except Exception as e:
+            st.error(f"Error comparing Ollama models {model_names}: {e}")
+            return None
@@ -0,0 +1,117 @@
+# context_window.py
+"""
+Keeps the prompt of a long chat within a token budget.
+
+Sending the whole history on every turn makes each answer start later: the
+model reads the full prompt before its first token. A ContextWindow sends the
+system prompt and the most recent turns that fit in `max_tokens`, and folds
+the older turns into a summary, sent as a second system message.
+
+The summary is kept between turns and only extended when more turns have to
+be folded. Folding goes down to `low_water` of the budget, so it happens once
+every few turns and not on every turn: in between, the start of the prompt
+stays the same, which Ollama can reuse from the previous request.
+"""
+import hashlib
+import json
+
+SUMMARY_PREFIX = "Summary of the earlier conversation: "
+MESSAGE_OVERHEAD = 4  # Tokens of the role and separators around each message
+
+
+def count_tokens(text):
+    """Rough token count: about 4 characters per token, as for English text."""
+    return max(1, len(text) // 4)
+
+
+def message_tokens(message):
+    return count_tokens(message["content"]) + MESSAGE_OVERHEAD
+
+
+class ContextWindow:
+    """The messages to send for a conversation, within a token budget; one per chat session."""
+
+    def __init__(self, max_tokens=2048, summarize=None, low_water=0.5):
+        """
+        Args:
+            max_tokens (int): Largest prompt, in estimated tokens (see count_tokens).
+            summarize: summarize(summary, messages) -> str, the previous summary (None at first)
+                extended with `messages`; returns None if it failed. None: older turns are dropped.
+            low_water (float): Part of the budget left to the recent turns after folding.
+        """
+        self.max_tokens = max_tokens
+        self.summarize = summarize
+        self.low_water = low_water
+        self.summary = None     # Summary of the first `folded` turns
+        self.folded = 0
+        self._digest = None     # Hash of the folded turns, to notice a history that changed
+        self.stats = {"history_tokens": 0, "prompt_tokens": 0, "folded": 0, "summaries": 0}
+
+    def reset(self):
+        self.summary, self.folded, self._digest = None, 0, None
+
+    @staticmethod
+    def _hash(messages):
+        text = json.dumps([[message["role"], message["content"]] for message in messages], ensure_ascii=False)
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _summary_message(self, summary):
+        return [{"role": "system", "content": SUMMARY_PREFIX + summary}] if summary else []
+
+    def messages(self, history):
+        """
+        The messages to send instead of `history`.
+
+        Args:
+            history (list): The whole conversation, system prompts first, the new user message last.
+
+        Returns:
+            list: The system prompts, the summary of the folded turns (if any) and the recent turns.
+        """
+        start = 0
+        while start < len(history) and history[start]["role"] == "system":
+            start += 1
+        system, turns = history[:start], history[start:]
+        if self.folded > len(turns) or (self.folded and self._hash(turns[:self.folded]) != self._digest):
+            self.reset()  # History cleared or edited: the summary is not about it any more
+
+        fixed = sum(message_tokens(message) for message in system)
+        recent = turns[self.folded:]
+        window = system + self._summary_message(self.summary) + recent
+        tokens = sum(message_tokens(message) for message in window)
+        if tokens > self.max_tokens and len(recent) > 1:
+            window = self._fold(system, turns, fixed)
+            tokens = sum(message_tokens(message) for message in window)
+
+        self.stats.update(history_tokens=sum(message_tokens(message) for message in history),
+                          prompt_tokens=tokens, folded=self.folded)
+        return window
+
+    def _fold(self, system, turns, fixed):
+        """Folds the oldest recent turns into the summary, down to low_water of the budget."""
+        # Room for the recent turns, with the summary counted at the size it has now
+        summary_tokens = message_tokens({"content": SUMMARY_PREFIX + self.summary}) if self.summary else 0
+        room = self.low_water * self.max_tokens - fixed - summary_tokens
+        # Keep whole turns from the end, starting with a user message; always the last message
+        keep, used = len(turns) - 1, message_tokens(turns[-1])
+        for i in range(len(turns) - 2, self.folded - 1, -1):
+            used += message_tokens(turns[i])
+            if used > room:
+                break
+            if turns[i]["role"] == "user":
+                keep = i
+        while keep > self.folded and turns[keep]["role"] != "user":
+            keep -= 1  # Do not send an answer without its question
+        if keep <= self.folded:
+            return system + self._summary_message(self.summary) + turns[self.folded:]
+
+        summary = None
+        if self.summarize is not None:
+            summary = self.summarize(self.summary, turns[self.folded:keep])
+            if summary is None:
+                # Summary failed: this turn goes without the older turns, next turn tries again
+                return system + self._summary_message(self.summary) + turns[keep:]
+            self.stats["summaries"] += 1
+        self.summary, self.folded = summary, keep
+        self._digest = self._hash(turns[:keep])
+        return system + self._summary_message(summary) + turns[keep:]
@@ -0,0 +1,193 @@
+# fake_ollama.py
+"""
+A local stand-in for the Ollama server, for benchmarks and for trying the app without models.
+
+It answers the requests the chatbot makes, in the same format as Ollama:
+GET /api/tags (the list of models) and POST /api/chat (streamed or not).
+Answers are made up, but their timing looks like a real model: listing the
+models takes `list_latency` seconds, the first token comes after
+`prompt_latency` seconds per prompt token (the model reads the whole
+conversation first), and then one token every `token_latency` seconds.
+
+Usage:
+    python fake_ollama.py --port 11435
+    OLLAMA_HOST=http://127.0.0.1:11435 streamlit run main.py
+"""
+import argparse
+import json
+import socket
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MODELS = ["tinyllama:latest", "llama3.2:1b"]
+
+
+def count_tokens(text):
+    """Rough token count: about 4 characters per token, as for English text."""
+    return max(1, len(text) // 4)
+
+
+class FakeOllama:
+    """Fake Ollama server running in a background thread."""
+
+    def __init__(self, port=0, models=MODELS, list_latency=0.02, prompt_latency=0.0002, token_latency=0.01,
+                 answer_tokens=40, model_token_latency=None):
+        """
+        Args:
+            port (int): Port to listen on; 0 picks a free one (see `host`).
+            models (list): Model names listed and accepted by /api/chat.
+            list_latency (float): Seconds taken by /api/tags.
+            prompt_latency (float): Seconds per prompt token before the first answer token.
+            token_latency (float): Seconds between two answer tokens.
+            answer_tokens (int): Tokens in every answer.
+            model_token_latency (dict): token_latency of some models, to have faster and slower ones.
+        """
+        self.models = list(models)
+        self.list_latency = list_latency
+        self.prompt_latency = prompt_latency
+        self.token_latency = token_latency
+        self.answer_tokens = answer_tokens
+        self.model_token_latency = dict(model_token_latency or {})
+        self.requests = {"tags": 0, "chat": 0}
+        self.available = True  # False: every request fails with 503, like a server being restarted
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def host(self):
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def answer(self, model, messages):
+        """The tokens of the answer: deterministic, from the last user message."""
+        question = next((message["content"] for message in reversed(messages) if message["role"] == "user"), "")
+        words = f"Arr, {model} heard ye say: {question}".split() or ["Arr!"]
+        return [words[i % len(words)] + " " for i in range(self.answer_tokens)]
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                # Send every token at once: small writes would otherwise wait for the ACK of the previous one
+                self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def log_message(self, format, *args):
+                pass  # Quiet
+
+            def send_json(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def unavailable(self):
+                if fake.available:
+                    return False
+                self.send_json(503, {"error": "server unavailable"})
+                return True
+
+            def do_GET(self):
+                if self.path == "/api/tags":
+                    fake.requests["tags"] += 1
+                    time.sleep(fake.list_latency)
+                    if self.unavailable():
+                        return
+                    now = datetime.now(timezone.utc).isoformat()
+                    self.send_json(200, {"models": [{"name": name, "model": name, "modified_at": now,
+                                                     "size": 1 << 30, "digest": f"{i:064x}"}
+                                                    for i, name in enumerate(fake.models)]})
+                elif self.path == "/api/version":
+                    self.send_json(200, {"version": "0.0.0-fake"})
+                else:
+                    self.send_json(404, {"error": "not found"})
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if self.path != "/api/chat":
+                    self.send_json(404, {"error": "not found"})
+                    return
+                fake.requests["chat"] += 1
+                if self.unavailable():
+                    return
+                model, messages = request.get("model"), request.get("messages", [])
+                if model not in fake.models:
+                    self.send_json(404, {"error": f"model '{model}' not found"})
+                    return
+                started = time.perf_counter_ns()
+                prompt_tokens = sum(count_tokens(message.get("content", "")) for message in messages)
+                time.sleep(prompt_tokens * fake.prompt_latency)
+                prompt_done = time.perf_counter_ns()
+                tokens = fake.answer(model, messages)
+                token_latency = fake.model_token_latency.get(model, fake.token_latency)
+
+                def chunk(content, done):
+                    payload = {"model": model, "created_at": datetime.now(timezone.utc).isoformat(),
+                               "message": {"role": "assistant", "content": content}, "done": done}
+                    if done:
+                        now = time.perf_counter_ns()
+                        payload.update(done_reason="stop", total_duration=now - started,
+                                       prompt_eval_count=prompt_tokens, prompt_eval_duration=prompt_done - started,
+                                       eval_count=len(tokens), eval_duration=now - prompt_done)
+                    return payload
+
+                if not request.get("stream", True):
+                    time.sleep(len(tokens) * token_latency)
+                    self.send_json(200, chunk("".join(tokens), True))
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                try:
+                    for token in tokens:
+                        self.write_chunk(chunk(token, False))
+                        time.sleep(token_latency)
+                    self.write_chunk(chunk("", True))
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # The client stopped reading
+
+            def write_chunk(self, payload):
+                line = json.dumps(payload).encode() + b"\n"
+                self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--list-latency", type=float, default=0.02)
+    parser.add_argument("--token-latency", type=float, default=0.01)
+    args = parser.parse_args()
+    server = FakeOllama(args.port, list_latency=args.list_latency, token_latency=args.token_latency)
+    print(f"Fake Ollama listening on {server.host}")
+    server.start()
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
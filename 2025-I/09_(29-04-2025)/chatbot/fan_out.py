@@ -0,0 +1,112 @@
+# fan_out.py
+"""
+Sends the same conversation to several models at once, to compare their answers.
+
+The requests go out together through ollama.AsyncClient, so comparing three
+models takes about as long as the slowest one, not the sum of the three.
+Each answer is passed to `on_update` as it streams in (the app shows them
+side by side), and the models still answering at the deadline are cancelled,
+keeping what they wrote so far.
+
+For every model, the result records the time to first token and the speed
+of the answer in tokens per second.
+"""
+import asyncio
+import time
+
+import ollama
+
+
+class ModelAnswer:
+    """The answer of one model, filled in while it streams."""
+
+    def __init__(self, model):
+        self.model = model
+        self.content = ""
+        self.status = "waiting"     # "waiting", "streaming", "done", "cancelled" (deadline) or "error"
+        self.error = None
+        self.ttft = None            # Seconds from the request to the first token
+        self.duration = None        # Seconds from the request to the end (or the deadline)
+        self.tokens = 0             # Answer tokens: counted by the server, or streamed chunks if it did not say
+        self.eval_seconds = None    # Generation time reported by the server
+
+    @property
+    def tokens_per_second(self):
+        """Speed of the answer after its first token, None before two tokens."""
+        if self.eval_seconds:
+            return self.tokens / self.eval_seconds
+        if self.ttft is None or self.duration is None or self.duration <= self.ttft or self.tokens < 2:
+            return None
+        return (self.tokens - 1) / (self.duration - self.ttft)
+
+    def as_dict(self):
+        return {"model": self.model, "content": self.content, "status": self.status,
+                "error": None if self.error is None else str(self.error), "ttft": self.ttft,
+                "duration": self.duration, "tokens": self.tokens, "tokens_per_second": self.tokens_per_second}
+
+
+async def _stream(client, answer, messages, options, on_update, started):
+    try:
+        stream = await client.chat(model=answer.model, messages=messages, stream=True, options=options)
+        async for chunk in stream:
+            piece = chunk["message"].get("content") or ""
+            if piece:
+                if answer.ttft is None:
+                    answer.ttft = time.perf_counter() - started
+                    answer.status = "streaming"
+                answer.content += piece
+                answer.tokens += 1
+            if chunk.get("done"):
+                if chunk.get("eval_count") and chunk.get("eval_duration"):
+                    answer.tokens, answer.eval_seconds = chunk["eval_count"], chunk["eval_duration"] / 1e9
+            if on_update is not None:
+                on_update(answer)
+        answer.status = "done"
+    except asyncio.CancelledError:
+        answer.status = "cancelled"
+        raise
+    except Exception as e:
+        answer.status, answer.error = "error", e
+    finally:
+        answer.duration = time.perf_counter() - started
+        if on_update is not None:
+            on_update(answer)
+
+
+async def fan_out(model_names, messages, deadline=60.0, options=None, on_update=None, client=None):
+    """
+    Streams the answers of several models to the same messages, concurrently.
+
+    Args:
+        model_names (list): The names of the Ollama models to ask.
+        messages (list): A list of message dictionaries, sent to every model.
+        deadline (float): Seconds after which the models still answering are cancelled.
+        options (dict): Model options (e.g., {'temperature': 0}), the same for every model.
+        on_update: on_update(answer), called with the ModelAnswer of a model at each new piece
+            of its answer and when it ends; it runs in the event loop, so it should be quick.
+        client (ollama.AsyncClient): Client to use; by default a new one (see OLLAMA_HOST), closed at the end.
+
+    Returns:
+        dict: model name -> ModelAnswer, in the order of model_names.
+    """
+    own_client = client is None
+    if own_client:
+        client = ollama.AsyncClient()
+    answers = {model: ModelAnswer(model) for model in model_names}
+    started = time.perf_counter()
+    tasks = [asyncio.create_task(_stream(client, answer, messages, options, on_update, started))
+             for answer in answers.values()]
+    try:
+        _, pending = await asyncio.wait(tasks, timeout=deadline)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    finally:
+        if own_client:
+            await client.close()
+    return answers
+
+
+def compare(model_names, messages, deadline=60.0, options=None, on_update=None):
+    """fan_out from synchronous code, such as a Streamlit script: on_update runs in the calling thread."""
+    return asyncio.run(fan_out(model_names, messages, deadline, options, on_update))
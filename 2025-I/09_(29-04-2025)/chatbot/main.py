@@ -1,6 +1,38 @@
 # main_app.py
 import streamlit as st
 from chatbot import OllamaChatbot # Import the chatbot class
+from context_window import ContextWindow
+
+
+
+def answer_caption(answer):
+    """Timings of a model's answer in compare mode (answer: fan_out.ModelAnswer.as_dict())."""
+    if answer["status"] == "error":
+        return f"Error: {answer['error']}"
+    parts = [] if answer["ttft"] is None else [f"first token {answer['ttft']:.2f} s"]
+    if answer["tokens_per_second"] is not None:
+        parts.append(f"{answer['tokens_per_second']:.1f} tokens/s")
+    if answer["status"] == "cancelled":
+        parts.append(f"cancelled after {answer['duration']:.0f} s")
+    return " · ".join(parts) or "waiting..."
+
+
+def comparison_columns(models):
+    """One column per model, side by side; returns model -> (answer placeholder, caption placeholder)."""
+    placeholders = {}
+    for column, model in zip(st.columns(len(models)), models):
+        column.markdown(f"**{model}**")
+        placeholders[model] = (column.empty(), column.empty())
+    return placeholders
+
+
+def show_comparison(comparison):
+    placeholders = comparison_columns([answer["model"] for answer in comparison])
+    for answer in comparison:
+        text, caption = placeholders[answer["model"]]
+        text.markdown(answer["content"])
+        caption.caption(answer_caption(answer))
+
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -45,9 +77,38 @@ with st.sidebar:
     # Streaming Option
     use_streaming = st.toggle("Stream Response", value=True, key="use_streaming")
 
+    # Compare mode: the same conversation to several models at once, answers side by side
+    compare_mode = st.toggle("Compare Models", value=False, key="compare_mode",
+                             disabled=not (chatbot and len(available_models) > 1))
+    if compare_mode:
+        main_model = st.session_state.get("current_model")
+        compare_models = st.multiselect(
+            "Models to compare:",
+            options=available_models,
+            default=([main_model] if main_model else []) + [model for model in available_models if model != main_model][:1],
+            max_selections=3,
+            key="compare_models",
+            help="The answer of the model chosen above is the one kept in the conversation."
+        )
+        compare_deadline = st.slider("Deadline (seconds):", min_value=5, max_value=300, value=60, step=5,
+                                     key="compare_deadline",
+                                     help="Models still answering after it are stopped.")
+
+    # Token budget of the prompt: older turns are folded into a summary
+    context_budget = st.number_input(
+        "Context budget (tokens):",
+        min_value=256, max_value=32768, value=2048, step=256, key="context_budget",
+        help="The system prompt and the latest messages are sent as they are; older messages are summarized."
+    )
+
+    # Context and response cache metrics, filled in at the end so that they include this interaction
+    context_metrics = st.empty()
+    cache_metrics = st.empty()
+
     # Clear Chat Button
     if st.button("Clear Chat History", key="clear_chat"):
         st.session_state.messages = []
+        st.session_state.pop("context_window", None)
         st.success("Chat history cleared!")
         st.rerun() # Rerun to reflect the cleared messages
 
@@ -66,10 +127,27 @@ if "messages" not in st.session_state:
     }
     st.session_state.messages.append(system_prompt)
 
+# One context window per session, keeping its summary between reruns
+if "context_window" not in st.session_state:
+    st.session_state.context_window = ContextWindow()
+context_window = st.session_state.context_window
+context_window.max_tokens = context_budget
+
+
+def summarize(summary, messages):
+    with st.spinner("Summarizing older messages..."):
+        return chatbot.summarize(st.session_state.selected_model, summary, messages)
+
+
+context_window.summarize = summarize if chatbot else None
+
 # Display existing chat messages
 for message in st.session_state.messages:
     with st.chat_message(message["role"]):
-        st.markdown(message["content"])
+        if message.get("comparison"):
+            show_comparison(message["comparison"])
+        else:
+            st.markdown(message["content"])
 
 # Handle chat input from the user
 if prompt := st.chat_input("What can I help you with?"):
@@ -85,10 +163,35 @@ if prompt := st.chat_input("What can I help you with?"):
         # Get response from the chatbot
         with st.chat_message("assistant"):
             try:
-                if use_streaming:
+                # System prompt, summary of the older messages and the latest ones, within the budget
+                messages = context_window.messages(st.session_state.messages)
+                if compare_mode:
+                    placeholders = comparison_columns(compare_models) if compare_models else {}
+
+                    def show_answer(answer):
+                        text, caption = placeholders[answer.model]
+                        text.markdown(answer.content + ("▌" if answer.status in ("waiting", "streaming") else ""))
+                        caption.caption(answer_caption(answer.as_dict()))
+
+                    answers = chatbot.compare_responses(compare_models, messages, deadline=compare_deadline,
+                                                        on_update=show_answer)
+                    if answers:
+                        # Kept in the conversation: the answer of the model chosen above, else the first one
+                        kept = answers.get(st.session_state.selected_model)
+                        if kept is None or not kept.content:
+                            kept = next((answer for answer in answers.values() if answer.content), None)
+                        if kept is not None:
+                            st.session_state.messages.append({
+                                "role": "assistant", "content": kept.content,
+                                "comparison": [answer.as_dict() for answer in answers.values()]
+                            })
+                        else:
+                            st.warning("Could not get response from any model.")
+
+                elif use_streaming:
                     response_stream = chatbot.get_response(
                         st.session_state.selected_model,
-                        st.session_state.messages,
+                        messages,
                         stream=True
                     )
                     if response_stream:
@@ -106,7 +209,7 @@ if prompt := st.chat_input("What can I help you with?"):
                 else: # Non-streaming
                     response_data = chatbot.get_response(
                         st.session_state.selected_model,
-                        st.session_state.messages,
+                        messages,
                         stream=False
                     )
                     if response_data and 'message' in response_data and 'content' in response_data['message']:
@@ -122,6 +225,28 @@ if prompt := st.chat_input("What can I help you with?"):
                 st.error(f"An error occurred during chat generation: {e}")
 
 
+# --- Context window metrics ---
+context_stats = context_window.stats
+if context_stats["history_tokens"]:
+    context_metrics.metric(
+        "Prompt tokens sent",
+        f"{context_stats['prompt_tokens']:,}",
+        delta=f"{context_stats['prompt_tokens'] - context_stats['history_tokens']:,} vs. whole history",
+        delta_color="inverse",
+        help=f"{context_stats['folded']} messages summarized ({context_stats['summaries']} summaries), "
+             f"whole history: {context_stats['history_tokens']:,} tokens"
+    )
+
+# --- Response cache metrics ---
+if chatbot and chatbot.cache is not None:
+    stats = chatbot.cache.stats()
+    cache_metrics.metric(
+        "Response cache hit rate",
+        f"{stats['hit_rate']:.0%}",
+        help=f"{stats['hits']} hits, {stats['misses']} misses, {stats['evictions']} evicted, "
+             f"{stats['bytes'] / 1e6:.1f} MB stored"
+    )
+
 # --- Instructions/Notes ---
 st.sidebar.markdown("---")
 st.sidebar.markdown("### Notes:")
@@ -0,0 +1,150 @@
+# response_cache.py
+"""
+On-disk cache of chatbot answers.
+
+The same question to the same model, with the same conversation before it,
+gets the answer stored the first time instead of waiting for the model again.
+Answers are kept in an SQLite file, bounded in size: when it is full, the
+least recently used answers are removed first.
+
+An answer is stored as the pieces of text it was streamed in, so it can be
+streamed again in the same pieces: st.write_stream shows a cached answer
+exactly like a new one (only faster).
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "ollama_chatbot", "responses.sqlite3")
+
+
+def cache_key(model_name, messages, options=None):
+    """
+    Stable hash of everything that determines an answer.
+
+    The same model, options and messages always give the same key, in any
+    process: dictionaries are written with sorted keys, without spaces.
+    """
+    request = {"model": model_name, "options": options or {},
+               "messages": [{"role": message["role"], "content": message["content"]} for message in messages]}
+    text = json.dumps(request, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Size-bounded, least-recently-used store of answers in an SQLite file."""
+
+    def __init__(self, path=DEFAULT_PATH, max_bytes=64 << 20):
+        """
+        Args:
+            path (str): SQLite file; created with its directory if needed. ":memory:" keeps nothing.
+            max_bytes (int): Largest total size of the stored answers.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Streamlit serves every session from its own thread: one connection, used under a lock
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("""CREATE TABLE IF NOT EXISTS responses (
+                                        key TEXT PRIMARY KEY, model TEXT, pieces TEXT, size INTEGER,
+                                        last_used INTEGER)""")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._size, self._clock = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0), COALESCE(MAX(last_used), 0) FROM responses").fetchone()
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    @property
+    def size(self):
+        """Total size of the stored answers, in bytes."""
+        return self._size
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key):
+        """
+        Returns:
+            list: The pieces of the stored answer, or None if there is none.
+        """
+        with self._lock:
+            row = self._connection.execute("SELECT pieces FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._clock += 1
+            self._connection.execute("UPDATE responses SET last_used = ? WHERE key = ?", (self._clock, key))
+        return json.loads(row[0])
+
+    def put(self, key, model_name, pieces):
+        """Stores the pieces of an answer, then removes the least recently used answers beyond max_bytes."""
+        value = json.dumps(pieces, ensure_ascii=False)
+        size = len(key) + len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return  # Would evict everything else
+        with self._lock:
+            self._clock += 1
+            connection = self._connection
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                old = connection.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+                connection.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                                   (key, model_name, value, size, self._clock))
+                self._size += size - (old[0] if old else 0)
+                while self._size > self.max_bytes:
+                    evicted = connection.execute(
+                        "SELECT key, size FROM responses ORDER BY last_used LIMIT 64").fetchall()
+                    for evicted_key, evicted_size in evicted:
+                        if self._size <= self.max_bytes:
+                            break
+                        connection.execute("DELETE FROM responses WHERE key = ?", (evicted_key,))
+                        self._size -= evicted_size
+                        self.evictions += 1
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+    def clear(self):
+        with self._lock:
+            self._connection.execute("DELETE FROM responses")
+            self._size = 0
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate(),
+                "evictions": self.evictions, "bytes": self._size}
+
+
+def replay(model_name, pieces):
+    """The stored pieces as a stream of chunks shaped like the ones of ollama.chat(stream=True)."""
+    for piece in pieces:
+        yield {"model": model_name, "message": {"role": "assistant", "content": piece}, "done": False}
+    yield {"model": model_name, "message": {"role": "assistant", "content": ""}, "done": True,
+           "done_reason": "stop"}
+
+
+def record(cache, key, model_name, stream):
+    """
+    Passes the chunks of an ollama stream through, and stores the answer once the stream is complete.
+
+    An answer that was not read to the end (or failed) is not stored.
+    """
+    pieces = []
+    for chunk in stream:
+        pieces.append(chunk["message"].get("content") or "")
+        if chunk.get("done"):
+            cache.put(key, model_name, [piece for piece in pieces if piece])
+        yield chunk
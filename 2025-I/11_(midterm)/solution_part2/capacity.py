@@ -0,0 +1,21 @@
+from restaurant_system.simulation import plan_capacity, run_replications
+
+def default_day():
+    # How does the default staff schedule (constants.py) cope with the lunch rush?
+    summary = run_replications(replications=500)
+    print("Default schedule, 500 simulated days (mean and 95% confidence interval):")
+    for metric in ('customers', 'mean_counter_wait', 'mean_time_in_system', 'p95_time_in_system', 'revenue'):
+        mean, low, high = summary[metric]
+        print(f"  {metric}: {mean:.2f} [{low:.2f}, {high:.2f}]")
+
+def staffing():
+    # Which fixed staffing levels keep the average customer under 10 minutes?
+    plans = plan_capacity(counters=range(1, 4), grills=range(2, 6), max_time_in_system=10, replications=200)
+    print("\nCounters  Grills  Mean time in system (min)  Meets target")
+    for plan in plans:
+        mean, low, high = plan['mean_time_in_system']
+        print(f"{plan['counters']:>8}  {plan['grills']:>6}  {mean:>8.2f} [{low:.2f}, {high:.2f}]  {plan['meets_target']}")
+
+if __name__=='__main__':
+    default_day()
+    staffing()
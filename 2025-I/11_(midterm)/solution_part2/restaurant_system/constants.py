@@ -3,3 +3,22 @@ CONSTANTS = {
     'ADDITIONAL_PATTY_PRICE': 0.40,
     'ADDITIONAL_CHEESE_PRICE': 0.10,
 }
+
+
+# Default scenario of the capacity-planning simulation (times in minutes)
+SIMULATION_DEFAULTS = {
+    'OPENING_MINUTES': 8 * 60,
+    # Poisson arrivals: (start minute, customers per minute), piecewise constant
+    'ARRIVAL_RATES': [(0, 0.5), (150, 1.5), (270, 0.6)],
+    # Burgers per order -> probability
+    'ORDER_SIZE': {1: 0.5, 2: 0.3, 3: 0.15, 4: 0.05},
+    # (patty, cheese) -> probability. Names and prices come from Burger
+    'MENU_MIX': {(True, True): 0.5, (True, False): 0.35, (False, True): 0.15},
+    # Mean service times, exponentially distributed
+    'COUNTER_MINUTES_PER_ORDER': 0.6,
+    'COUNTER_MINUTES_PER_ITEM': 0.15,
+    'GRILL_MINUTES_PATTY': 1.2,
+    'GRILL_MINUTES_VEGGIE': 0.8,
+    # Staff schedule: (start minute, counters open, grills staffed)
+    'STAFF_SCHEDULE': [(0, 1, 2), (150, 2, 4), (270, 1, 2)],
+}
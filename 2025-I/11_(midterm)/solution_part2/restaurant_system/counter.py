@@ -1,35 +1,52 @@
+from datetime import datetime
+
+from .events import EVENT_BUS, EventBus
+
 class Order:
     """Manages a single customer order, tracking items and calculating totals."""
 
-    def __init__(self, order_id:str):
+    def __init__(self, order_id:str, bus: EventBus = None):
         """
         Initializes a new order with a unique ID and an empty list of items.
 
         Args:
             order_id (str or int): A unique identifier for the order.
+            bus (EventBus): Where the order publishes its events. Defaults to the console bus.
         """
         self.order_id = order_id
         self.items = []
-        print(f"Order {self.order_id} started.")
+        self.opened_at = datetime.now()
+        self.closed_at = None
+        self.bus = bus or EVENT_BUS
+        self.bus.publish('order_started', f"Order {self.order_id} started.", order_id=order_id)
 
     def add_item(self, item):
         """
         Adds an item (like a Burger object) to the order.
         """
+        if self.closed_at is not None:
+            self.bus.publish('item_rejected', f"Order {self.order_id} is already closed.",
+                             order_id=self.order_id)
+            return
+
         # Assume item object has get_name() and get_price() methods
         try:
             burger_name = item.get_name()
             burger_price = item.get_price()
         except:
-            print("Error: Provided item does not have get_name() or get_price() method.")
+            self.bus.publish('item_rejected',
+                             "Error: Provided item does not have get_name() or get_price() method.",
+                             order_id=self.order_id)
             return
 
         if burger_price <= 0:
-            print("Item price must be positive.")
+            self.bus.publish('item_rejected', "Item price must be positive.",
+                             order_id=self.order_id, name=burger_name, price=burger_price)
             return
 
         self.items.append({'name': burger_name, 'price': burger_price})
-        print(f'"{burger_name}" added to order.')
+        self.bus.publish('item_added', f'"{burger_name}" added to order.',
+                         order_id=self.order_id, name=burger_name, price=burger_price)
 
     def get_total(self):
         """Calculates the total cost of all items in the order."""
@@ -38,6 +55,15 @@ class Order:
             total += item['price']
         return total
 
+    def close(self):
+        """Marks the order as paid. A closed order does not accept more items."""
+        if self.closed_at is not None:
+            return
+        self.closed_at = datetime.now()
+        self.bus.publish('order_closed', f"Order {self.order_id} closed.",
+                         order_id=self.order_id, items=list(self.items),
+                         closed_at=self.closed_at, total=self.get_total())
+
     def details(self):
         """
         Generates a multi-line string representing the order receipt.
@@ -45,13 +71,17 @@ class Order:
         Returns:
             str: A formatted string showing order ID, items, and total.
         """
-        print(f"\nOrder ID: {self.order_id}\n")
+        lines = [f"\nOrder ID: {self.order_id}\n"]
 
         if not self.items:
-            print("\n(No items in this order)")
+            lines.append("\n(No items in this order)")
         else:
             for item in self.items:
-                print(f"- {item['name']}: ${item['price']}")
+                lines.append(f"- {item['name']}: ${item['price']}")
 
         total = self.get_total()
-        print(f"\nTotal: ${total}\n")
+        lines.append(f"\nTotal: ${total}\n")
+
+        receipt = "\n".join(lines)
+        self.bus.publish('order_details', receipt, order_id=self.order_id, total=total)
+        return receipt
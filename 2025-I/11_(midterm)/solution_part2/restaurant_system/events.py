@@ -0,0 +1,144 @@
+"""
+Event bus for the restaurant system.
+
+Burgers and orders publish what happens to them (patty added, item added,
+receipt printed...) as events instead of printing directly. Sinks subscribed
+to the bus decide what to do with those events: print them, drop them, log a
+sample of them or write them to an audit file.
+"""
+import json
+import logging
+import queue
+import threading
+import time
+
+
+class ConsoleSink:
+    """Prints the message of every event, like the original classes did."""
+
+    def handle(self, event: dict):
+        print(event['message'])
+
+
+class NullSink:
+    """Drops every event. Useful for replays and load tests."""
+
+    def handle(self, event: dict):
+        pass
+
+
+class SampledLoggerSink:
+    """Sends one out of every `every` events to a standard logger."""
+
+    def __init__(self, every: int = 100, logger: logging.Logger = None, level: int = logging.INFO):
+        if every < 1:
+            raise ValueError("every must be a positive integer")
+        self.every = every
+        self.logger = logger or logging.getLogger('restaurant_system')
+        self.level = level
+        self._seen = 0
+
+    def handle(self, event: dict):
+        self._seen += 1
+        if self._seen % self.every == 0:
+            self.logger.log(self.level, "%s: %s", event['event'], event['message'])
+
+
+class AsyncBatchedFileSink:
+    """
+    Writes events as JSON lines to a file from a background thread.
+
+    Publishing only puts the event in a queue, so the caller never waits for
+    the disk. The writer thread takes up to `batch_size` events at a time and
+    writes them with a single call, flushing at least every `flush_interval`
+    seconds. Once the sink is closed, `handle` raises ValueError instead of
+    queueing events that would never be written.
+    """
+
+    _STOP = object()
+
+    def __init__(self, path: str, batch_size: int = 500, flush_interval: float = 1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.SimpleQueue()
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf-8')
+        self._thread = threading.Thread(target=self._run, name='event-file-sink', daemon=True)
+        self._thread.start()
+
+    def handle(self, event: dict):
+        with self._close_lock:
+            if self._closed:
+                raise ValueError("event sink is closed")
+            self._queue.put(event)
+
+    def _run(self):
+        running = True
+        while running:
+            try:
+                # Block until there is something to write, or the interval expires
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if any(event is self._STOP for event in batch):
+                batch = [event for event in batch if event is not self._STOP]
+                running = False
+            lines = [json.dumps(event, default=str) + '\n' for event in batch]
+            self._file.write(''.join(lines))
+            self._file.flush()
+
+    def close(self):
+        """Writes the remaining events and closes the file."""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(self._STOP)
+        self._thread.join()
+        self._file.close()
+
+
+class EventBus:
+    """Dispatches published events to every subscribed sink."""
+
+    def __init__(self, *sinks):
+        self._sinks = list(sinks)
+
+    def subscribe(self, sink):
+        """Adds a sink. A sink is any object with a `handle(event)` method."""
+        self._sinks.append(sink)
+        return sink
+
+    def unsubscribe(self, sink):
+        """Removes a previously subscribed sink."""
+        self._sinks.remove(sink)
+
+    def publish(self, event: str, message: str, **fields):
+        """
+        Sends an event to all sinks.
+
+        Args:
+            event (str): Name of the event, e.g. 'item_added'.
+            message (str): Human readable text, what used to be printed.
+            **fields: Structured data describing the event.
+        """
+        if not self._sinks:
+            return
+        payload = {'event': event, 'message': message, 'time': time.time(), **fields}
+        for sink in self._sinks:
+            sink.handle(payload)
+
+
+# Default bus used when a Burger or Order is created without one.
+# It prints to the console, so the behaviour of run.py does not change.
+EVENT_BUS = EventBus(ConsoleSink())
+
+# A bus with no sinks: publishing returns immediately.
+QUIET_BUS = EventBus()
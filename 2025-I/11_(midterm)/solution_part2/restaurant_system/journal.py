@@ -0,0 +1,216 @@
+"""
+Crash-safe journal of the orders.
+
+The journal is an event bus sink: every 'order_started', 'item_added' and
+'order_closed' event is appended to a write-ahead log, one checksummed JSON
+record per line. If the counter process dies, `recover_orders` replays the
+log and rebuilds every order that was still open.
+
+To keep the write path fast, records are committed in groups: they wait in
+memory until `group_size` records are pending or `max_delay` seconds have
+passed, and are then written with a single system call. `fsync_every`
+controls how many group writes share one fsync. This means `append` (and
+so `publish`) returns before the record is durable: a crash loses the
+records of the current group, at most `max_delay` seconds of orders. With
+`max_delay=0`, every append is committed before it returns.
+
+Typical startup:
+
+    journal = OrderJournal('orders.wal')
+    bus = EventBus(ConsoleSink(), journal)
+    open_orders = recover_orders('orders.wal', bus=bus)
+"""
+import json
+import os
+import threading
+import zlib
+from datetime import datetime
+
+from .counter import Order
+from .events import EVENT_BUS, QUIET_BUS
+
+# Event name -> journal operation
+OPERATIONS = {
+    'order_started': 'open',
+    'item_added': 'add',
+    'order_closed': 'close',
+}
+
+
+class OrderJournal:
+    """Append-only write-ahead log of order events with group commit."""
+
+    def __init__(self, path: str, group_size: int = 64, max_delay: float = 0.01, fsync_every: int = 1):
+        """
+        Args:
+            path (str): Journal file. Records are appended if it exists.
+            group_size (int): Records written together in one commit.
+            max_delay (float): Longest time (seconds) a record waits in memory.
+                A background thread commits pending records after this delay.
+                0 (or less) commits every record in `append`, without grouping.
+            fsync_every (int): Commits per fsync. 1 syncs every commit, 0 never
+                syncs and leaves durability to the operating system.
+        """
+        self.path = path
+        self.group_size = group_size
+        self.max_delay = max_delay
+        self.fsync_every = fsync_every
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._lock = threading.Lock()
+        self._pending = []
+        self._commits_since_sync = 0
+        self._closed = threading.Event()
+        self._flusher = None
+        if max_delay > 0:
+            self._flusher = threading.Thread(target=self._flush_periodically, name='order-journal', daemon=True)
+            self._flusher.start()
+
+    def handle(self, event: dict):
+        """Event bus sink: journals the events needed to rebuild orders."""
+        operation = OPERATIONS.get(event['event'])
+        if operation is None:
+            return
+        record = {'op': operation, 'order_id': event['order_id'], 'time': event['time']}
+        if operation == 'add':
+            record['name'] = event['name']
+            record['price'] = event['price']
+        self.append(record)
+
+    def append(self, record: dict):
+        """
+        Adds a record to the current group, committing it when full.
+
+        Without a background flusher (max_delay <= 0) the record is committed
+        at once: nothing would write it before the next full group otherwise.
+        """
+        line = json.dumps(record, separators=(',', ':'))
+        data = f"{zlib.crc32(line.encode()):08x} {line}\n"
+        with self._lock:
+            self._pending.append(data)
+            if self._flusher is None or len(self._pending) >= self.group_size:
+                self._commit()
+
+    def commit(self):
+        """Writes the pending records now."""
+        with self._lock:
+            self._commit()
+
+    def sync(self):
+        """Writes the pending records and forces them to disk."""
+        with self._lock:
+            self._commit()
+            os.fsync(self._fd)
+            self._commits_since_sync = 0
+
+    def _commit(self):
+        """Writes the pending group. The lock must be held."""
+        if not self._pending:
+            return
+        data = memoryview(''.join(self._pending).encode())
+        self._pending = []
+        while data:
+            written = os.write(self._fd, data)
+            data = data[written:]
+        self._commits_since_sync += 1
+        if self.fsync_every and self._commits_since_sync >= self.fsync_every:
+            os.fsync(self._fd)
+            self._commits_since_sync = 0
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self.max_delay):
+            self.commit()
+
+    def checkpoint(self, open_orders: dict):
+        """
+        Replaces the journal with a snapshot of the open orders, so it does
+        not grow for the whole day. Closed orders are dropped.
+        """
+        with self._lock:
+            self._commit()
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as snapshot:
+                for order in open_orders.values():
+                    opened = order.opened_at.timestamp()
+                    records = [{'op': 'open', 'order_id': order.order_id, 'time': opened}]
+                    records += [{'op': 'add', 'order_id': order.order_id, 'time': opened, **item}
+                                for item in order.items]
+                    for record in records:
+                        line = json.dumps(record, separators=(',', ':'))
+                        snapshot.write(f"{zlib.crc32(line.encode()):08x} {line}\n")
+                snapshot.flush()
+                os.fsync(snapshot.fileno())
+            os.replace(tmp_path, self.path)
+            _fsync_directory(self.path)  # Otherwise a power failure can undo the rename
+            os.close(self._fd)
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self._commits_since_sync = 0
+
+    def close(self):
+        """Commits, syncs and closes the journal."""
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.sync()
+        os.close(self._fd)
+
+
+def _fsync_directory(path: str):
+    """Forces the directory entries of the folder of `path` to disk (not possible on Windows)."""
+    if os.name == 'nt':
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def recover_orders(path: str, bus=None) -> dict:
+    """
+    Replays a journal and rebuilds the orders that were not closed.
+
+    Reading stops at the first incomplete or corrupted record, which is what
+    a crash in the middle of a write leaves behind. The file is truncated
+    there so new records are appended after the last valid one.
+
+    Args:
+        path (str): Journal file. A missing file means there is nothing to recover.
+        bus (EventBus): Bus given to the recovered orders, the console bus by
+            default. Nothing is published while replaying.
+
+    Returns:
+        dict: order_id -> Order, for every open order.
+    """
+    orders = {}
+    if not os.path.exists(path):
+        return orders
+
+    valid_bytes = 0
+    with open(path, 'rb') as journal:
+        for raw in journal:
+            try:
+                checksum, line = raw.rstrip(b'\n').split(b' ', 1)
+                if not raw.endswith(b'\n') or int(checksum, 16) != zlib.crc32(line):
+                    break
+                record = json.loads(line)
+            except ValueError:
+                break
+            valid_bytes += len(raw)
+
+            order_id = record['order_id']
+            if record['op'] == 'open':
+                order = Order(order_id, bus=QUIET_BUS)
+                order.opened_at = datetime.fromtimestamp(record['time'])
+                orders[order_id] = order
+            elif record['op'] == 'add' and order_id in orders:
+                orders[order_id].items.append({'name': record['name'], 'price': record['price']})
+            elif record['op'] == 'close':
+                orders.pop(order_id, None)
+
+    if valid_bytes < os.path.getsize(path):
+        with open(path, 'r+b') as journal:
+            journal.truncate(valid_bytes)
+
+    for order in orders.values():
+        order.bus = bus or EVENT_BUS
+    return orders
@@ -1,23 +1,30 @@
 from .constants import CONSTANTS
+from .events import EVENT_BUS, EventBus
 
 class Burger:
     """Represents a single burger item with customizable toppings."""
 
-    def __init__(self):
-        """Initializes a basic burger with no patty or cheese added yet."""
+    def __init__(self, bus: EventBus = None):
+        """
+        Initializes a basic burger with no patty or cheese added yet.
+
+        Args:
+            bus (EventBus): Where the burger publishes its events. Defaults to the console bus.
+        """
         self.patty = False
         self.cheese = False
         self.base_price = CONSTANTS['BURGUER_BASE_PRICE']
+        self.bus = bus or EVENT_BUS
 
     def add_patty(self):
         """Adds a patty to the burger."""
         self.patty = True
-        print("Patty added...")
+        self.bus.publish('patty_added', "Patty added...")
 
     def add_cheese(self):
         """Adds cheese to the burger."""
         self.cheese = True
-        print("Cheese added...")
+        self.bus.publish('cheese_added', "Cheese added...")
 
     def get_price(self):
         """Calculates the total price of the burger based on added toppings."""
@@ -0,0 +1,178 @@
+"""
+End-of-day sales rollup.
+
+Closed orders are collected into columnar batches (one list per column) and
+aggregated with Polars into two tables:
+
+* revenue_by_item: number of items sold and revenue per burger type.
+* hourly_volume: orders, items and revenue per hour of the day.
+
+The aggregates are appended to a Parquet dataset partitioned by day:
+
+    dataset/
+    ├── revenue_by_item/date=2025-04-22/part-<id>.parquet
+    ├── hourly_volume/date=2025-04-22/part-<id>.parquet
+    └── processed_orders/date=2025-04-22/part-<id>.parquet
+
+Each write only aggregates orders that are not in `processed_orders` yet, so
+re-running a day only processes the new orders. The `processed_orders` part
+is written last and works as a commit marker: aggregate parts without it
+are ignored when reading.
+"""
+import os
+import uuid
+from pathlib import Path
+
+import polars as pl
+
+# Table name -> key columns of the aggregate (besides the date)
+TABLES = {
+    'revenue_by_item': ['name'],
+    'hourly_volume': ['hour'],
+}
+
+SALES_SCHEMA = {
+    'order_id': pl.Utf8,
+    'name': pl.Utf8,
+    'price': pl.Float64,
+    'closed_at': pl.Datetime('us'),
+}
+
+
+class SalesRollup:
+    """Collects closed orders and appends their aggregates to a Parquet dataset."""
+
+    def __init__(self, dataset_dir: str, batch_size: int = 50_000):
+        """
+        Args:
+            dataset_dir (str): Root folder of the Parquet dataset.
+            batch_size (int): Number of sold items kept in Python lists before
+                they are turned into a Polars DataFrame.
+        """
+        self.dataset_dir = Path(dataset_dir)
+        self.batch_size = batch_size
+        self._columns = {name: [] for name in SALES_SCHEMA}
+        self._batches = []
+        self._pending_orders = set()
+
+    def collect(self, order):
+        """Adds a closed Order to the next rollup."""
+        if order.closed_at is None:
+            raise ValueError(f"Order {order.order_id} is not closed.")
+        self._add(order.order_id, order.items, order.closed_at)
+
+    def handle(self, event: dict):
+        """Event bus sink: collects orders from their 'order_closed' events."""
+        if event['event'] == 'order_closed':
+            self._add(event['order_id'], event['items'], event['closed_at'])
+
+    def _add(self, order_id, items, closed_at):
+        order_id = str(order_id)
+        if order_id in self._pending_orders:
+            return
+        self._pending_orders.add(order_id)
+        for item in items:
+            self._columns['order_id'].append(order_id)
+            self._columns['name'].append(item['name'])
+            self._columns['price'].append(item['price'])
+            self._columns['closed_at'].append(closed_at)
+        if len(self._columns['order_id']) >= self.batch_size:
+            self._seal_batch()
+
+    def _seal_batch(self):
+        """Turns the current column lists into a DataFrame batch."""
+        if not self._columns['order_id']:
+            return
+        self._batches.append(pl.DataFrame(self._columns, schema=SALES_SCHEMA))
+        self._columns = {name: [] for name in SALES_SCHEMA}
+
+    def _processed_orders(self, day) -> pl.Series:
+        """Returns the IDs of the orders already rolled up for a day."""
+        parts = _parts(self.dataset_dir / 'processed_orders', day)
+        if not parts:
+            return pl.Series('order_id', [], dtype=pl.Utf8)
+        return pl.scan_parquet(parts).collect()['order_id']
+
+    def write(self) -> dict:
+        """
+        Aggregates the collected orders and appends them to the dataset.
+
+        The collected orders are only dropped once every part is written. If
+        the write fails, they stay collected and the next `write` retries
+        them; days that were already committed are skipped by the
+        `processed_orders` check.
+
+        Returns:
+            dict: Number of newly processed orders per day.
+        """
+        self._seal_batch()
+        if not self._batches:
+            return {}
+        sales = pl.concat(self._batches).with_columns(pl.col('closed_at').dt.date().alias('date'))
+
+        written = {}
+        for day in sales['date'].unique().sort().to_list():
+            new_sales = sales.filter(
+                (pl.col('date') == day) & ~pl.col('order_id').is_in(self._processed_orders(day))
+            )
+            if new_sales.is_empty():
+                continue
+
+            by_item = (new_sales
+                       .group_by('date', 'name')
+                       .agg(pl.len().alias('items'), pl.col('price').sum().alias('revenue')))
+            hourly = (new_sales
+                      .group_by('date', pl.col('closed_at').dt.hour().alias('hour'))
+                      .agg(pl.col('order_id').n_unique().alias('orders'),
+                           pl.len().alias('items'),
+                           pl.col('price').sum().alias('revenue')))
+            orders = new_sales.select('order_id').unique()
+
+            part = f"part-{uuid.uuid4().hex}.parquet"
+            _write_part(by_item, self.dataset_dir / 'revenue_by_item', day, part)
+            _write_part(hourly, self.dataset_dir / 'hourly_volume', day, part)
+            _write_part(orders, self.dataset_dir / 'processed_orders', day, part)  # Commit marker
+            written[day] = orders.height
+
+        self._batches = []
+        self._pending_orders = set()
+        return written
+
+
+def read_rollup(dataset_dir: str, table: str, day=None) -> pl.DataFrame:
+    """
+    Sums the committed parts of a rollup table.
+
+    Args:
+        dataset_dir (str): Root folder of the Parquet dataset.
+        table (str): 'revenue_by_item' or 'hourly_volume'.
+        day (datetime.date): Only read this day. All days if None.
+    """
+    if table not in TABLES:
+        raise ValueError(f"Unknown rollup table '{table}'. Available: {list(TABLES)}")
+    dataset_dir = Path(dataset_dir)
+    committed = {path.name for path in _parts(dataset_dir / 'processed_orders', day)}
+    parts = [path for path in _parts(dataset_dir / table, day) if path.name in committed]
+    keys = ['date'] + TABLES[table]
+    if not parts:
+        return pl.DataFrame()
+    return (pl.scan_parquet(parts)
+            .group_by(keys)
+            .agg(pl.exclude(keys).sum())
+            .sort(keys)
+            .collect())
+
+
+def _parts(table_dir: Path, day=None) -> list:
+    """Lists the Parquet parts of a table, for one day or for all of them."""
+    pattern = f"date={day}/*.parquet" if day is not None else "date=*/*.parquet"
+    return sorted(table_dir.glob(pattern))
+
+
+def _write_part(frame: pl.DataFrame, table_dir: Path, day, part: str):
+    """Writes a part atomically: readers never see a half written file."""
+    partition = table_dir / f"date={day}"
+    partition.mkdir(parents=True, exist_ok=True)
+    tmp_path = partition / f".{part}.tmp"
+    frame.write_parquet(tmp_path)
+    os.replace(tmp_path, partition / part)
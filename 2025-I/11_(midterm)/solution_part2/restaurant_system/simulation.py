@@ -0,0 +1,283 @@
+"""
+Discrete-event simulation of the restaurant, for capacity planning.
+
+Customers arrive following a Poisson process, queue at the counters to place
+an Order, and every Burger of the order then queues for a grill. The order
+is ready when its last burger leaves the grill. Orders are composed with the
+real Burger and Order classes, so prices always match the counter software.
+
+Events are kept in a binary heap ordered by time. One run simulates one day;
+`run_replications` runs many independent days on all cores and reports
+confidence intervals, and `plan_capacity` compares staffing levels.
+"""
+import heapq
+import itertools
+import math
+import os
+import random
+import statistics
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .constants import SIMULATION_DEFAULTS
+from .counter import Order
+from .events import QUIET_BUS
+from .products import Burger
+
+
+class Station:
+    """A group of identical servers (counters or grills) with a FIFO queue."""
+
+    def __init__(self, simulation, capacity: int):
+        self.simulation = simulation
+        self.capacity = capacity
+        self.busy = 0
+        self.queue = deque()
+        self.max_queue = 0
+        self.busy_time = 0.0
+        self._last_change = 0.0
+
+    def _account(self):
+        """Accumulates busy server-minutes up to the current time."""
+        now = self.simulation.now
+        self.busy_time += self.busy * (now - self._last_change)
+        self._last_change = now
+
+    def request(self, start):
+        """Starts `start()` when a server is free; queues it otherwise."""
+        if self.busy < self.capacity:
+            self._account()
+            self.busy += 1
+            start()
+        else:
+            self.queue.append(start)
+            self.max_queue = max(self.max_queue, len(self.queue))
+
+    def release(self):
+        """Frees a server and hands it to the next job in the queue."""
+        self._account()
+        self.busy -= 1
+        self._dispatch()
+
+    def set_capacity(self, capacity: int):
+        """Changes the number of servers. Busy servers always finish their job."""
+        self.capacity = capacity
+        self._dispatch()
+
+    def _dispatch(self):
+        while self.queue and self.busy < self.capacity:
+            self._account()
+            self.busy += 1
+            self.queue.popleft()()
+
+
+class Simulation:
+    """Simulates one day of the restaurant."""
+
+    def __init__(self, params: dict = None, seed: int = None):
+        """
+        Args:
+            params (dict): Overrides for SIMULATION_DEFAULTS.
+            seed (int): Seed of the random generator, for reproducible runs.
+        """
+        self.params = {**SIMULATION_DEFAULTS, **(params or {})}
+        self.rng = random.Random(seed)
+        self.now = 0.0
+        self._events = []
+        self._sequence = itertools.count()  # Breaks ties between events at the same time
+
+        schedule = sorted(self.params['STAFF_SCHEDULE'])
+        if not schedule or schedule[0][0] > 0:
+            # The staff before the first entry would be unknown
+            raise ValueError("STAFF_SCHEDULE must have an entry starting at minute 0")
+        self.counters = Station(self, schedule[0][1])
+        self.grills = Station(self, schedule[0][2])
+        for start, counters, grills in schedule[1:]:
+            self.schedule_at(start, self._change_staff, counters, grills)
+
+        self._rates = sorted(self.params['ARRIVAL_RATES'])
+        self._sizes = list(self.params['ORDER_SIZE'])
+        self._size_weights = list(itertools.accumulate(self.params['ORDER_SIZE'].values()))
+        self._menu = list(self.params['MENU_MIX'])
+        self._menu_weights = list(itertools.accumulate(self.params['MENU_MIX'].values()))
+
+        self.counter_waits = []
+        self.times_in_system = []
+        self.revenue = 0.0
+        self._orders = 0
+
+    def schedule_at(self, time: float, handler, *args):
+        """Adds an event to the queue."""
+        heapq.heappush(self._events, (time, next(self._sequence), handler, args))
+
+    def run(self) -> dict:
+        """Runs the day until the last order is served and returns its metrics."""
+        self.schedule_at(self._next_arrival(0.0), self._arrival)
+        while self._events:
+            self.now, _, handler, args = heapq.heappop(self._events)
+            handler(*args)
+        return self.metrics()
+
+    def _next_arrival(self, time: float):
+        """Draws the next arrival of the piecewise-constant Poisson process."""
+        closing = self.params['OPENING_MINUTES']
+        while time < closing:
+            segment_end = closing
+            rate = 0.0
+            for start, segment_rate in self._rates:
+                if start <= time:
+                    rate = segment_rate
+                elif start < segment_end:
+                    segment_end = start
+                    break
+            if rate > 0:
+                candidate = time + self.rng.expovariate(rate)
+                if candidate < segment_end:
+                    return candidate
+            # Exponential arrivals are memoryless: restart at the next segment
+            time = segment_end
+        return None
+
+    def _change_staff(self, counters: int, grills: int):
+        self.counters.set_capacity(counters)
+        self.grills.set_capacity(grills)
+
+    def _arrival(self):
+        next_time = self._next_arrival(self.now)
+        if next_time is not None:
+            self.schedule_at(next_time, self._arrival)
+
+        self._orders += 1
+        order = Order(self._orders, bus=QUIET_BUS)
+        size = self.rng.choices(self._sizes, cum_weights=self._size_weights)[0]
+        burgers = []
+        for patty, cheese in self.rng.choices(self._menu, cum_weights=self._menu_weights, k=size):
+            burger = Burger(bus=QUIET_BUS)
+            if patty:
+                burger.add_patty()
+            if cheese:
+                burger.add_cheese()
+            burgers.append(burger)
+        customer = {'arrival': self.now, 'order': order, 'burgers': burgers, 'pending': size}
+        self.counters.request(lambda: self._start_counter(customer))
+
+    def _start_counter(self, customer: dict):
+        self.counter_waits.append(self.now - customer['arrival'])
+        mean = (self.params['COUNTER_MINUTES_PER_ORDER']
+                + self.params['COUNTER_MINUTES_PER_ITEM'] * len(customer['burgers']))
+        self.schedule_at(self.now + self.rng.expovariate(1 / mean), self._finish_counter, customer)
+
+    def _finish_counter(self, customer: dict):
+        order = customer['order']
+        for burger in customer['burgers']:
+            order.add_item(burger)
+            self.grills.request(lambda burger=burger: self._start_grill(customer, burger))
+        self.revenue += order.get_total()
+        self.counters.release()
+
+    def _start_grill(self, customer: dict, burger: Burger):
+        mean = self.params['GRILL_MINUTES_PATTY'] if burger.patty else self.params['GRILL_MINUTES_VEGGIE']
+        self.schedule_at(self.now + self.rng.expovariate(1 / mean), self._finish_grill, customer)
+
+    def _finish_grill(self, customer: dict):
+        self.grills.release()
+        customer['pending'] -= 1
+        if customer['pending'] == 0:
+            self.times_in_system.append(self.now - customer['arrival'])
+
+    def metrics(self) -> dict:
+        """Summary of the simulated day. Times are in minutes."""
+        self.counters._account()
+        self.grills._account()
+        times = sorted(self.times_in_system)
+        return {
+            'customers': len(times),
+            'mean_counter_wait': statistics.fmean(self.counter_waits) if self.counter_waits else 0.0,
+            'mean_time_in_system': statistics.fmean(times) if times else 0.0,
+            'p95_time_in_system': times[int(0.95 * (len(times) - 1))] if times else 0.0,
+            'max_counter_queue': self.counters.max_queue,
+            'max_grill_queue': self.grills.max_queue,
+            'counter_busy_minutes': self.counters.busy_time,
+            'grill_busy_minutes': self.grills.busy_time,
+            'closing_time': self.now,
+            'revenue': self.revenue,
+        }
+
+
+def _replicate(params: dict, seed: int) -> dict:
+    """Runs one replication. Top-level so worker processes can pickle it."""
+    return Simulation(params, seed).run()
+
+
+def summarize(results: list, confidence: float = 0.95) -> dict:
+    """
+    Computes the mean of every metric with a confidence interval.
+
+    Uses the normal approximation, which is accurate for the hundreds or
+    thousands of replications this module is meant for (use at least 30).
+
+    Returns:
+        dict: metric -> (mean, lower bound, upper bound)
+    """
+    z = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+    summary = {}
+    for metric in results[0]:
+        values = [result[metric] for result in results]
+        mean = statistics.fmean(values)
+        half_width = z * statistics.stdev(values) / math.sqrt(len(values)) if len(values) > 1 else 0.0
+        summary[metric] = (mean, mean - half_width, mean + half_width)
+    return summary
+
+
+def run_replications(params: dict = None, replications: int = 1000, seed: int = 0,
+                     workers: int = None, pool: ProcessPoolExecutor = None) -> dict:
+    """
+    Runs independent simulated days in parallel and summarizes them.
+
+    Args:
+        params (dict): Overrides for SIMULATION_DEFAULTS.
+        replications (int): Number of simulated days.
+        seed (int): Seed of the first replication; replication i uses seed + i.
+        workers (int): Number of processes. Defaults to the number of cores.
+        pool (ProcessPoolExecutor): Reuse an existing pool instead of creating one.
+    """
+    if replications < 1:
+        raise ValueError("replications must be at least 1")
+    workers = workers or os.cpu_count() or 1
+    seeds = range(seed, seed + replications)
+    # Large chunks keep the inter-process overhead small compared to a simulated day
+    chunksize = max(1, replications // (workers * 4))
+    if pool is None:
+        with ProcessPoolExecutor(max_workers=workers) as own_pool:
+            results = list(own_pool.map(_replicate, itertools.repeat(params), seeds, chunksize=chunksize))
+    else:
+        results = list(pool.map(_replicate, itertools.repeat(params), seeds, chunksize=chunksize))
+    return summarize(results)
+
+
+def plan_capacity(counters: range, grills: range, max_time_in_system: float,
+                  params: dict = None, replications: int = 500, workers: int = None) -> list:
+    """
+    Simulates every staffing level with the same number of counters and
+    grills all day, and flags the ones that meet the service target.
+
+    A staffing level meets the target when the upper bound of the confidence
+    interval of the mean time in system is below `max_time_in_system`.
+
+    Returns:
+        list: One dict per staffing level, cheapest (fewest staff) first.
+    """
+    plans = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for n_counters, n_grills in itertools.product(counters, grills):
+            scenario = {**(params or {}), 'STAFF_SCHEDULE': [(0, n_counters, n_grills)]}
+            summary = run_replications(scenario, replications, workers=workers, pool=pool)
+            plans.append({
+                'counters': n_counters,
+                'grills': n_grills,
+                'mean_time_in_system': summary['mean_time_in_system'],
+                'p95_time_in_system': summary['p95_time_in_system'][0],
+                'meets_target': summary['mean_time_in_system'][2] <= max_time_in_system,
+            })
+    plans.sort(key=lambda plan: (plan['counters'] + plan['grills'], plan['counters']))
+    return plans